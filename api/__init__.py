@@ -26,6 +26,11 @@ from  .vehicle import vehicles_ns
 from .task import tasks_ns
 from .invoice import invoices_ns
 from .invoice_item import invoice_items_ns
+from .cache import cache_ns
+from .dashboard import dashboard_ns
+from .report import reports_ns
+from .search import search_ns
+from .lookup import lookup_ns
 
 # Add namespaces to the Swagger documentation and API
 api.add_namespace(clients_ns, path='/client')  # Routes for client operations
@@ -34,4 +39,9 @@ api.add_namespace(works_ns, path="/work")
 api.add_namespace(vehicles_ns, path="/vehicle")
 api.add_namespace(tasks_ns, path='/task')  # Routes for task operations
 api.add_namespace(invoices_ns, path='/invoice')  # Routes for invoice operations
-api.add_namespace(invoice_items_ns, path='/invoice_item')  # Routes for invoice item operations
\ No newline at end of file
+api.add_namespace(invoice_items_ns, path='/invoice_item')  # Routes for invoice item operations
+api.add_namespace(cache_ns, path='/cache')  # Response cache statistics
+api.add_namespace(dashboard_ns, path='/dashboard')  # Dashboard figures
+api.add_namespace(reports_ns, path='/report')  # Reports
+api.add_namespace(search_ns, path='/search')  # Full-text search
+api.add_namespace(lookup_ns, path='/lookup')  # Lookups by plate, phone number or email
\ No newline at end of file
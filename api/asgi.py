@@ -0,0 +1,109 @@
+import logging
+from flask import current_app, request
+from flask_restx import abort
+from werkzeug.exceptions import HTTPException
+from api.client import client_list_parser, client_fields_parser
+from api.employee import employee_list_parser
+from api.invoice import invoice_list_parser, invoice_fields_parser
+from api.invoice_item import invoice_item_list_parser, invoice_item_fields_parser
+from api.task import task_list_parser, task_fields_parser
+from api.vehicle import vehicle_list_parser, vehicle_fields_parser
+from api.work import work_list_parser, work_fields_parser
+from models.invoice import Invoice
+from models.task import Task
+from models.vehicle import Vehicle
+from models.work import Work
+from services.client_service import get_all_clients_async, get_client_async
+from services.employee_service import get_all_employees_async
+from services.invoice_service import get_all_invoices_async, get_invoice_async
+from services.invoice_item_service import get_all_invoice_items_async, get_invoice_item_async
+from services.task_service import get_all_tasks_async, get_task_async
+from services.vehicle_service import get_all_vehicles_async, get_vehicle_async
+from services.work_service import get_all_works_async, get_work_async
+from utils.asgi import AsyncApi, SyncFallback
+from utils.conditional import async_conditional_get
+from utils.pagination import pagination_headers
+from utils.serialization import json_response
+from utils.streaming import wants_ndjson
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Async handlers of the ASGI serving mode (see asgi.py). They answer the collection
+# and detail GET requests the front end fans out, with the request parsers of the
+# synchronous resources, so the Swagger documentation describes both modes.
+async_api = AsyncApi(url_prefix='/api')
+
+# Resources served asynchronously: path, label, model whose ?include= feeds the
+# ETag (None without includes), parsers and async services. The employee detail
+# stays on the synchronous resource, which answers a missing employee differently.
+ASYNC_RESOURCES = [
+    ('client', 'client', None, client_list_parser, client_fields_parser,
+     get_all_clients_async, get_client_async),
+    ('employee', 'employee', None, employee_list_parser, None,
+     get_all_employees_async, None),
+    ('vehicle', 'vehicle', Vehicle, vehicle_list_parser, vehicle_fields_parser,
+     get_all_vehicles_async, get_vehicle_async),
+    ('work', 'work', Work, work_list_parser, work_fields_parser,
+     get_all_works_async, get_work_async),
+    ('task', 'task', Task, task_list_parser, task_fields_parser,
+     get_all_tasks_async, get_task_async),
+    ('invoice', 'invoice', Invoice, invoice_list_parser, invoice_fields_parser,
+     get_all_invoices_async, get_invoice_async),
+    ('invoice_item', 'invoice item', None, invoice_item_list_parser, invoice_item_fields_parser,
+     get_all_invoice_items_async, get_invoice_item_async),
+]
+
+
+def _check_served():
+    """
+    Hand the request over to the synchronous resource when it asks for what only
+    the synchronous path does: an X-Fields mask marshalled by flask-restx.
+    """
+    if request.headers.get(current_app.config["RESTX_MASK_HEADER"]):
+        raise SyncFallback()
+
+
+def _register(path, label, model, list_parser, fields_parser, get_all, get_one):
+    """
+    Register the async collection and detail handlers of a resource.
+    """
+    plural = f"{label}s"
+
+    @async_api.route(f'/{path}/', endpoint=f'{path}_list')
+    @async_conditional_get(path, model=model)
+    async def get_list(session):
+        _check_served()
+        try:
+            args = list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                raise SyncFallback()
+            page = await get_all(session, **args)
+            return json_response(page["items"], 200, pagination_headers(page))
+        except (HTTPException, SyncFallback):
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving {plural}: {e}")
+            abort(500, f"An error occurred while retrieving the {plural}.")
+
+    if get_one is None:
+        return
+
+    @async_api.route(f'/{path}/<int:ident>', endpoint=path)
+    @async_conditional_get(path, model=model)
+    async def get_detail(session, ident):
+        _check_served()
+        try:
+            item = await get_one(session, ident, **fields_parser.parse_args())
+            if not item:
+                abort(404, f"{label.capitalize()} with ID {ident} not found.")
+            return json_response(item)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error retrieving {label} with ID {ident}: {e}")
+            abort(500, f"An error occurred while retrieving the {label}.")
+
+
+for resource in ASYNC_RESOURCES:
+    _register(*resource)
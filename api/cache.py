@@ -0,0 +1,60 @@
+import logging
+from flask_restx import Namespace, Resource, fields
+from werkzeug.exceptions import HTTPException
+from utils.response_cache import response_cache
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Define a namespace for the response cache
+cache_ns = Namespace('cache', description='Response cache statistics')
+
+# Swagger model of the cache statistics
+cache_stats_model = cache_ns.model('CacheStats', {
+    'entries': fields.Integer(description='Number of cached responses'),
+    'bytes': fields.Integer(description='Size of the cached responses'),
+    'max_bytes': fields.Integer(description='Size limit of the cache (RESPONSE_CACHE_MAX_BYTES)'),
+    'hits': fields.Integer(description='Requests served from the cache'),
+    'misses': fields.Integer(description='Requests that had to run the handler'),
+    'evictions': fields.Integer(description='Responses dropped to stay within the size limit'),
+    'invalidations': fields.Integer(description='Responses dropped because their tables changed'),
+})
+
+
+@cache_ns.route('/')
+class Cache(Resource):
+    """
+    Handles the response cache of this worker.
+    Supports reading its statistics (GET) and emptying it (DELETE).
+    """
+
+    @cache_ns.doc('get_cache_stats')
+    @cache_ns.marshal_with(cache_stats_model)
+    def get(self):
+        """
+        Retrieve the hit, miss and eviction counters of the response cache.
+        :return: The cache statistics
+        """
+        try:
+            return response_cache.stats()
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving the cache statistics: {e}")
+            cache_ns.abort(500, "An error occurred while retrieving the cache statistics.")
+
+    @cache_ns.doc('clear_cache')
+    @cache_ns.response(204, 'Cache cleared')
+    def delete(self):
+        """
+        Drop every cached response.
+        :return: HTTP status code 204
+        """
+        try:
+            response_cache.clear()
+            return '', 204
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error clearing the cache: {e}")
+            cache_ns.abort(500, "An error occurred while clearing the cache.")
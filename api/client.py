@@ -1,14 +1,27 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource
 from werkzeug.exceptions import HTTPException
 from services.client_service import (
     get_all_clients,
+    stream_clients,
     get_client,
     create_client,
     update_client,
-    delete_client
+    delete_client,
+    create_clients_bulk,
+    update_clients_bulk,
+    delete_clients_bulk
 )
 from utils.utils import generate_swagger_model
+from utils.pagination import build_list_parser, pagination_headers
+from utils.projection import build_fields_parser
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.conditional import conditional_get
+from utils.bulk import (
+    bulk_parser, build_bulk_filter_parser, bulk_result_model, bulk_update_model, bulk_delete_model, bulk_count_model
+)
 from models.client import Client
 
 
@@ -27,6 +40,18 @@ client_model = generate_swagger_model(
     readonly_fields=['client_id']  # Fields that cannot be modified
 )
 
+# Query string parsers for the client collection and for a single client
+client_list_parser = build_list_parser(Client)
+client_fields_parser = build_fields_parser(Client)
+
+# Request and response models of the bulk endpoints
+client_bulk_model = bulk_result_model(clients_ns, client_model)
+client_bulk_update_model = bulk_update_model(clients_ns, client_model)
+client_bulk_delete_model = bulk_delete_model(clients_ns, client_model)
+client_bulk_updated_model = bulk_count_model(clients_ns, client_model, 'updated')
+client_bulk_deleted_model = bulk_count_model(clients_ns, client_model, 'deleted')
+client_bulk_filter_parser = build_bulk_filter_parser(Client)
+
 
 @clients_ns.route('/')
 class ClientList(Resource):
@@ -36,15 +61,21 @@ class ClientList(Resource):
     """
 
     @clients_ns.doc('get_all_clients')
-    @clients_ns.marshal_list_with(client_model)
+    @clients_ns.expect(client_list_parser)
+    @conditional_get('client')
+    @marshal_list_with(clients_ns, client_model)
     def get(self):
         """
         Retrieve all clients.
         :return: List of all clients
         """
         try:
-            # Fetch all clients from the service layer
-            return get_all_clients()
+            # Fetch a page of clients from the service layer
+            args = client_list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                return ndjson_response(stream_clients(args['fields'], args['filters']), client_model)
+            page = get_all_clients(**args)
+            return page["items"], 200, pagination_headers(page)
         except HTTPException as http_err:
             # Allow HTTP exceptions to propagate their status codes and messages
             logger.error(f"HTTP error while retrieving clients: {http_err}")
@@ -75,6 +106,78 @@ class ClientList(Resource):
             clients_ns.abort(500, "An error occurred while creating the client.")
 
 
+@clients_ns.route('/bulk')
+class ClientBulk(Resource):
+    """
+    Handles bulk operations on clients.
+    Supports creating (POST), updating (PATCH) and deleting (DELETE) many clients at once.
+    """
+
+    @clients_ns.doc('create_clients_bulk')
+    @clients_ns.expect([client_model], bulk_parser)
+    @clients_ns.marshal_with(client_bulk_model, code=201)
+    @clients_ns.response(207, 'Some items were rejected', client_bulk_model)
+    @clients_ns.response(400, 'Bad Request')
+    def post(self):
+        """
+        Create many clients in a single transaction.
+        :return: The created clients and the rejected items, with HTTP status code 201 (207 if any item was rejected)
+        """
+        data = clients_ns.payload  # Extract JSON payload
+        if not isinstance(data, list):
+            clients_ns.abort(400, "Expected a list of clients.")
+        try:
+            result = create_clients_bulk(data, **bulk_parser.parse_args())
+            return result, 207 if result["errors"] else 201
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk creating clients: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk creating clients: {e}")
+            clients_ns.abort(500, "An error occurred while creating the clients.")
+
+    @clients_ns.doc('update_clients_bulk')
+    @clients_ns.expect(client_bulk_update_model, client_bulk_filter_parser)
+    @clients_ns.marshal_with(client_bulk_updated_model)
+    @clients_ns.response(400, 'Bad Request')
+    def patch(self):
+        """
+        Update the clients matching a list of ids and/or the query string filters.
+        :return: The number of updated clients, with HTTP status code 200
+        """
+        data = clients_ns.payload or {}  # Extract JSON payload
+        filters = client_bulk_filter_parser.parse_args()['filters']
+        try:
+            return update_clients_bulk(data.get('values'), data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk updating clients: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk updating clients: {e}")
+            clients_ns.abort(500, "An error occurred while updating the clients.")
+
+    @clients_ns.doc('delete_clients_bulk')
+    @clients_ns.expect(client_bulk_delete_model, client_bulk_filter_parser)
+    @clients_ns.marshal_with(client_bulk_deleted_model)
+    @clients_ns.response(400, 'Bad Request')
+    @clients_ns.response(409, 'Some clients are still referenced')
+    def delete(self):
+        """
+        Delete the clients matching a list of ids and/or the query string filters.
+        :return: The number of deleted clients, with HTTP status code 200
+        """
+        data = request.get_json(silent=True) or {}  # The body is optional when filtering
+        filters = client_bulk_filter_parser.parse_args()['filters']
+        try:
+            return delete_clients_bulk(data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk deleting clients: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk deleting clients: {e}")
+            clients_ns.abort(500, "An error occurred while deleting the clients.")
+
+
 @clients_ns.route('/<int:client_id>')
 @clients_ns.param('client_id', 'The ID of the client')
 class Client(Resource):
@@ -84,7 +187,9 @@ class Client(Resource):
     """
 
     @clients_ns.doc('get_client')
-    @clients_ns.marshal_with(client_model)
+    @clients_ns.expect(client_fields_parser)
+    @conditional_get('client')
+    @marshal_with(clients_ns, client_model)
     def get(self, client_id):
         """
         Retrieve a client by ID.
@@ -93,7 +198,7 @@ class Client(Resource):
         """
         try:
             # Fetch client by ID
-            client = get_client(client_id)
+            client = get_client(client_id, **client_fields_parser.parse_args())
             if not client:
                 # Return a 404 error if client does not exist
                 clients_ns.abort(404, f"Client with ID {client_id} not found.")
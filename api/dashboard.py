@@ -0,0 +1,56 @@
+import logging
+from flask_restx import Namespace, Resource, fields
+from werkzeug.exceptions import HTTPException
+from services.dashboard_service import get_summary
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Define a namespace for the dashboard
+dashboard_ns = Namespace('dashboard', description='Aggregated figures for the dashboard')
+
+# Swagger models of the dashboard summary
+works_by_status_model = dashboard_ns.model('WorksByStatus', {
+    'status': fields.String(description='Work status'),
+    'count': fields.Integer(description='Number of works with this status'),
+})
+tasks_in_progress_model = dashboard_ns.model('TasksInProgress', {
+    'employee_id': fields.Integer(description='ID of the employee'),
+    'name': fields.String(description='Name of the employee'),
+    'count': fields.Integer(description='Number of tasks in progress'),
+})
+summary_model = dashboard_ns.model('DashboardSummary', {
+    'month': fields.String(description='Month of the revenue figures (YYYY-MM)'),
+    'clients': fields.Integer(description='Number of clients'),
+    'open_works': fields.Integer(description='Number of works not completed yet'),
+    'works_by_status': fields.List(fields.Nested(works_by_status_model)),
+    'tasks_in_progress': fields.List(fields.Nested(tasks_in_progress_model)),
+    'revenue': fields.Float(description='Total of the invoices issued this month'),
+    'revenue_with_iva': fields.Float(description='Total with IVA of the invoices issued this month'),
+    'generated_at': fields.DateTime(description='When the figures were computed'),
+})
+
+
+@dashboard_ns.route('/summary')
+class DashboardSummary(Resource):
+    """
+    Handles the dashboard summary.
+    Supports retrieving every figure of the dashboard in one request (GET).
+    """
+
+    @dashboard_ns.doc('get_dashboard_summary')
+    @dashboard_ns.marshal_with(summary_model)
+    def get(self):
+        """
+        Retrieve the dashboard summary.
+        The figures are computed with a single aggregate query and cached until the
+        underlying tables change (at most DASHBOARD_CACHE_TTL seconds between checks).
+        :return: The dashboard summary
+        """
+        try:
+            return get_summary()
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving the dashboard summary: {e}")
+            dashboard_ns.abort(500, "An error occurred while retrieving the dashboard summary.")
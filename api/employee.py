@@ -1,8 +1,17 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource, abort
 from models.employee import Employee
-from services.employee_service import get_all_employees, get_employee, create_employee, update_employee, delete_employee
+from services.employee_service import get_all_employees, stream_employees, get_employee, create_employee, update_employee, delete_employee, create_employees_bulk, update_employees_bulk, delete_employees_bulk
 from utils.utils import generate_swagger_model
+from utils.pagination import build_list_parser, pagination_headers
+from utils.projection import build_fields_parser
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.conditional import conditional_get
+from utils.bulk import (
+    bulk_parser, build_bulk_filter_parser, bulk_result_model, bulk_update_model, bulk_delete_model, bulk_count_model
+)
 from werkzeug.exceptions import HTTPException, BadRequest, NotFound
 
 # Initialize logging
@@ -20,6 +29,18 @@ employee_model = generate_swagger_model(
     readonly_fields=['employee_id', 'created_at']
 )
 
+# Query string parsers for the employee collection and for a single employee
+employee_list_parser = build_list_parser(Employee)
+employee_fields_parser = build_fields_parser(Employee)
+
+# Request and response models of the bulk endpoints
+employee_bulk_model = bulk_result_model(employees_ns, employee_model)
+employee_bulk_update_model = bulk_update_model(employees_ns, employee_model)
+employee_bulk_delete_model = bulk_delete_model(employees_ns, employee_model)
+employee_bulk_updated_model = bulk_count_model(employees_ns, employee_model, 'updated')
+employee_bulk_deleted_model = bulk_count_model(employees_ns, employee_model, 'deleted')
+employee_bulk_filter_parser = build_bulk_filter_parser(Employee)
+
 # Routes for managing employees
 @employees_ns.route('/')
 @employees_ns.response(500, 'Internal Server Error')
@@ -28,15 +49,20 @@ class EmployeeList(Resource):
     Resource for operations on the collection of employees (GET all, POST new).
     """
     @employees_ns.doc('get_all_employees')
-    @employees_ns.marshal_list_with(employee_model)
+    @employees_ns.expect(employee_list_parser)
+    @conditional_get('employee')
+    @marshal_list_with(employees_ns, employee_model)
     def get(self):
         """
         Retrieve all employees.
         :return: List of all employees in dictionary format
         """
         try:
-            employees = get_all_employees()
-            return employees
+            args = employee_list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                return ndjson_response(stream_employees(args['fields'], args['filters']), employee_model)
+            page = get_all_employees(**args)
+            return page["items"], 200, pagination_headers(page)
         except HTTPException as http_err:
             # Allow HTTP exceptions to propagate as they are
             raise http_err
@@ -67,6 +93,78 @@ class EmployeeList(Resource):
             employees_ns.abort(400, "Bad Request")
 
 
+@employees_ns.route('/bulk')
+class EmployeeBulk(Resource):
+    """
+    Handles bulk operations on employees.
+    Supports creating (POST), updating (PATCH) and deleting (DELETE) many employees at once.
+    """
+
+    @employees_ns.doc('create_employees_bulk')
+    @employees_ns.expect([employee_model], bulk_parser)
+    @employees_ns.marshal_with(employee_bulk_model, code=201)
+    @employees_ns.response(207, 'Some items were rejected', employee_bulk_model)
+    @employees_ns.response(400, 'Bad Request')
+    def post(self):
+        """
+        Create many employees in a single transaction.
+        :return: The created employees and the rejected items, with HTTP status code 201 (207 if any item was rejected)
+        """
+        data = employees_ns.payload  # Extract JSON payload
+        if not isinstance(data, list):
+            employees_ns.abort(400, "Expected a list of employees.")
+        try:
+            result = create_employees_bulk(data, **bulk_parser.parse_args())
+            return result, 207 if result["errors"] else 201
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk creating employees: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk creating employees: {e}")
+            employees_ns.abort(500, "An error occurred while creating the employees.")
+
+    @employees_ns.doc('update_employees_bulk')
+    @employees_ns.expect(employee_bulk_update_model, employee_bulk_filter_parser)
+    @employees_ns.marshal_with(employee_bulk_updated_model)
+    @employees_ns.response(400, 'Bad Request')
+    def patch(self):
+        """
+        Update the employees matching a list of ids and/or the query string filters.
+        :return: The number of updated employees, with HTTP status code 200
+        """
+        data = employees_ns.payload or {}  # Extract JSON payload
+        filters = employee_bulk_filter_parser.parse_args()['filters']
+        try:
+            return update_employees_bulk(data.get('values'), data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk updating employees: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk updating employees: {e}")
+            employees_ns.abort(500, "An error occurred while updating the employees.")
+
+    @employees_ns.doc('delete_employees_bulk')
+    @employees_ns.expect(employee_bulk_delete_model, employee_bulk_filter_parser)
+    @employees_ns.marshal_with(employee_bulk_deleted_model)
+    @employees_ns.response(400, 'Bad Request')
+    @employees_ns.response(409, 'Some employees are still referenced')
+    def delete(self):
+        """
+        Delete the employees matching a list of ids and/or the query string filters.
+        :return: The number of deleted employees, with HTTP status code 200
+        """
+        data = request.get_json(silent=True) or {}  # The body is optional when filtering
+        filters = employee_bulk_filter_parser.parse_args()['filters']
+        try:
+            return delete_employees_bulk(data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk deleting employees: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk deleting employees: {e}")
+            employees_ns.abort(500, "An error occurred while deleting the employees.")
+
+
 @employees_ns.route('/<int:employee_id>')
 @employees_ns.response(404, 'Employee ID not found')
 @employees_ns.response(500, 'Internal Server Error')
@@ -78,14 +176,17 @@ class Employee(Resource):
     @employees_ns.route('/<int:employee_id>')
     class EmployeeResource(Resource):
         @employees_ns.doc('get_employee')
-        @employees_ns.marshal_with(employee_model)
+        @employees_ns.expect(employee_fields_parser)
+        @conditional_get('employee')
+        @marshal_with(employees_ns, employee_model)
         def get(self, employee_id):
             """
             Retrieve a specific employee by ID.
             """
+            args = employee_fields_parser.parse_args()
             try:
                 # Fetch the employee by ID
-                employee = get_employee(employee_id)
+                employee = get_employee(employee_id, **args)
                 if not employee:
                     # Abort with a 404 status and custom message
                     raise NotFound('My custom message')
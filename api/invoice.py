@@ -1,8 +1,18 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource, abort
 from models.invoice import Invoice
-from services.invoice_service import get_all_invoices, get_invoice, create_invoice, update_invoice, delete_invoice
+from services.invoice_service import get_all_invoices, stream_invoices, get_invoice, create_invoice, update_invoice, delete_invoice, create_invoices_bulk, update_invoices_bulk, delete_invoices_bulk
 from utils.utils import generate_swagger_model
+from utils.pagination import build_list_parser, pagination_headers
+from utils.projection import build_fields_parser
+from utils.includes import add_include_argument
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.conditional import conditional_get
+from utils.bulk import (
+    bulk_parser, build_bulk_filter_parser, bulk_result_model, bulk_update_model, bulk_delete_model, bulk_count_model
+)
 from werkzeug.exceptions import HTTPException, BadRequest, NotFound
 
 # Initialize logging
@@ -20,16 +30,35 @@ invoice_model = generate_swagger_model(
     readonly_fields=['invoice_id']
 )
 
+# Query string parsers for the invoice collection and for a single invoice
+invoice_list_parser = add_include_argument(build_list_parser(Invoice), Invoice)
+invoice_fields_parser = add_include_argument(build_fields_parser(Invoice), Invoice)
+
+# Request and response models of the bulk endpoints
+invoice_bulk_model = bulk_result_model(invoices_ns, invoice_model)
+invoice_bulk_update_model = bulk_update_model(invoices_ns, invoice_model)
+invoice_bulk_delete_model = bulk_delete_model(invoices_ns, invoice_model)
+invoice_bulk_updated_model = bulk_count_model(invoices_ns, invoice_model, 'updated')
+invoice_bulk_deleted_model = bulk_count_model(invoices_ns, invoice_model, 'deleted')
+invoice_bulk_filter_parser = build_bulk_filter_parser(Invoice)
+
 # Routes for managing invoices
 @invoices_ns.route('/')
 @invoices_ns.response(500, 'Internal Server Error')
 class InvoiceList(Resource):
     @invoices_ns.doc('get_all_invoices')
-    @invoices_ns.marshal_list_with(invoice_model)
+    @invoices_ns.expect(invoice_list_parser)
+    @conditional_get('invoice', model=Invoice)
+    @marshal_list_with(invoices_ns, invoice_model)
     def get(self):
         try:
-            invoices = get_all_invoices()
-            return invoices
+            args = invoice_list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                return ndjson_response(
+                    stream_invoices(args['fields'], args['filters'], args['include']), invoice_model, args['include']
+                )
+            page = get_all_invoices(**args)
+            return page["items"], 200, pagination_headers(page)
         except HTTPException as http_err:
             raise http_err
         except Exception as e:
@@ -58,16 +87,71 @@ class InvoiceList(Resource):
             invoices_ns.abort(400, "Bad Request")
 
 
+@invoices_ns.route('/bulk')
+@invoices_ns.response(500, 'Internal Server Error')
+class InvoiceBulk(Resource):
+    @invoices_ns.doc('create_invoices_bulk')
+    @invoices_ns.expect([invoice_model], bulk_parser)
+    @invoices_ns.marshal_with(invoice_bulk_model, code=201)
+    @invoices_ns.response(207, 'Some items were rejected', invoice_bulk_model)
+    @invoices_ns.response(400, 'Bad Request')
+    def post(self):
+        try:
+            data = invoices_ns.payload
+            if not isinstance(data, list):
+                invoices_ns.abort(400, "Expected a list of invoices.")
+            result = create_invoices_bulk(data, **bulk_parser.parse_args())
+            return result, 207 if result["errors"] else 201
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk creating invoices: {e}")
+            invoices_ns.abort(500, "Internal Server Error")
+
+    @invoices_ns.doc('update_invoices_bulk')
+    @invoices_ns.expect(invoice_bulk_update_model, invoice_bulk_filter_parser)
+    @invoices_ns.marshal_with(invoice_bulk_updated_model)
+    @invoices_ns.response(400, 'Bad Request')
+    def patch(self):
+        try:
+            data = invoices_ns.payload or {}
+            filters = invoice_bulk_filter_parser.parse_args()['filters']
+            return update_invoices_bulk(data.get('values'), data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk updating invoices: {e}")
+            invoices_ns.abort(500, "Internal Server Error")
+
+    @invoices_ns.doc('delete_invoices_bulk')
+    @invoices_ns.expect(invoice_bulk_delete_model, invoice_bulk_filter_parser)
+    @invoices_ns.marshal_with(invoice_bulk_deleted_model)
+    @invoices_ns.response(400, 'Bad Request')
+    @invoices_ns.response(409, 'Some invoices are still referenced')
+    def delete(self):
+        try:
+            data = request.get_json(silent=True) or {}  # The body is optional when filtering
+            filters = invoice_bulk_filter_parser.parse_args()['filters']
+            return delete_invoices_bulk(data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk deleting invoices: {e}")
+            invoices_ns.abort(500, "Internal Server Error")
+
+
 @invoices_ns.route('/<int:invoice_id>')
 @invoices_ns.response(404, 'Invoice ID not found')
 @invoices_ns.response(500, 'Internal Server Error')
 @invoices_ns.param('invoice_id', 'Invoice ID')
 class Invoice(Resource):
     @invoices_ns.doc('get_invoice')
-    @invoices_ns.marshal_with(invoice_model)
+    @invoices_ns.expect(invoice_fields_parser)
+    @conditional_get('invoice', model=Invoice)
+    @marshal_with(invoices_ns, invoice_model)
     def get(self, invoice_id):
         try:
-            invoice = get_invoice(invoice_id)
+            invoice = get_invoice(invoice_id, **invoice_fields_parser.parse_args())
             if not invoice:
                 invoices_ns.abort(404, f"Invoice with ID {invoice_id} not found.")
             return invoice
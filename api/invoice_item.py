@@ -1,14 +1,27 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource
 from werkzeug.exceptions import HTTPException
 from services.invoice_item_service import (
     get_all_invoice_items,
+    stream_invoice_items,
     get_invoice_item,
     create_invoice_item,
     update_invoice_item,
-    delete_invoice_item
+    delete_invoice_item,
+    create_invoice_items_bulk,
+    update_invoice_items_bulk,
+    delete_invoice_items_bulk
 )
 from utils.utils import generate_swagger_model
+from utils.pagination import build_list_parser, pagination_headers
+from utils.projection import build_fields_parser
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.conditional import conditional_get
+from utils.bulk import (
+    bulk_parser, build_bulk_filter_parser, bulk_result_model, bulk_update_model, bulk_delete_model, bulk_count_model
+)
 from models.invoice_item import InvoiceItem
 
 # Initialize logging
@@ -26,6 +39,18 @@ invoice_item_model = generate_swagger_model(
     readonly_fields=['item_id']    # Fields that cannot be modified
 )
 
+# Query string parsers for the invoice item collection and for a single invoice item
+invoice_item_list_parser = build_list_parser(InvoiceItem)
+invoice_item_fields_parser = build_fields_parser(InvoiceItem)
+
+# Request and response models of the bulk endpoints
+invoice_item_bulk_model = bulk_result_model(invoice_items_ns, invoice_item_model)
+invoice_item_bulk_update_model = bulk_update_model(invoice_items_ns, invoice_item_model)
+invoice_item_bulk_delete_model = bulk_delete_model(invoice_items_ns, invoice_item_model)
+invoice_item_bulk_updated_model = bulk_count_model(invoice_items_ns, invoice_item_model, 'updated')
+invoice_item_bulk_deleted_model = bulk_count_model(invoice_items_ns, invoice_item_model, 'deleted')
+invoice_item_bulk_filter_parser = build_bulk_filter_parser(InvoiceItem)
+
 
 @invoice_items_ns.route('/')
 class InvoiceItemList(Resource):
@@ -35,7 +60,9 @@ class InvoiceItemList(Resource):
     """
 
     @invoice_items_ns.doc('get_all_invoice_items')
-    @invoice_items_ns.marshal_list_with(invoice_item_model)
+    @invoice_items_ns.expect(invoice_item_list_parser)
+    @conditional_get('invoice_item')
+    @marshal_list_with(invoice_items_ns, invoice_item_model)
     def get(self):
         """
         Retrieve all invoice items.
@@ -43,7 +70,11 @@ class InvoiceItemList(Resource):
         """
         try:
             # Fetch all invoice items from the service layer
-            return get_all_invoice_items()
+            args = invoice_item_list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                return ndjson_response(stream_invoice_items(args['fields'], args['filters']), invoice_item_model)
+            page = get_all_invoice_items(**args)
+            return page["items"], 200, pagination_headers(page)
         except HTTPException as http_err:
             # Allow HTTP exceptions to propagate their status codes and messages
             logger.error(f"HTTP error while retrieving invoice items: {http_err}")
@@ -74,6 +105,78 @@ class InvoiceItemList(Resource):
             invoice_items_ns.abort(500, "An error occurred while creating the invoice item.")
 
 
+@invoice_items_ns.route('/bulk')
+class InvoiceItemBulk(Resource):
+    """
+    Handles bulk operations on invoice items.
+    Supports creating (POST), updating (PATCH) and deleting (DELETE) many invoice items at once.
+    """
+
+    @invoice_items_ns.doc('create_invoice_items_bulk')
+    @invoice_items_ns.expect([invoice_item_model], bulk_parser)
+    @invoice_items_ns.marshal_with(invoice_item_bulk_model, code=201)
+    @invoice_items_ns.response(207, 'Some items were rejected', invoice_item_bulk_model)
+    @invoice_items_ns.response(400, 'Bad Request')
+    def post(self):
+        """
+        Create many invoice items in a single transaction.
+        :return: The created invoice items and the rejected items, with HTTP status code 201 (207 if any item was rejected)
+        """
+        data = invoice_items_ns.payload  # Extract JSON payload
+        if not isinstance(data, list):
+            invoice_items_ns.abort(400, "Expected a list of invoice items.")
+        try:
+            result = create_invoice_items_bulk(data, **bulk_parser.parse_args())
+            return result, 207 if result["errors"] else 201
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk creating invoice items: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk creating invoice items: {e}")
+            invoice_items_ns.abort(500, "An error occurred while creating the invoice items.")
+
+    @invoice_items_ns.doc('update_invoice_items_bulk')
+    @invoice_items_ns.expect(invoice_item_bulk_update_model, invoice_item_bulk_filter_parser)
+    @invoice_items_ns.marshal_with(invoice_item_bulk_updated_model)
+    @invoice_items_ns.response(400, 'Bad Request')
+    def patch(self):
+        """
+        Update the invoice items matching a list of ids and/or the query string filters.
+        :return: The number of updated invoice items, with HTTP status code 200
+        """
+        data = invoice_items_ns.payload or {}  # Extract JSON payload
+        filters = invoice_item_bulk_filter_parser.parse_args()['filters']
+        try:
+            return update_invoice_items_bulk(data.get('values'), data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk updating invoice items: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk updating invoice items: {e}")
+            invoice_items_ns.abort(500, "An error occurred while updating the invoice items.")
+
+    @invoice_items_ns.doc('delete_invoice_items_bulk')
+    @invoice_items_ns.expect(invoice_item_bulk_delete_model, invoice_item_bulk_filter_parser)
+    @invoice_items_ns.marshal_with(invoice_item_bulk_deleted_model)
+    @invoice_items_ns.response(400, 'Bad Request')
+    @invoice_items_ns.response(409, 'Some invoice items are still referenced')
+    def delete(self):
+        """
+        Delete the invoice items matching a list of ids and/or the query string filters.
+        :return: The number of deleted invoice items, with HTTP status code 200
+        """
+        data = request.get_json(silent=True) or {}  # The body is optional when filtering
+        filters = invoice_item_bulk_filter_parser.parse_args()['filters']
+        try:
+            return delete_invoice_items_bulk(data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk deleting invoice items: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk deleting invoice items: {e}")
+            invoice_items_ns.abort(500, "An error occurred while deleting the invoice items.")
+
+
 @invoice_items_ns.route('/<int:item_id>')
 @invoice_items_ns.param('item_id', 'The ID of the invoice item')
 class InvoiceItem(Resource):
@@ -83,7 +186,9 @@ class InvoiceItem(Resource):
     """
 
     @invoice_items_ns.doc('get_invoice_item')
-    @invoice_items_ns.marshal_with(invoice_item_model)
+    @invoice_items_ns.expect(invoice_item_fields_parser)
+    @conditional_get('invoice_item')
+    @marshal_with(invoice_items_ns, invoice_item_model)
     def get(self, item_id):
         """
         Retrieve an invoice item by ID.
@@ -92,7 +197,7 @@ class InvoiceItem(Resource):
         """
         try:
             # Fetch invoice item by ID
-            invoice_item = get_invoice_item(item_id)
+            invoice_item = get_invoice_item(item_id, **invoice_item_fields_parser.parse_args())
             if not invoice_item:
                 # Return a 404 error if invoice item does not exist
                 invoice_items_ns.abort(404, f"Invoice item with ID {item_id} not found.")
@@ -0,0 +1,112 @@
+import logging
+from flask import current_app, request
+from flask_restx import Namespace, Resource, fields, inputs, reqparse
+from werkzeug.exceptions import HTTPException
+from services.lookup_service import LOOKUP_KEYS, lookup, lookup_plates
+from models.client import Client
+from models.vehicle import Vehicle
+from utils.conditional import conditional_get
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.pagination import page_limit
+from utils.utils import generate_swagger_model
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Define a namespace for the lookups
+lookup_ns = Namespace('lookup', description='Indexed lookups of vehicles and clients by plate, phone number or email')
+
+# Swagger models of the lookup results: vehicles are returned with their client
+client_model = generate_swagger_model(api=lookup_ns, model=Client)
+vehicle_model = lookup_ns.inherit('VehicleWithClient', generate_swagger_model(api=lookup_ns, model=Vehicle), {
+    'client': fields.Nested(client_model, description='Owner of the vehicle'),
+})
+lookup_result_model = lookup_ns.model('LookupResult', {
+    'vehicles': fields.List(fields.Nested(vehicle_model), description='Vehicles found by plate'),
+    'clients': fields.List(fields.Nested(client_model), description='Clients found by phone number or email'),
+})
+plate_lookup_model = lookup_ns.model('PlateLookup', {
+    'plates': fields.List(fields.String, required=True, description='License plates as read, in any format'),
+})
+plate_result_model = lookup_ns.model('PlateLookupResult', {
+    'plate': fields.String(description='License plate as given'),
+    'normalized': fields.String(description='License plate in upper case without separators'),
+    'vehicles': fields.List(fields.Nested(vehicle_model), description='Vehicles with this plate'),
+})
+
+# Query string parser of the lookup: exactly one of plate, phone or email
+lookup_parser = reqparse.RequestParser()
+lookup_parser.add_argument('plate', type=str, location='args',
+                           help='License plate; case, spaces, dashes and dots are ignored.')
+lookup_parser.add_argument('phone', type=str, location='args',
+                           help='Phone number; spaces, dashes, dots, brackets and "+" are ignored.')
+lookup_parser.add_argument('email', type=str, location='args',
+                           help='Email address; case and surrounding spaces are ignored.')
+lookup_parser.add_argument('prefix', type=inputs.boolean, location='args', default=False,
+                           help='Match the values starting with the given one instead of the exact value.')
+lookup_parser.add_argument('limit', type=page_limit, location='args', default=20,
+                           help='Maximum number of results.')
+
+
+@lookup_ns.route('/')
+class Lookup(Resource):
+    """
+    Handles the lookups of a single value.
+    Supports finding vehicles by plate and clients by phone number or email (GET).
+    """
+
+    @lookup_ns.doc('lookup')
+    @lookup_ns.expect(lookup_parser)
+    @conditional_get('vehicle', 'client')
+    @marshal_with(lookup_ns, lookup_result_model)
+    def get(self):
+        """
+        Find the vehicles with a license plate, or the clients with a phone number or email.
+        The values are normalized and matched on an expression index, exactly or by prefix.
+        :return: The matching vehicles and clients
+        """
+        try:
+            args = lookup_parser.parse_args()
+            keys = [key for key in LOOKUP_KEYS if args[key] is not None]
+            if len(keys) != 1:
+                lookup_ns.abort(400, "Exactly one of plate, phone or email must be given.")
+            result = lookup(keys[0], args[keys[0]], prefix=args['prefix'], limit=args['limit'])
+            if result is None:
+                lookup_ns.abort(400, f"The {keys[0]} to look up is empty.")
+            return result, 200
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error looking up: {e}")
+            lookup_ns.abort(500, "An error occurred while looking up.")
+
+
+@lookup_ns.route('/plates')
+class PlateLookup(Resource):
+    """
+    Handles the lookups of batches of license plates.
+    Supports finding the vehicles of many plates at once, e.g. from the gate camera (POST).
+    """
+
+    @lookup_ns.doc('lookup_plates')
+    @lookup_ns.expect(plate_lookup_model, validate=True)
+    @marshal_list_with(lookup_ns, plate_result_model)
+    def post(self):
+        """
+        Find the vehicles of a batch of license plates.
+        The result lists every given plate, in order, with the vehicles found for it.
+        :return: The vehicles of every plate
+        """
+        try:
+            plates = request.json.get('plates')
+            if not all(isinstance(plate, str) for plate in plates):
+                lookup_ns.abort(400, "The plates must be strings.")
+            max_plates = current_app.config["LOOKUP_MAX_PLATES"]
+            if len(plates) > max_plates:
+                lookup_ns.abort(413, f"At most {max_plates} plates can be looked up at once.")
+            return lookup_plates(plates), 200
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error looking up plates: {e}")
+            lookup_ns.abort(500, "An error occurred while looking up the plates.")
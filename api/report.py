@@ -0,0 +1,123 @@
+import logging
+from flask_restx import Namespace, Resource, fields, inputs, reqparse
+from werkzeug.exceptions import HTTPException
+from services.report_service import get_revenue, get_workload
+from utils.conditional import conditional_get
+from utils.marshalling import marshal_list_with
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Define a namespace for the reports
+reports_ns = Namespace('report', description='Reports built from pre-aggregated data')
+
+# Swagger model of a revenue report row
+revenue_model = reports_ns.model('Revenue', {
+    'period': fields.String(description='Day (YYYY-MM-DD) or month (YYYY-MM) of the invoices'),
+    'client_id': fields.Integer(description='Client of the invoices (per client reports only)'),
+    'invoice_count': fields.Integer(description='Number of invoices issued in the period'),
+    'total': fields.Float(description='Sum of the invoice totals'),
+    'total_with_iva': fields.Float(description='Sum of the invoice totals including IVA'),
+})
+
+# Query string parser of the revenue report
+revenue_parser = reqparse.RequestParser()
+revenue_parser.add_argument('group_by', type=str, location='args', default='month',
+                            choices=['day', 'month', 'client'],
+                            help='Period of every row: day, month, or client and month.')
+revenue_parser.add_argument('start', type=inputs.date, location='args',
+                            help='First day of the report (YYYY-MM-DD).')
+revenue_parser.add_argument('end', type=inputs.date, location='args',
+                            help='Last day of the report (YYYY-MM-DD).')
+revenue_parser.add_argument('client_id', type=int, location='args',
+                            help='Restrict a per client report to one client.')
+
+# Swagger models of the workload report
+weekly_throughput_model = reports_ns.model('WeeklyThroughput', {
+    'week': fields.String(description='Monday of the week (YYYY-MM-DD)'),
+    'completed': fields.Integer(description='Tasks completed during the week'),
+    'rolling_average': fields.Float(description='Tasks completed per week over the last 4 weeks'),
+})
+employee_workload_model = reports_ns.model('EmployeeWorkload', {
+    'employee_id': fields.Integer(description='ID of the employee'),
+    'name': fields.String(description='Name of the employee'),
+    'open_tasks': fields.Integer(description='Tasks neither completed nor canceled'),
+    'completed_tasks': fields.Integer(description='Tasks completed'),
+    'avg_duration_days': fields.Float(description='Average days between the start and end date of the completed tasks'),
+    'weekly': fields.List(fields.Nested(weekly_throughput_model)),
+})
+workload_model = reports_ns.model('Workload', {
+    'generated_at': fields.DateTime(description='When the figures were computed'),
+    'since': fields.String(description='First week of throughput returned (YYYY-MM-DD)'),
+    'employees': fields.List(fields.Nested(employee_workload_model)),
+})
+
+
+def _weeks(value):
+    """
+    reqparse type for the number of weeks of throughput.
+    """
+    weeks = int(value)
+    if weeks < 1:
+        raise ValueError("The number of weeks must be a positive number.")
+    return weeks
+
+
+# Query string parser of the workload report
+workload_parser = reqparse.RequestParser()
+workload_parser.add_argument('weeks', type=_weeks, location='args', default=8,
+                             help='Number of weeks of throughput to return, the current one included.')
+workload_parser.add_argument('employee_id', type=int, location='args',
+                             help='Restrict the report to one employee.')
+
+
+@reports_ns.route('/revenue')
+class RevenueReport(Resource):
+    """
+    Handles the revenue report.
+    Supports retrieving the revenue per day, month or client (GET).
+    """
+
+    @reports_ns.doc('get_revenue_report')
+    @reports_ns.expect(revenue_parser)
+    @conditional_get('invoice', 'revenue_daily', 'revenue_monthly', 'revenue_client')
+    @marshal_list_with(reports_ns, revenue_model)
+    def get(self):
+        """
+        Retrieve the revenue report.
+        Only the revenue rollups are read, never the invoice table.
+        :return: The revenue of every period
+        """
+        try:
+            return get_revenue(**revenue_parser.parse_args())
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving the revenue report: {e}")
+            reports_ns.abort(500, "An error occurred while retrieving the revenue report.")
+
+
+@reports_ns.route('/workload')
+class WorkloadReport(Resource):
+    """
+    Handles the employee workload report.
+    Supports retrieving the open tasks, average task duration and weekly throughput of the employees (GET).
+    """
+
+    @reports_ns.doc('get_workload_report')
+    @reports_ns.expect(workload_parser)
+    @reports_ns.marshal_with(workload_model)
+    def get(self):
+        """
+        Retrieve the workload report.
+        The figures are computed with aggregate and window queries and cached until
+        the task or employee table changes.
+        :return: The workload of every employee
+        """
+        try:
+            return get_workload(**workload_parser.parse_args())
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error retrieving the workload report: {e}")
+            reports_ns.abort(500, "An error occurred while retrieving the workload report.")
@@ -0,0 +1,63 @@
+import logging
+from flask_restx import Namespace, Resource, fields, reqparse
+from werkzeug.exceptions import HTTPException
+from services.search_service import search
+from utils.conditional import conditional_get
+from utils.marshalling import marshal_list_with
+from utils.pagination import page_limit, decode_cursor, pagination_headers
+
+# Initialize logging
+logger = logging.getLogger(__name__)
+
+# Define a namespace for the full-text search
+search_ns = Namespace('search', description='Full-text search over clients, vehicles, works and tasks')
+
+# Swagger model of a search result
+search_result_model = search_ns.model('SearchResult', {
+    'resource': fields.String(description='Type of the result: client, vehicle, work or task'),
+    'id': fields.Integer(description='ID of the result in its resource'),
+    'url': fields.String(description='API URL of the result'),
+    'snippet': fields.String(description='Matching text, with the matched words between brackets'),
+    'rank': fields.Float(description='Relevance, lower is better'),
+})
+
+# Query string parser of the search
+search_parser = reqparse.RequestParser()
+search_parser.add_argument('q', type=str, location='args', required=True,
+                           help='Words to search for; the last characters of a word may be omitted.')
+search_parser.add_argument('resource', type=str, location='args',
+                           choices=['client', 'vehicle', 'work', 'task'],
+                           help='Restrict the search to one resource.')
+search_parser.add_argument('limit', type=page_limit, location='args', default=20,
+                           help='Maximum number of results per page.')
+search_parser.add_argument('after', type=decode_cursor, location='args',
+                           help='Cursor returned in the X-Next-Cursor header of the previous page.')
+
+
+@search_ns.route('/')
+class Search(Resource):
+    """
+    Handles the full-text search.
+    Supports searching every searchable resource at once (GET).
+    """
+
+    @search_ns.doc('search')
+    @search_ns.expect(search_parser)
+    @conditional_get('client', 'vehicle', 'work', 'task')
+    @marshal_list_with(search_ns, search_result_model)
+    def get(self):
+        """
+        Search clients (name, email, address), vehicles (brand, model, license plate),
+        works (description and vehicle) and tasks (description), best matches first.
+        :return: A page of results
+        """
+        try:
+            page = search(**search_parser.parse_args())
+            if page is None:
+                search_ns.abort(400, "The search text must contain at least one word.")
+            return page["items"], 200, pagination_headers(page)
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error searching: {e}")
+            search_ns.abort(500, "An error occurred while searching.")
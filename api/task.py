@@ -1,8 +1,18 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource, abort
 from models.task import Task
-from services.task_service import get_all_tasks, get_task, create_task, update_task, delete_task
+from services.task_service import get_all_tasks, stream_tasks, get_task, create_task, update_task, delete_task, create_tasks_bulk, update_tasks_bulk, delete_tasks_bulk
 from utils.utils import generate_swagger_model
+from utils.pagination import build_list_parser, pagination_headers
+from utils.projection import build_fields_parser
+from utils.includes import add_include_argument
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.conditional import conditional_get
+from utils.bulk import (
+    bulk_parser, build_bulk_filter_parser, bulk_result_model, bulk_update_model, bulk_delete_model, bulk_count_model
+)
 from werkzeug.exceptions import HTTPException, BadRequest, NotFound
 
 # Initialize logging
@@ -20,16 +30,35 @@ task_model = generate_swagger_model(
     readonly_fields=['task_id', 'created_at']
 )
 
+# Query string parsers for the task collection and for a single task
+task_list_parser = add_include_argument(build_list_parser(Task), Task)
+task_fields_parser = add_include_argument(build_fields_parser(Task), Task)
+
+# Request and response models of the bulk endpoints
+task_bulk_model = bulk_result_model(tasks_ns, task_model)
+task_bulk_update_model = bulk_update_model(tasks_ns, task_model)
+task_bulk_delete_model = bulk_delete_model(tasks_ns, task_model)
+task_bulk_updated_model = bulk_count_model(tasks_ns, task_model, 'updated')
+task_bulk_deleted_model = bulk_count_model(tasks_ns, task_model, 'deleted')
+task_bulk_filter_parser = build_bulk_filter_parser(Task)
+
 # Routes for managing tasks
 @tasks_ns.route('/')
 @tasks_ns.response(500, 'Internal Server Error')
 class TaskList(Resource):
     @tasks_ns.doc('get_all_tasks')
-    @tasks_ns.marshal_list_with(task_model)
+    @tasks_ns.expect(task_list_parser)
+    @conditional_get('task', model=Task)
+    @marshal_list_with(tasks_ns, task_model)
     def get(self):
         try:
-            tasks = get_all_tasks()
-            return tasks
+            args = task_list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                return ndjson_response(
+                    stream_tasks(args['fields'], args['filters'], args['include']), task_model, args['include']
+                )
+            page = get_all_tasks(**args)
+            return page["items"], 200, pagination_headers(page)
         except HTTPException as http_err:
             raise http_err
         except Exception as e:
@@ -59,16 +88,71 @@ class TaskList(Resource):
             tasks_ns.abort(400, "Bad Request")
 
 
+@tasks_ns.route('/bulk')
+@tasks_ns.response(500, 'Internal Server Error')
+class TaskBulk(Resource):
+    @tasks_ns.doc('create_tasks_bulk')
+    @tasks_ns.expect([task_model], bulk_parser)
+    @tasks_ns.marshal_with(task_bulk_model, code=201)
+    @tasks_ns.response(207, 'Some items were rejected', task_bulk_model)
+    @tasks_ns.response(400, 'Bad Request')
+    def post(self):
+        try:
+            data = tasks_ns.payload
+            if not isinstance(data, list):
+                tasks_ns.abort(400, "Expected a list of tasks.")
+            result = create_tasks_bulk(data, **bulk_parser.parse_args())
+            return result, 207 if result["errors"] else 201
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk creating tasks: {e}")
+            tasks_ns.abort(500, "Internal Server Error")
+
+    @tasks_ns.doc('update_tasks_bulk')
+    @tasks_ns.expect(task_bulk_update_model, task_bulk_filter_parser)
+    @tasks_ns.marshal_with(task_bulk_updated_model)
+    @tasks_ns.response(400, 'Bad Request')
+    def patch(self):
+        try:
+            data = tasks_ns.payload or {}
+            filters = task_bulk_filter_parser.parse_args()['filters']
+            return update_tasks_bulk(data.get('values'), data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk updating tasks: {e}")
+            tasks_ns.abort(500, "Internal Server Error")
+
+    @tasks_ns.doc('delete_tasks_bulk')
+    @tasks_ns.expect(task_bulk_delete_model, task_bulk_filter_parser)
+    @tasks_ns.marshal_with(task_bulk_deleted_model)
+    @tasks_ns.response(400, 'Bad Request')
+    @tasks_ns.response(409, 'Some tasks are still referenced')
+    def delete(self):
+        try:
+            data = request.get_json(silent=True) or {}  # The body is optional when filtering
+            filters = task_bulk_filter_parser.parse_args()['filters']
+            return delete_tasks_bulk(data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk deleting tasks: {e}")
+            tasks_ns.abort(500, "Internal Server Error")
+
+
 @tasks_ns.route('/<int:task_id>')
 @tasks_ns.response(404, 'Task ID not found')
 @tasks_ns.response(500, 'Internal Server Error')
 @tasks_ns.param('task_id', 'Task ID')
 class Task(Resource):
     @tasks_ns.doc('get_task')
-    @tasks_ns.marshal_with(task_model)
+    @tasks_ns.expect(task_fields_parser)
+    @conditional_get('task', model=Task)
+    @marshal_with(tasks_ns, task_model)
     def get(self, task_id):
         try:
-            task = get_task(task_id)
+            task = get_task(task_id, **task_fields_parser.parse_args())
             if not task:
                 tasks_ns.abort(404, f"Task with ID {task_id} not found.")
             return task
@@ -1,14 +1,28 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource
 from werkzeug.exceptions import HTTPException
 from services.vehicle_service import (
     get_all_vehicles,
+    stream_vehicles,
     get_vehicle,
     create_vehicle,
     update_vehicle,
-    delete_vehicle
+    delete_vehicle,
+    create_vehicles_bulk,
+    update_vehicles_bulk,
+    delete_vehicles_bulk
 )
 from utils.utils import generate_swagger_model
+from utils.pagination import build_list_parser, pagination_headers
+from utils.projection import build_fields_parser
+from utils.includes import add_include_argument
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.conditional import conditional_get
+from utils.bulk import (
+    bulk_parser, build_bulk_filter_parser, bulk_result_model, bulk_update_model, bulk_delete_model, bulk_count_model
+)
 from models.vehicle import Vehicle
 
 
@@ -27,6 +41,18 @@ vehicle_model = generate_swagger_model(
     readonly_fields=['vehicle_id']  # Fields that cannot be modified
 )
 
+# Query string parsers for the vehicle collection and for a single vehicle
+vehicle_list_parser = add_include_argument(build_list_parser(Vehicle), Vehicle)
+vehicle_fields_parser = add_include_argument(build_fields_parser(Vehicle), Vehicle)
+
+# Request and response models of the bulk endpoints
+vehicle_bulk_model = bulk_result_model(vehicles_ns, vehicle_model)
+vehicle_bulk_update_model = bulk_update_model(vehicles_ns, vehicle_model)
+vehicle_bulk_delete_model = bulk_delete_model(vehicles_ns, vehicle_model)
+vehicle_bulk_updated_model = bulk_count_model(vehicles_ns, vehicle_model, 'updated')
+vehicle_bulk_deleted_model = bulk_count_model(vehicles_ns, vehicle_model, 'deleted')
+vehicle_bulk_filter_parser = build_bulk_filter_parser(Vehicle)
+
 
 @vehicles_ns.route('/')
 class VehicleList(Resource):
@@ -36,14 +62,22 @@ class VehicleList(Resource):
     """
 
     @vehicles_ns.doc('get_all_vehicles')
-    @vehicles_ns.marshal_list_with(vehicle_model)
+    @vehicles_ns.expect(vehicle_list_parser)
+    @conditional_get('vehicle', model=Vehicle)
+    @marshal_list_with(vehicles_ns, vehicle_model)
     def get(self):
         """
         Retrieve all vehicles.
         :return: List of all vehicles
         """
         try:
-            return get_all_vehicles()
+            args = vehicle_list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                return ndjson_response(
+                    stream_vehicles(args['fields'], args['filters'], args['include']), vehicle_model, args['include']
+                )
+            page = get_all_vehicles(**args)
+            return page["items"], 200, pagination_headers(page)
         except HTTPException as http_err:
             logger.error(f"HTTP error while retrieving vehicles: {http_err}")
             raise http_err
@@ -76,6 +110,78 @@ class VehicleList(Resource):
             vehicles_ns.abort(500, "An error occurred while creating the vehicle.")
 
 
+@vehicles_ns.route('/bulk')
+class VehicleBulk(Resource):
+    """
+    Handles bulk operations on vehicles.
+    Supports creating (POST), updating (PATCH) and deleting (DELETE) many vehicles at once.
+    """
+
+    @vehicles_ns.doc('create_vehicles_bulk')
+    @vehicles_ns.expect([vehicle_model], bulk_parser)
+    @vehicles_ns.marshal_with(vehicle_bulk_model, code=201)
+    @vehicles_ns.response(207, 'Some items were rejected', vehicle_bulk_model)
+    @vehicles_ns.response(400, 'Bad Request')
+    def post(self):
+        """
+        Create many vehicles in a single transaction.
+        :return: The created vehicles and the rejected items, with HTTP status code 201 (207 if any item was rejected)
+        """
+        data = vehicles_ns.payload  # Extract JSON payload
+        if not isinstance(data, list):
+            vehicles_ns.abort(400, "Expected a list of vehicles.")
+        try:
+            result = create_vehicles_bulk(data, **bulk_parser.parse_args())
+            return result, 207 if result["errors"] else 201
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk creating vehicles: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk creating vehicles: {e}")
+            vehicles_ns.abort(500, "An error occurred while creating the vehicles.")
+
+    @vehicles_ns.doc('update_vehicles_bulk')
+    @vehicles_ns.expect(vehicle_bulk_update_model, vehicle_bulk_filter_parser)
+    @vehicles_ns.marshal_with(vehicle_bulk_updated_model)
+    @vehicles_ns.response(400, 'Bad Request')
+    def patch(self):
+        """
+        Update the vehicles matching a list of ids and/or the query string filters.
+        :return: The number of updated vehicles, with HTTP status code 200
+        """
+        data = vehicles_ns.payload or {}  # Extract JSON payload
+        filters = vehicle_bulk_filter_parser.parse_args()['filters']
+        try:
+            return update_vehicles_bulk(data.get('values'), data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk updating vehicles: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk updating vehicles: {e}")
+            vehicles_ns.abort(500, "An error occurred while updating the vehicles.")
+
+    @vehicles_ns.doc('delete_vehicles_bulk')
+    @vehicles_ns.expect(vehicle_bulk_delete_model, vehicle_bulk_filter_parser)
+    @vehicles_ns.marshal_with(vehicle_bulk_deleted_model)
+    @vehicles_ns.response(400, 'Bad Request')
+    @vehicles_ns.response(409, 'Some vehicles are still referenced')
+    def delete(self):
+        """
+        Delete the vehicles matching a list of ids and/or the query string filters.
+        :return: The number of deleted vehicles, with HTTP status code 200
+        """
+        data = request.get_json(silent=True) or {}  # The body is optional when filtering
+        filters = vehicle_bulk_filter_parser.parse_args()['filters']
+        try:
+            return delete_vehicles_bulk(data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk deleting vehicles: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk deleting vehicles: {e}")
+            vehicles_ns.abort(500, "An error occurred while deleting the vehicles.")
+
+
 @vehicles_ns.route('/<int:vehicle_id>')
 @vehicles_ns.param('vehicle_id', 'The ID of the vehicle')
 class Vehicle(Resource):
@@ -85,7 +191,9 @@ class Vehicle(Resource):
     """
 
     @vehicles_ns.doc('get_vehicle')
-    @vehicles_ns.marshal_with(vehicle_model)
+    @vehicles_ns.expect(vehicle_fields_parser)
+    @conditional_get('vehicle', model=Vehicle)
+    @marshal_with(vehicles_ns, vehicle_model)
     def get(self, vehicle_id):
         """
         Retrieve a vehicle by ID.
@@ -93,7 +201,7 @@ class Vehicle(Resource):
         :return: The vehicle details or 404 if not found
         """
         try:
-            vehicle = get_vehicle(vehicle_id)
+            vehicle = get_vehicle(vehicle_id, **vehicle_fields_parser.parse_args())
             if not vehicle:
                 vehicles_ns.abort(404, f"Vehicle with ID {vehicle_id} not found.")
             return vehicle
@@ -1,14 +1,28 @@
 import logging
+from flask import request
 from flask_restx import Namespace, Resource
 from werkzeug.exceptions import HTTPException
 from services.work_service import (
     get_all_works,
+    stream_works,
     get_work,
     create_work,
     update_work,
-    delete_work
+    delete_work,
+    create_works_bulk,
+    update_works_bulk,
+    delete_works_bulk
 )
 from utils.utils import generate_swagger_model
+from utils.pagination import build_list_parser, pagination_headers
+from utils.projection import build_fields_parser
+from utils.includes import add_include_argument
+from utils.marshalling import marshal_with, marshal_list_with
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.conditional import conditional_get
+from utils.bulk import (
+    bulk_parser, build_bulk_filter_parser, bulk_result_model, bulk_update_model, bulk_delete_model, bulk_count_model
+)
 from models.work import Work
 
 
@@ -27,6 +41,18 @@ work_model = generate_swagger_model(
     readonly_fields=['work_id']  # Fields that cannot be modified
 )
 
+# Query string parsers for the work collection and for a single work
+work_list_parser = add_include_argument(build_list_parser(Work), Work)
+work_fields_parser = add_include_argument(build_fields_parser(Work), Work)
+
+# Request and response models of the bulk endpoints
+work_bulk_model = bulk_result_model(works_ns, work_model)
+work_bulk_update_model = bulk_update_model(works_ns, work_model)
+work_bulk_delete_model = bulk_delete_model(works_ns, work_model)
+work_bulk_updated_model = bulk_count_model(works_ns, work_model, 'updated')
+work_bulk_deleted_model = bulk_count_model(works_ns, work_model, 'deleted')
+work_bulk_filter_parser = build_bulk_filter_parser(Work)
+
 
 @works_ns.route('/')
 class WorkList(Resource):
@@ -36,15 +62,23 @@ class WorkList(Resource):
     """
 
     @works_ns.doc('get_all_works')
-    @works_ns.marshal_list_with(work_model)
+    @works_ns.expect(work_list_parser)
+    @conditional_get('work', model=Work)
+    @marshal_list_with(works_ns, work_model)
     def get(self):
         """
         Retrieve all works.
         :return: List of all works
         """
         try:
-            # Fetch all works from the service layer
-            return get_all_works()
+            # Fetch a page of works from the service layer
+            args = work_list_parser.parse_args()
+            if wants_ndjson(args.pop('stream')):
+                return ndjson_response(
+                    stream_works(args['fields'], args['filters'], args['include']), work_model, args['include']
+                )
+            page = get_all_works(**args)
+            return page["items"], 200, pagination_headers(page)
         except HTTPException as http_err:
             logger.error(f"HTTP error while retrieving works: {http_err}")
             raise http_err
@@ -77,6 +111,78 @@ class WorkList(Resource):
             works_ns.abort(500, "An error occurred while creating the work.")
 
 
+@works_ns.route('/bulk')
+class WorkBulk(Resource):
+    """
+    Handles bulk operations on works.
+    Supports creating (POST), updating (PATCH) and deleting (DELETE) many works at once.
+    """
+
+    @works_ns.doc('create_works_bulk')
+    @works_ns.expect([work_model], bulk_parser)
+    @works_ns.marshal_with(work_bulk_model, code=201)
+    @works_ns.response(207, 'Some items were rejected', work_bulk_model)
+    @works_ns.response(400, 'Bad Request')
+    def post(self):
+        """
+        Create many works in a single transaction.
+        :return: The created works and the rejected items, with HTTP status code 201 (207 if any item was rejected)
+        """
+        data = works_ns.payload  # Extract JSON payload
+        if not isinstance(data, list):
+            works_ns.abort(400, "Expected a list of works.")
+        try:
+            result = create_works_bulk(data, **bulk_parser.parse_args())
+            return result, 207 if result["errors"] else 201
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk creating works: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk creating works: {e}")
+            works_ns.abort(500, "An error occurred while creating the works.")
+
+    @works_ns.doc('update_works_bulk')
+    @works_ns.expect(work_bulk_update_model, work_bulk_filter_parser)
+    @works_ns.marshal_with(work_bulk_updated_model)
+    @works_ns.response(400, 'Bad Request')
+    def patch(self):
+        """
+        Update the works matching a list of ids and/or the query string filters.
+        :return: The number of updated works, with HTTP status code 200
+        """
+        data = works_ns.payload or {}  # Extract JSON payload
+        filters = work_bulk_filter_parser.parse_args()['filters']
+        try:
+            return update_works_bulk(data.get('values'), data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk updating works: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk updating works: {e}")
+            works_ns.abort(500, "An error occurred while updating the works.")
+
+    @works_ns.doc('delete_works_bulk')
+    @works_ns.expect(work_bulk_delete_model, work_bulk_filter_parser)
+    @works_ns.marshal_with(work_bulk_deleted_model)
+    @works_ns.response(400, 'Bad Request')
+    @works_ns.response(409, 'Some works are still referenced')
+    def delete(self):
+        """
+        Delete the works matching a list of ids and/or the query string filters.
+        :return: The number of deleted works, with HTTP status code 200
+        """
+        data = request.get_json(silent=True) or {}  # The body is optional when filtering
+        filters = work_bulk_filter_parser.parse_args()['filters']
+        try:
+            return delete_works_bulk(data.get('ids'), filters), 200
+        except HTTPException as http_err:
+            logger.error(f"HTTP error while bulk deleting works: {http_err}")
+            raise http_err
+        except Exception as e:
+            logger.error(f"Error bulk deleting works: {e}")
+            works_ns.abort(500, "An error occurred while deleting the works.")
+
+
 @works_ns.route('/<int:work_id>')
 @works_ns.param('work_id', 'The ID of the work')
 class Work(Resource):
@@ -86,7 +192,9 @@ class Work(Resource):
     """
 
     @works_ns.doc('get_work')
-    @works_ns.marshal_with(work_model)
+    @works_ns.expect(work_fields_parser)
+    @conditional_get('work', model=Work)
+    @marshal_with(works_ns, work_model)
     def get(self, work_id):
         """
         Retrieve a work by ID.
@@ -94,7 +202,7 @@ class Work(Resource):
         :return: The work details or 404 if not found
         """
         try:
-            work = get_work(work_id)
+            work = get_work(work_id, **work_fields_parser.parse_args())
             if not work:
                 works_ns.abort(404, f"Work with ID {work_id} not found.")
             return work
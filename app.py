@@ -3,11 +3,21 @@ from sqlalchemy import false
 from flask_sqlalchemy import SQLAlchemy
 
 
-from api import api_bp  # Import the API blueprint
+from api import api, api_bp  # Import the API blueprint and its namespaces
 from config import Config  # Import the configuration class
-from utils.database import db  # Import the SQLAlchemy database instance
+from utils.database import db, init_database  # Import the database and its initialization
+from utils.replicas import CONSISTENCY_HEADER, init_replicas
+from utils.timing import init_timing
+from utils.metrics import init_metrics
+from utils.nplusone import init_nplusone
 from utils.utils import configure_logging  # Import the logging configuration function
 from errors.errors import register_error_handlers
+from commands.commands import register_commands
+from services.setting_service import load_settings
+from utils.versioning import create_version_table
+from utils.rollups import create_rollups
+from utils.search import create_search_index
+from utils.response_cache import response_cache
 from flask_cors import CORS
 
 
@@ -23,10 +33,26 @@ def create_app():
         app = Flask(__name__)
         app.config.from_object(Config)  # Load configuration from the Config class
         register_error_handlers(app)  # Register error handlers for 404 and 500 errors
-        db.init_app(app) # Initialize extensions (e.g., SQLAlchemy)
+        register_commands(app)  # Register CLI commands (flask create-tables, flask create-indexes, flask advise-indexes, flask rebuild-rollups, flask rebuild-search, flask sync-replicas)
+        init_timing(app)  # Server-Timing of the requests, first so the other request hooks are timed too
+        init_database(app)  # Initialize SQLAlchemy with the engine profile and the read-only GET sessions
+        with app.app_context():
+            init_metrics(app, api, db.engines)  # Prometheus metrics at /metrics, replicas included
+        init_nplusone(app)  # N+1 query detection and strict relationships, when enabled
+        init_replicas(app)  # Route the GET requests to the read replicas, if any
+        response_cache.max_bytes = app.config["RESPONSE_CACHE_MAX_BYTES"]  # Size the GET response cache
         # Register blueprints (e.g., API routes)
         app.register_blueprint(api_bp)
-        CORS(app, resources={r"/api/*": {"origins": "*"}})
+        with app.app_context():
+            create_version_table()  # Table change counters used by the caches and ETags
+            create_rollups()  # Revenue rollups maintained by the invoice triggers
+            create_search_index()  # Full-text index maintained by the triggers of the searched tables
+            load_settings()  # Load the setting table into the in-process cache
+        CORS(
+            app,
+            resources={r"/api/*": {"origins": "*"}},
+            expose_headers=["X-Next-Cursor", "X-Total-Count", "Link", "ETag", "X-Cache", CONSISTENCY_HEADER, "Server-Timing"]  # Headers read by clients
+        )
         return app
 
     except Exception as e:
@@ -0,0 +1,16 @@
+"""
+ASGI entry point of the async serving mode.
+
+The collection and detail GET requests of the CRUD resources are served on the
+event loop with async SQLAlchemy sessions (aiosqlite), routed to the read
+replicas like the synchronous ones; every other request goes
+through the Flask application on a thread pool. Requires the optional
+dependencies aiosqlite and an ASGI server, e.g.:
+
+    uvicorn asgi:app --workers 4
+"""
+from app import create_app
+from api.asgi import async_api
+from utils.asgi import create_asgi_app
+
+app = create_asgi_app(create_app(), async_api)
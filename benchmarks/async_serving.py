@@ -0,0 +1,158 @@
+"""
+Benchmark: concurrent-request throughput of the sync and async serving modes.
+
+Starts the API twice on a throwaway copy of the database, as the threaded Flask
+server (app.py) and as the ASGI application (asgi.py) under uvicorn, and drives
+both with the same number of concurrent keep-alive connections fetching a mix of
+collection pages and details, like the front end does. Prints the throughput and
+the latency percentiles of every mode.
+
+The response cache is disabled unless --cache is given, so every request reaches
+the database. The async mode needs the optional dependencies aiosqlite and uvicorn.
+
+Usage:
+    python -m benchmarks.async_serving [path/to/app.db] [--connections N] [--duration S] [--cache]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Requests issued by every connection, in turn
+PATHS = [
+    '/api/client/?limit=20',
+    '/api/vehicle/?limit=20&include=client',
+    '/api/work/?limit=20',
+    '/api/task/1',
+    '/api/invoice/?limit=20&include=items',
+    '/api/vehicle/1',
+]
+
+SYNC_SERVER = "from app import create_app; create_app().run(host='127.0.0.1', port={port}, threaded=True)"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database', nargs='?', default=os.path.join('instance', 'app.db'),
+                        help='SQLite database to copy (default: instance/app.db).')
+    parser.add_argument('--connections', type=int, default=32, help='Concurrent connections (default: 32).')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load per mode (default: 10).')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled.')
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_listening(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with code {process.returncode}.")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"The server did not start listening on port {port}.")
+
+
+async def fetch(reader, writer, path):
+    """
+    Send one GET request on a keep-alive connection and read the whole response.
+
+    :return: tuple: The status code and whether the server closes the connection.
+    """
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: keep-alive\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    length, close = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'connection':
+            close = value.strip().lower() == 'close'
+    await reader.readexactly(length)
+    return int(status_line.split()[1]), close
+
+
+async def connection(port, deadline, latencies, errors, offset):
+    """
+    Issue requests on one connection until the deadline, reconnecting when the
+    server does not keep connections alive (the Flask development server).
+    """
+    writer = None
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            status, close = await fetch(reader, writer, PATHS[i % len(PATHS)])
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+            if close:
+                writer.close()
+                writer = None
+            i += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def load(port, connections, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[connection(port, deadline, latencies, errors, i) for i in range(connections)])
+    return latencies, errors
+
+
+def run_mode(name, command, port, env, args):
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_listening(port, process)
+        asyncio.run(load(port, args.connections, 1))  # Warm up the connections and caches
+        latencies, errors = asyncio.run(load(port, args.connections, args.duration))
+    finally:
+        process.terminate()
+        process.wait()
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:6} {len(latencies) / args.duration:9.0f} req/s   "
+          f"p50 {percentiles[49] * 1000:7.1f} ms   p95 {percentiles[94] * 1000:7.1f} ms   "
+          f"p99 {percentiles[98] * 1000:7.1f} ms   errors {len(errors)}")
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    copy = os.path.join(workdir, 'app.db')
+    shutil.copyfile(args.database, copy)
+    env = dict(os.environ, DATABASE_URI=f"sqlite:///{copy}")
+    if not args.cache:
+        env['RESPONSE_CACHE_MAX_BYTES'] = '0'
+
+    print(f"connections: {args.connections}, duration: {args.duration:.0f} s, "
+          f"response cache: {'on' if args.cache else 'off'}")
+    port = free_port()
+    run_mode('sync', [sys.executable, '-c', SYNC_SERVER.format(port=port)], port, env, args)
+    port = free_port()
+    run_mode('async', [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port), '--log-level', 'warning'],
+             port, env, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+"""
+Synthetic garage datasets for the benchmarks, at a configurable scale.
+
+Generates a SQLite database with the schema of the models and realistic rows
+across client -> vehicle -> work -> task -> invoice -> invoice_item. Every client
+has 1.5 vehicles, every vehicle 2 works, every work 2 tasks, and 2 works out of 3
+are invoiced with 3 items (one per task and one for parts), so the requested
+number of rows is spread over the six tables in those proportions. The rows are
+deterministic for a given seed.
+
+The database is then opened once by the application, which creates the change
+counters, the revenue rollups and the search index from the loaded rows.
+
+Usage:
+    python -m benchmarks.dataset path/to/bench.db [--rows 10k|1M|10M] [--seed S]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from array import array
+from datetime import date, datetime, timedelta
+
+# Rows of every table per client, so that clients * ROWS_PER_CLIENT is the requested size
+VEHICLES_PER_CLIENT = 1.5
+WORKS_PER_VEHICLE = 2
+TASKS_PER_WORK = 2
+INVOICES_PER_WORK = 2 / 3
+ITEMS_PER_INVOICE = 3
+ROWS_PER_CLIENT = 1 + VEHICLES_PER_CLIENT * (
+    1 + WORKS_PER_VEHICLE * (1 + TASKS_PER_WORK + INVOICES_PER_WORK * (1 + ITEMS_PER_INVOICE))
+)
+
+# Rows inserted per executemany call
+BATCH_SIZE = 10_000
+
+# Period the works are spread over
+FIRST_DAY = date(2022, 1, 3)
+DAYS = 3 * 365
+
+FIRST_NAMES = [
+    'João', 'Maria', 'José', 'Ana', 'Francisco', 'Beatriz', 'António', 'Inês', 'Manuel', 'Mariana',
+    'Pedro', 'Carolina', 'Rui', 'Sofia', 'Tiago', 'Leonor', 'Miguel', 'Catarina', 'Luís', 'Rita',
+]
+LAST_NAMES = [
+    'Silva', 'Santos', 'Ferreira', 'Pereira', 'Oliveira', 'Costa', 'Rodrigues', 'Martins', 'Jesus', 'Sousa',
+    'Fernandes', 'Gonçalves', 'Gomes', 'Lopes', 'Marques', 'Alves', 'Almeida', 'Ribeiro', 'Pinto', 'Carvalho',
+]
+STREETS = ['Rua das Flores', 'Avenida da Liberdade', 'Rua do Comércio', 'Rua Direita', 'Avenida Central']
+CITIES = ['Lisboa', 'Porto', 'Braga', 'Coimbra', 'Aveiro', 'Faro', 'Setúbal', 'Viseu']
+CARS = {
+    'Renault': ['Clio', 'Megane', 'Captur'], 'Peugeot': ['208', '308', '2008'], 'Volkswagen': ['Golf', 'Polo', 'Passat'],
+    'Toyota': ['Yaris', 'Corolla', 'C-HR'], 'Fiat': ['Panda', '500', 'Tipo'], 'BMW': ['Série 1', 'Série 3', 'X1'],
+    'Mercedes-Benz': ['Classe A', 'Classe C', 'GLA'], 'Seat': ['Ibiza', 'Leon', 'Arona'],
+}
+BRANDS = list(CARS)
+WORKS = [
+    ('Revisão geral', 180), ('Troca de óleo e filtros', 90), ('Substituição de pastilhas de travão', 140),
+    ('Substituição de pneus', 320), ('Reparação da embraiagem', 650), ('Diagnóstico eletrónico', 60),
+    ('Substituição da correia de distribuição', 480), ('Reparação do ar condicionado', 250),
+]
+TASKS = ['Desmontagem', 'Diagnóstico', 'Substituição de peças', 'Montagem', 'Ensaio em estrada', 'Limpeza']
+WORK_STATUSES = ['completed'] * 14 + ['in_progress'] * 3 + ['pending'] * 2 + ['canceled']
+ROLES = ['mechanic'] * 8 + ['manager', 'admin']
+SETTINGS = [('IVA_PERCENT', '23'), ('GARAGE_NAME', 'Garage XPTO')]
+IVA = 0.23
+
+
+def parse_rows(value):
+    """
+    Parse a number of rows, with an optional k or M suffix (10k, 1M, 10M).
+    """
+    multipliers = {'k': 1_000, 'K': 1_000, 'm': 1_000_000, 'M': 1_000_000}
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def table_sizes(rows):
+    """
+    Number of rows of every table for a dataset of about the given size.
+
+    :return: dict: Rows by table name, in insertion order.
+    """
+    clients = max(1, round(rows / ROWS_PER_CLIENT))
+    vehicles = max(1, round(clients * VEHICLES_PER_CLIENT))
+    works = vehicles * WORKS_PER_VEHICLE
+    invoices = max(1, round(works * INVOICES_PER_WORK))
+    return {
+        'employee': max(5, clients // 100),
+        'client': clients,
+        'vehicle': vehicles,
+        'work': works,
+        'task': works * TASKS_PER_WORK,
+        'invoice': invoices,
+        'invoice_item': invoices * ITEMS_PER_INVOICE,
+    }
+
+
+def person(rng, i, domain):
+    first, middle, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(LAST_NAMES)
+    email = f"{first}.{last}.{i}@{domain}".lower()
+    return f"{first} {middle} {last}", email, f"9{rng.randrange(10_000_000, 100_000_000)}"
+
+
+def license_plate(i):
+    """
+    Unique Portuguese license plate (AA-00-AA) of the i-th vehicle.
+    """
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    i, right = divmod(i, 676)
+    left, digits = divmod(i, 100)
+    return (f"{letters[left // 26 % 26]}{letters[left % 26]}-{digits:02d}-"
+            f"{letters[right // 26]}{letters[right % 26]}")
+
+
+def client_row(rng, i):
+    name, email, phone = person(rng, i, 'example.pt')
+    address = f"{rng.choice(STREETS)} {rng.randrange(1, 300)}, {rng.choice(CITIES)}"
+    return {'name': name, 'email': email, 'phone': phone, 'address': address}
+
+
+def employee_row(rng, i):
+    name, email, phone = person(rng, i, 'garage.pt')
+    hired = FIRST_DAY - timedelta(days=rng.randrange(0, 3650))
+    return {'name': name, 'email': email, 'phone': phone, 'role': rng.choice(ROLES), 'hired_date': hired.isoformat()}
+
+
+def vehicle_row(rng, i, client_id):
+    brand = rng.choice(BRANDS)
+    return {
+        'brand': brand, 'model': rng.choice(CARS[brand]), 'year': rng.randrange(2000, 2025),
+        'license_plate': license_plate(i), 'client_id': client_id,
+    }
+
+
+def work_row(rng, vehicle_id):
+    description, cost = rng.choice(WORKS)
+    return {
+        'description': description, 'cost': round(cost * rng.uniform(0.8, 1.3), 2),
+        'status': rng.choice(WORK_STATUSES), 'vehicle_id': vehicle_id,
+    }
+
+
+def task_row(rng, work_id, employee_id, start, done):
+    return {
+        'description': rng.choice(TASKS), 'employee_id': employee_id, 'start_date': start.isoformat(),
+        'end_date': (start + timedelta(days=rng.randrange(0, 4))).isoformat() if done else None,
+        'status': 'completed' if done else rng.choice(['pending', 'in_progress']), 'work_id': work_id,
+    }
+
+
+def invoice_row(client_id, issued_at, total):
+    iva = round(total * IVA, 2)
+    return {
+        'client_id': client_id, 'issued_at': issued_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'total': round(total, 2), 'iva': iva, 'total_with_iva': round(total + iva, 2),
+    }
+
+
+def _insert(connection, table, rows):
+    # Insert the rows of a generator in batches, with the column names of the first row
+    batch = []
+    statement = None
+    for row in rows:
+        if statement is None:
+            columns = list(row)
+            statement = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                         f"VALUES ({', '.join(':' + column for column in columns)})")
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            connection.executemany(statement, batch)
+            batch.clear()
+    if batch:
+        connection.executemany(statement, batch)
+
+
+def _create_schema(path, with_indexes):
+    # Tables (and afterwards their indexes) of the models, created through SQLAlchemy
+    from sqlalchemy import create_engine
+    from sqlalchemy.schema import CreateTable
+    from commands.commands import all_models
+
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for model in all_models():
+            if with_indexes:
+                for index in model.__table__.indexes:
+                    index.create(bind=connection)
+            else:
+                connection.execute(CreateTable(model.__table__, if_not_exists=True))
+    engine.dispose()
+
+
+def generate(path, rows, seed=0, prepare=True):
+    """
+    Create a synthetic dataset.
+
+    :param path: Path of the SQLite database to create (must not exist).
+    :param rows: Approximate total number of rows.
+    :param seed: Seed of the random generator.
+    :param prepare: Open the database with the application afterwards, so it is ready to serve.
+    :return: dict: Rows by table name.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists.")
+    sizes = table_sizes(rows)
+    rng = random.Random(seed)
+    _create_schema(path, with_indexes=False)
+
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA cache_size = -262144")
+    connection.execute("BEGIN")
+    _insert(connection, 'setting', ({'key_name': key, 'value': value} for key, value in SETTINGS))
+    _insert(connection, 'employee', (employee_row(rng, i) for i in range(sizes['employee'])))
+
+    # Client names are unique: the repeated ones get a number, like homonyms in an address book
+    def clients():
+        seen = set()
+        for i in range(sizes['client']):
+            row = client_row(rng, i)
+            if row['name'] in seen:
+                row['name'] = f"{row['name']} ({i})"
+            seen.add(row['name'])
+            yield row
+
+    _insert(connection, 'client', clients())
+
+    # Owner of every vehicle and vehicle of every work, to invoice the right client
+    vehicle_clients = array('l', (rng.randrange(sizes['client']) + 1 for _ in range(sizes['vehicle'])))
+    _insert(connection, 'vehicle', (
+        vehicle_row(rng, i, vehicle_clients[i]) for i in range(sizes['vehicle'])
+    ))
+    work_vehicles = array('l', (rng.randrange(sizes['vehicle']) + 1 for _ in range(sizes['work'])))
+    _insert(connection, 'work', (work_row(rng, work_vehicles[i]) for i in range(sizes['work'])))
+
+    # Works are spread evenly over the period, their tasks start on the day of the work
+    def work_day(work_index):
+        return FIRST_DAY + timedelta(days=work_index * DAYS // sizes['work'])
+
+    _insert(connection, 'task', (
+        task_row(rng, i // TASKS_PER_WORK + 1, rng.randrange(sizes['employee']) + 1,
+                 work_day(i // TASKS_PER_WORK), done=i < sizes['task'] * 0.9)
+        for i in range(sizes['task'])
+    ))
+
+    # Invoice k bills a work: one item per task of the work and one for the parts
+    def invoiced_work(k):
+        return k * sizes['work'] // sizes['invoice']
+
+    items = array('d')
+
+    def invoices():
+        for k in range(sizes['invoice']):
+            costs = [round(rng.uniform(20, 200), 2) for _ in range(ITEMS_PER_INVOICE)]
+            items.extend(costs)
+            work_index = invoiced_work(k)
+            issued_at = datetime.combine(work_day(work_index) + timedelta(days=rng.randrange(1, 10)),
+                                         datetime.min.time()) + timedelta(minutes=rng.randrange(8 * 60, 19 * 60))
+            yield invoice_row(vehicle_clients[work_vehicles[work_index] - 1], issued_at, sum(costs))
+
+    def invoice_items():
+        for i in range(sizes['invoice_item']):
+            k, n = divmod(i, ITEMS_PER_INVOICE)
+            task_id = invoiced_work(k) * TASKS_PER_WORK + n + 1 if n < TASKS_PER_WORK else None
+            description = TASKS[n % len(TASKS)] if task_id else 'Peças e consumíveis'
+            yield {'description': description, 'cost': items[i], 'invoice_id': k + 1, 'task_id': task_id}
+
+    _insert(connection, 'invoice', invoices())
+    _insert(connection, 'invoice_item', invoice_items())
+    connection.execute("COMMIT")
+    connection.close()
+
+    _create_schema(path, with_indexes=True)
+    if prepare:
+        # The change counters, rollups and search index are built by the application on startup
+        env = dict(os.environ, DATABASE_URI=f"sqlite:///{os.path.abspath(path)}")
+        subprocess.run([sys.executable, '-c', 'from app import create_app; create_app()'], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        # Fold the write-ahead log into the database, so the file can be copied or moved on its own
+        connection = sqlite3.connect(path)
+        connection.execute("PRAGMA journal_mode = DELETE")
+        connection.close()
+    return sizes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database', help='SQLite database to create.')
+    parser.add_argument('--rows', type=parse_rows, default=10_000, help='Approximate number of rows (default: 10k).')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator (default: 0).')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    sizes = generate(args.database, args.rows, args.seed)
+    for table, count in sizes.items():
+        print(f"{table:13} {count:>11,}")
+    print(f"{'total':13} {sum(sizes.values()):>11,}  ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
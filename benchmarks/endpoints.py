@@ -0,0 +1,574 @@
+"""
+Benchmark suite: latency, throughput and memory of every API route on a synthetic dataset.
+
+Generates a dataset of the requested size with benchmarks.dataset (kept in
+--data-dir and reused by later runs), then drives every route of the API on a
+throwaway copy of it, twice:
+
+- test_client: sequential requests through the Flask test client, in process;
+- wsgi: concurrent keep-alive requests against the threaded Werkzeug server,
+  started in a subprocess.
+
+Collections are fetched a page at a time, details with random existing ids, and
+the write routes create, update and delete their own rows, so the dataset keeps
+its size. A request counts as an error when it answers an error status, or when
+its effect is missing (a deleted row that can still be read). Every route prints
+its p50/p95/p99 latency, throughput and errors, and the peak RSS of the process
+serving it during the route (the growth of its RSS where the peak cannot be
+reset). The results are stored as JSON, and --compare prints the change of every
+route against a previous result file, e.g. from another commit.
+
+The response cache is disabled unless --cache is given, so every request reaches
+the database.
+
+Usage:
+    python -m benchmarks.endpoints [--rows 10k|1M|10M] [--mode test_client|wsgi|both]
+                                   [--requests N] [--concurrency C] [--cache]
+                                   [--output results.json] [--compare previous.json]
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import date, datetime
+from resource import RUSAGE_SELF, getrusage
+from urllib.parse import quote
+
+from benchmarks.async_serving import SYNC_SERVER, free_port, wait_until_listening
+from benchmarks.dataset import (
+    client_row, employee_row, generate, invoice_row, license_plate, parse_rows, table_sizes, task_row,
+    vehicle_row, work_row, LAST_NAMES,
+)
+
+# A benchmarked request: build(context, i) returns the path and JSON body of the i-th request, and
+# gone(path, body), when given, the path of a row the request removed, checked to answer 404 afterwards
+Scenario = namedtuple('Scenario', ['name', 'method', 'rule', 'build', 'gone'], defaults=[None])
+
+# CRUD resources: primary key and ?include= tree of the collection
+RESOURCES = {
+    'client': ('client_id', None),
+    'employee': ('employee_id', None),
+    'vehicle': ('vehicle_id', 'client'),
+    'work': ('work_id', 'vehicle.client'),
+    'task': ('task_id', 'employee,work'),
+    'invoice': ('invoice_id', 'items,client'),
+    'invoice_item': ('item_id', None),
+}
+
+# Routes left out: the root of the API only answers 404, the documentation is at /api/docs
+EXCLUDED = {('/api/', 'GET')}
+
+# Values set by the bulk updates, in columns no other row depends on
+BULK_VALUES = {
+    'client': {'address': 'Rua Nova 1, Lisboa'},
+    'employee': {'phone': '910000000'},
+    'vehicle': {'year': 2020},
+    'invoice': {'iva': 23.0},
+}
+
+# Page size of the collections and number of rows of every bulk request
+PAGE_SIZE = 50
+BULK_SIZE = 20
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=parse_rows, default=10_000,
+                        help='Approximate number of rows of the dataset: 10k, 1M, 10M... (default: 10k).')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the dataset and the requests (default: 0).')
+    parser.add_argument('--data-dir', default=os.path.join('benchmarks', 'data'),
+                        help='Directory of the generated datasets (default: benchmarks/data).')
+    parser.add_argument('--mode', choices=['test_client', 'wsgi', 'both'], default='both',
+                        help='How the routes are driven (default: both).')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route (default: 200).')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent connections in wsgi mode (default: 8).')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled.')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/endpoints-<rows>-<commit>.json).')
+    parser.add_argument('--compare', help='Previous result file to compare with.')
+    return parser.parse_args()
+
+
+class Context:
+    """
+    What the requests are built from: the size of every table of the dataset and
+    the rows created by the write scenarios, to be updated and deleted afterwards.
+    """
+
+    def __init__(self, sizes, seed):
+        self.sizes = sizes
+        self.rng = random.Random(seed)
+        self.created = {resource: deque() for resource in RESOURCES}
+        self.bulk_created = {resource: deque() for resource in RESOURCES}
+        self.updated = {resource: deque() for resource in RESOURCES}
+        self._counter = itertools.count()
+
+    def unique(self):
+        """
+        A number never returned before, for the unique columns of the created rows.
+        """
+        return next(self._counter)
+
+    def existing(self, table):
+        """
+        Random id of a row of the dataset.
+        """
+        return self.rng.randrange(self.sizes[table]) + 1
+
+    def payload(self, resource):
+        """
+        JSON body creating a new row of a resource, referencing existing rows.
+        """
+        n = self.unique()
+        if resource == 'client':
+            row = client_row(self.rng, n)
+            return dict(row, name=f"{row['name']} [bench {n}]", email=f"bench.{n}.{row['email']}")
+        if resource == 'employee':
+            row = employee_row(self.rng, n)
+            return dict(row, email=f"bench.{n}.{row['email']}")
+        if resource == 'vehicle':
+            return vehicle_row(self.rng, self.sizes['vehicle'] + n, self.existing('client'))
+        if resource == 'work':
+            return work_row(self.rng, self.existing('vehicle'))
+        if resource == 'task':
+            return task_row(self.rng, self.existing('work'), self.existing('employee'), date.today(), done=False)
+        if resource == 'invoice':
+            return invoice_row(self.existing('client'), datetime.now().replace(microsecond=0), 100.0)
+        return {'description': 'Peças e consumíveis', 'cost': 42.5, 'invoice_id': self.existing('invoice'),
+                'task_id': self.existing('task')}
+
+
+def _pop(ids):
+    # Id of a created row (deque.pop is atomic, so concurrent requests never share one)
+    try:
+        return ids.pop()
+    except IndexError:
+        return 0  # Nothing left: the request answers 404 and is counted as an error
+
+
+def crud_scenarios(resource):
+    """
+    Scenarios of a CRUD resource, in the order they must run: reads, then the
+    writes creating rows, updating them and finally deleting them.
+    """
+    key, include = RESOURCES[resource]
+    base = f"/api/{resource}/"
+    detail = f"{base}<int:{key}>"
+    scenarios = [
+        Scenario(f"{resource} list", 'GET', base, lambda ctx, i: (f"{base}?limit={PAGE_SIZE}", None)),
+        Scenario(f"{resource} list, last page", 'GET', base,
+                 lambda ctx, i: (f"{base}?limit={PAGE_SIZE}&sort=-{key}", None)),
+        Scenario(f"{resource} detail", 'GET', detail, lambda ctx, i: (f"{base}{ctx.existing(resource)}", None)),
+    ]
+    if include:
+        scenarios.append(Scenario(f"{resource} list, include={include}", 'GET', base,
+                                  lambda ctx, i: (f"{base}?limit={PAGE_SIZE}&include={include}", None)))
+        scenarios.append(Scenario(f"{resource} detail, include={include}", 'GET', detail,
+                                  lambda ctx, i: (f"{base}{ctx.existing(resource)}?include={include}", None)))
+
+    def update(ctx, i):
+        ident = _pop(ctx.created[resource])
+        ctx.updated[resource].append(ident)
+        return f"{base}{ident}", ctx.payload(resource)
+
+    return scenarios + [
+        Scenario(f"{resource} create", 'POST', base, lambda ctx, i: (base, ctx.payload(resource))),
+        Scenario(f"{resource} update", 'PUT', detail, update),
+        Scenario(f"{resource} delete", 'DELETE', detail,
+                 lambda ctx, i: (f"{base}{_pop(ctx.updated[resource])}", None),
+                 lambda path, body: path),
+        Scenario(f"{resource} bulk create", 'POST', f"{base}bulk",
+                 lambda ctx, i: (f"{base}bulk", [ctx.payload(resource) for _ in range(BULK_SIZE)])),
+        Scenario(f"{resource} bulk update", 'PATCH', f"{base}bulk",
+                 lambda ctx, i: (f"{base}bulk", {'ids': [ctx.existing(resource) for _ in range(BULK_SIZE)],
+                                                 'values': BULK_VALUES.get(resource, {'description': 'Atualizado'})})),
+        Scenario(f"{resource} bulk delete", 'DELETE', f"{base}bulk",
+                 lambda ctx, i: (f"{base}bulk", {'ids': [_pop(ctx.bulk_created[resource]) for _ in range(BULK_SIZE)]}),
+                 lambda path, body: f"{base}{body['ids'][0]}"),
+    ]
+
+
+def other_scenarios():
+    """
+    Scenarios of the routes that are not CRUD resources.
+    """
+    return [
+        Scenario('swagger.json', 'GET', '/api/swagger.json', lambda ctx, i: ('/api/swagger.json', None)),
+        Scenario('docs', 'GET', '/api/docs', lambda ctx, i: ('/api/docs', None)),
+        Scenario('dashboard summary', 'GET', '/api/dashboard/summary', lambda ctx, i: ('/api/dashboard/summary', None)),
+        Scenario('revenue report', 'GET', '/api/report/revenue', lambda ctx, i: ('/api/report/revenue', None)),
+        Scenario('workload report', 'GET', '/api/report/workload', lambda ctx, i: ('/api/report/workload', None)),
+        Scenario('search', 'GET', '/api/search/',
+                 lambda ctx, i: (f"/api/search/?q={quote(ctx.rng.choice(LAST_NAMES))}&limit=20", None)),
+        Scenario('lookup plate', 'GET', '/api/lookup/',
+                 lambda ctx, i: (f"/api/lookup/?plate={license_plate(ctx.existing('vehicle') - 1)}", None)),
+        Scenario('lookup plate prefix', 'GET', '/api/lookup/',
+                 lambda ctx, i: (f"/api/lookup/?plate={license_plate(ctx.existing('vehicle') - 1)[:5]}&prefix=true",
+                                 None)),
+        Scenario('lookup plates', 'POST', '/api/lookup/plates',
+                 lambda ctx, i: ('/api/lookup/plates',
+                                 {'plates': [license_plate(ctx.existing('vehicle') - 1) for _ in range(BULK_SIZE)]})),
+        Scenario('cache stats', 'GET', '/api/cache/', lambda ctx, i: ('/api/cache/', None)),
+        Scenario('cache clear', 'DELETE', '/api/cache/', lambda ctx, i: ('/api/cache/', None)),
+        Scenario('metrics', 'GET', '/metrics', lambda ctx, i: ('/metrics', None)),
+    ]
+
+
+def all_scenarios():
+    scenarios = []
+    for resource in RESOURCES:
+        scenarios.extend(crud_scenarios(resource))
+    return scenarios + other_scenarios()
+
+
+def uncovered_routes(app, scenarios):
+    """
+    Routes of the application (API and metrics) no scenario drives, e.g. routes added
+    since the suite was last updated.
+    """
+    covered = {(scenario.rule, scenario.method) for scenario in scenarios} | EXCLUDED
+    return sorted(
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules() if rule.rule.startswith(('/api', '/metrics'))
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+        if (rule.rule, method) not in covered
+    )
+
+
+def _record_created(ctx, scenario, status, body):
+    # Remember the ids of the rows created by the write scenarios
+    resource = scenario.rule.split('/')[2] if scenario.rule.startswith('/api/') else None
+    if scenario.method != 'POST' or resource not in RESOURCES or status >= 300:
+        return
+    key = RESOURCES[resource][0]
+    if scenario.rule.endswith('bulk'):
+        for item in json.loads(body).get('created') or []:
+            ctx.bulk_created[resource].append(item[key])
+    else:
+        ctx.created[resource].append(json.loads(body)[key])
+
+
+def _proc_status_mb(pid, field):
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb(pid=None):
+    """
+    Peak resident set size of a process (this one by default), in MiB, or None when unknown.
+    """
+    peak = _proc_status_mb(pid, 'VmHWM')
+    if peak is None and pid is None:
+        maxrss = getrusage(RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return peak
+
+
+def rss_mb(pid=None):
+    """
+    Current resident set size of a process (this one by default), in MiB, or None when unknown.
+    """
+    return _proc_status_mb(pid, 'VmRSS')
+
+
+def reset_peak_rss(pid=None):
+    """
+    Reset the peak resident set size of a process (this one by default) to its
+    current RSS, so peak_rss_mb then reports the peak since the reset (Linux only).
+
+    :return: bool: False when the peak cannot be reset.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/clear_refs", 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class RssProbe:
+    """
+    Memory used by a process while a route runs: its peak RSS during the route
+    when the peak can be reset, otherwise the growth of its RSS over the route.
+    """
+
+    def __init__(self, pid=None):
+        self.pid = pid
+        self.resettable = reset_peak_rss(pid)
+        self.start = rss_mb(pid)
+
+    def result(self):
+        """
+        :return: tuple: The peak RSS during the route (None when unknown) and the growth of the RSS, in MiB.
+        """
+        end = rss_mb(self.pid)
+        growth = end - self.start if end is not None and self.start is not None else None
+        return (peak_rss_mb(self.pid) if self.resettable else None), growth
+
+
+def _failed(scenario, path, body, status, read):
+    # An error status, or a removed row still served: read(path) returns the status of a GET
+    if status >= 400:
+        return True
+    return scenario.gone is not None and read(scenario.gone(path, body)) != 404
+
+
+def process_peak_rss(routes, lifetime_peak):
+    """
+    Peak RSS of the process over all the routes: the highest peak of a route, or
+    the peak over the lifetime of the process when the peak could not be reset.
+    """
+    peaks = [route['peak_rss_mb'] for route in routes if route['peak_rss_mb'] is not None]
+    return max(peaks) if peaks else lifetime_peak
+
+
+def summarize(scenario, latencies, errors, elapsed, rss):
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        'name': scenario.name,
+        'method': scenario.method,
+        'rule': scenario.rule,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'peak_rss_mb': round(rss[0], 1) if rss[0] is not None else None,
+        'rss_growth_mb': round(rss[1], 1) if rss[1] is not None else None,
+    }
+
+
+def run_test_client(app, scenarios, ctx, requests):
+    """
+    Send the requests of every scenario one after the other through the Flask test client.
+
+    :return: tuple: The result of every route and the peak RSS of the process.
+    """
+    client = app.test_client()
+    results = []
+    for scenario in scenarios:
+        latencies, errors = [], 0
+        probe = RssProbe()
+        started = time.perf_counter()
+        for i in range(requests):
+            path, body = scenario.build(ctx, i)
+            start = time.perf_counter()
+            resp = client.open(path, method=scenario.method, json=body)
+            data = resp.get_data()
+            latencies.append(time.perf_counter() - start)
+            errors += _failed(scenario, path, body, resp.status_code, lambda gone: client.get(gone).status_code)
+            _record_created(ctx, scenario, resp.status_code, data)
+        results.append(summarize(scenario, latencies, errors, time.perf_counter() - started, probe.result()))
+        print_result(results[-1])
+    return results, process_peak_rss(results, peak_rss_mb())
+
+
+def run_wsgi(env, scenarios, ctx, requests, concurrency):
+    """
+    Send the requests of every scenario from concurrent keep-alive connections to
+    the threaded Werkzeug server.
+
+    :return: tuple: The result of every route and the peak RSS of the server.
+    """
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-c', SYNC_SERVER.format(port=port)], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = []
+    try:
+        wait_until_listening(port, process, timeout=600)
+        for scenario in scenarios:
+            latencies, errors = [], []
+            counter = itertools.count()
+
+            def worker():
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+
+                def read(path):
+                    connection.request('GET', path)
+                    resp = connection.getresponse()
+                    resp.read()
+                    if resp.will_close:
+                        connection.close()
+                    return resp.status
+
+                try:
+                    while (i := next(counter)) < requests:
+                        path, body = scenario.build(ctx, i)
+                        payload = json.dumps(body).encode() if body is not None else None
+                        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+                        start = time.perf_counter()
+                        try:
+                            connection.request(scenario.method, path, body=payload, headers=headers)
+                            resp = connection.getresponse()
+                            data = resp.read()
+                            latencies.append(time.perf_counter() - start)
+                            if resp.will_close:
+                                connection.close()  # Reconnected by the next request
+                            if _failed(scenario, path, body, resp.status, read):
+                                errors.append(resp.status)
+                        except (OSError, http.client.HTTPException):
+                            errors.append(None)  # Counted as an error, the next request reconnects
+                            connection.close()
+                            continue
+                        _record_created(ctx, scenario, resp.status, data)
+                finally:
+                    connection.close()
+
+            probe = RssProbe(process.pid)
+            started = time.perf_counter()
+            threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results.append(summarize(scenario, latencies, len(errors), time.perf_counter() - started,
+                                     probe.result()))
+            print_result(results[-1])
+        peak = process_peak_rss(results, peak_rss_mb(process.pid))
+    finally:
+        process.terminate()
+        process.wait()
+    return results, peak
+
+
+def print_result(result):
+    print(f"  {result['method']:6} {result['name']:38} {result['throughput']:8.1f} req/s   "
+          f"p50 {result['p50_ms']:8.2f}   p95 {result['p95_ms']:8.2f}   p99 {result['p99_ms']:8.2f} ms   "
+          f"errors {result['errors']:3}   {_format_rss(result)}")
+
+
+def _format_rss(result):
+    if result['peak_rss_mb'] is not None:
+        return f"rss {result['peak_rss_mb']:7.1f} MiB"
+    return f"rss {result['rss_growth_mb'] or 0:+7.1f} MiB"
+
+
+def compare(results, previous):
+    """
+    Print the change of the p50, p99 and throughput of every route against a previous result file.
+    """
+    print(f"\nCompared with {previous['commit']} ({previous['created_at']}):")
+    for mode, current in results['modes'].items():
+        before = {(r['method'], r['name']): r for r in previous.get('modes', {}).get(mode, {}).get('routes', [])}
+        print(f"{mode}:")
+        for result in current['routes']:
+            old = before.get((result['method'], result['name']))
+            if old is None:
+                continue
+
+            def change(key):
+                return (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+
+            print(f"  {result['method']:6} {result['name']:38} p50 {change('p50_ms'):+7.1f}%   "
+                  f"p99 {change('p99_ms'):+7.1f}%   throughput {change('throughput'):+7.1f}%")
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def dataset(args):
+    """
+    Path of the dataset of the requested size, generated on first use.
+    """
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f"garage-{args.rows}-{args.seed}.db")
+    if not os.path.exists(path):
+        print(f"Generating a dataset of {args.rows:,} rows in {path}...")
+        partial = f"{path}.partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        generate(partial, args.rows, args.seed)
+        os.replace(partial, path)
+    return path
+
+
+def main():
+    args = parse_args()
+    source = dataset(args)
+    sizes = table_sizes(args.rows)
+    commit = git_commit()
+    workdir = tempfile.mkdtemp()
+    copy = os.path.join(workdir, 'app.db')
+    env = dict(os.environ, DATABASE_URI=f"sqlite:///{copy}", METRICS_ENABLED='1')
+    if not args.cache:
+        env['RESPONSE_CACHE_MAX_BYTES'] = '0'
+    modes = ['test_client', 'wsgi'] if args.mode == 'both' else [args.mode]
+    results = {
+        'commit': commit,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': {'rows': args.rows, 'seed': args.seed, 'tables': sizes},
+        'settings': {'requests': args.requests, 'concurrency': args.concurrency, 'cache': args.cache},
+        'modes': {},
+    }
+
+    # The configuration is read at import time, so point it to the copy first
+    os.environ.update(env)
+    from app import create_app
+
+    scenarios = all_scenarios()
+    for mode in modes:
+        shutil.copyfile(source, copy)
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(copy + suffix):
+                os.remove(copy + suffix)
+        ctx = Context(sizes, args.seed)
+        print(f"\n{mode} ({args.rows:,} rows, {args.requests} requests per route"
+              f"{f', {args.concurrency} connections' if mode == 'wsgi' else ''}):")
+        if mode == 'test_client':
+            app = create_app()
+            missing = uncovered_routes(app, scenarios)
+            if missing:
+                print(f"  Routes not benchmarked: {', '.join(missing)}")
+            routes, rss = run_test_client(app, scenarios, ctx, args.requests)
+            with app.app_context():
+                from utils.database import db
+                db.engine.dispose()
+        else:
+            routes, rss = run_wsgi(env, scenarios, ctx, args.requests, args.concurrency)
+        results['modes'][mode] = {'peak_rss_mb': round(rss, 1) if rss else None, 'routes': routes}
+
+    output = args.output or os.path.join('benchmarks', 'results', f"endpoints-{args.rows}-{commit}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: serializing a 100k-row list response.
+
+Loads N tasks from a throwaway SQLite database and times the two ways of turning
+them into a JSON body:
+
+- marshal: a dict built attribute by attribute, walked again by flask-restx
+  marshal and encoded by the stdlib json module (the previous list path);
+- compiled: the compiled row serializer of the model and the fast encoder
+  (utils.serialization, orjson when installed).
+
+The end-to-end time of GET /api/task/ (response cache disabled) is printed too.
+
+Usage:
+    python -m benchmarks.serialization [--rows N] [--repeat R]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='Number of tasks (default: 100000).')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the best one is kept (default: 3).')
+    return parser.parse_args()
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    # The configuration is read at import time, so point it to the throwaway database first
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['RESPONSE_CACHE_MAX_BYTES'] = '0'
+
+    from datetime import date
+    from flask_restx import marshal
+    from sqlalchemy import insert
+    from app import create_app
+    from api.task import task_model
+    from models.task import Task
+    from utils.database import db
+    from utils.projection import to_dicts
+    from utils.serialization import dumps, orjson
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Task), [
+            {"description": f"Task {i}", "employee_id": 1, "start_date": date(2024, 1, 1 + i % 28),
+             "end_date": None, "status": "pending", "work_id": 1}
+            for i in range(args.rows)
+        ])
+        db.session.commit()
+        tasks = Task.query.all()
+        columns = [column.name for column in Task.__table__.columns]
+
+        def marshalled():
+            rows = [{name: getattr(task, name) for name in columns} for task in tasks]
+            with app.test_request_context():
+                return json.dumps(marshal(rows, task_model))
+
+        def compiled():
+            return dumps(to_dicts(tasks, Task))
+
+        old = best_of(args.repeat, marshalled)
+        new = best_of(args.repeat, compiled)
+        assert json.loads(marshalled()) == json.loads(compiled())
+
+        client = app.test_client()
+        request = best_of(args.repeat, lambda: client.get('/api/task/'))
+
+    print(f"rows: {args.rows}, encoder: {'orjson' if orjson else 'json'}")
+    print(f"marshal + json:      {old * 1000:9.1f} ms")
+    print(f"compiled + encoder:  {new * 1000:9.1f} ms  ({old / new:.1f}x faster)")
+    print(f"GET /api/task/:      {request * 1000:9.1f} ms  (query, load and serialization)")
+
+
+if __name__ == '__main__':
+    main()
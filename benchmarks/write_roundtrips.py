@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: database round trips per write request.
+
+Runs create_task, create_invoice and update_vehicle against a throwaway copy of
+the database, once with the session expiring every instance on commit (the
+SQLAlchemy default, which reloads the row with a second SELECT when the service
+reads it back) and once with the session options used by the application, and
+prints the number of statements each call sends to SQLite together with the mean
+time per call.
+
+Usage:
+    python -m benchmarks.write_roundtrips [path/to/app.db] [--iterations N]
+"""
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('database', nargs='?', default=os.path.join('instance', 'app.db'),
+                        help='SQLite database to copy (default: instance/app.db).')
+    parser.add_argument('--iterations', type=int, default=200, help='Calls per operation (default: 200).')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    copy = os.path.join(workdir, 'app.db')
+    shutil.copyfile(args.database, copy)
+    # The configuration is read at import time, so point it to the copy first
+    os.environ['DATABASE_URI'] = f"sqlite:///{copy}"
+
+    from sqlalchemy import event
+    from app import create_app
+    from models.client import Client
+    from models.employee import Employee
+    from models.vehicle import Vehicle
+    from models.work import Work
+    from services.invoice_service import create_invoice
+    from services.task_service import create_task
+    from services.vehicle_service import update_vehicle
+    from utils.database import db
+
+    app = create_app()
+    statements = []
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+        client_id = db.session.query(Client.client_id).limit(1).scalar()
+        employee_id = db.session.query(Employee.employee_id).limit(1).scalar()
+        work_id = db.session.query(Work.work_id).limit(1).scalar()
+        vehicle = db.session.query(Vehicle).first()
+        vehicle_args = (vehicle.vehicle_id, vehicle.brand, vehicle.model)
+        # Alternate the year so every update really changes the row
+        years = itertools.cycle([vehicle.year + 1, vehicle.year])
+        vehicle_tail = (vehicle.license_plate, vehicle.client_id)
+        db.session.remove()
+
+        operations = {
+            'create_task': lambda: create_task("Benchmark task", employee_id, "2024-01-01", work_id=work_id),
+            'create_invoice': lambda: create_invoice(client_id, "2024-01-01 10:00:00", 100.0, 23.0, 123.0),
+            'update_vehicle': lambda: update_vehicle(*vehicle_args, next(years), *vehicle_tail),
+        }
+        modes = {
+            'expire_on_commit=True': True,
+            'application session': db.session.session_factory.kw.get('expire_on_commit', True),
+        }
+
+        print(f"{'operation':<16} {'mode':<24} {'queries/request':>16} {'ms/request':>11}")
+        for name, operation in operations.items():
+            for mode, expire_on_commit in modes.items():
+                db.session.remove()
+                db.session.configure(expire_on_commit=expire_on_commit)
+                statements.clear()
+                start = time.perf_counter()
+                for _ in range(args.iterations):
+                    operation()
+                    db.session.remove()  # A new session per call, like a request
+                elapsed = time.perf_counter() - start
+                # Transaction control (BEGIN) is the same in both modes, count the queries only
+                queries = sum(1 for statement in statements if not statement.startswith('BEGIN')) / args.iterations
+                print(f"{name:<16} {mode:<24} {queries:>16.1f} {elapsed / args.iterations * 1000:>11.2f}")
+
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import click
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from utils.database import db
+from utils.index_advisor import advise
+from utils.replicas import get_replica_set, sync_replicas
+from utils.rollups import rebuild_rollups
+from utils.search import rebuild_search_index
+
+# Indexes of earlier versions replaced by indexes ending in the primary key (see create-indexes)
+REPLACED_INDEXES = [
+    'ix_work_vehicle_id_status', 'ix_work_status_created_at', 'ix_task_work_id_status',
+    'ix_task_status_employee_id', 'ix_invoice_client_id_issued_at',
+]
+
+
+def all_models():
+    """
+    Import and return every model class of the application.
+    """
+    from models.client import Client
+    from models.employee import Employee
+    from models.invoice import Invoice
+    from models.invoice_item import InvoiceItem
+    from models.revenue import RevenueClient, RevenueDaily, RevenueMonthly
+    from models.setting import Setting
+    from models.table_version import TableVersion
+    from models.task import Task
+    from models.vehicle import Vehicle
+    from models.work import Work
+    return [
+        Client, Employee, Vehicle, Work, Task, Invoice, InvoiceItem, Setting, TableVersion,
+        RevenueDaily, RevenueMonthly, RevenueClient,
+    ]
+
+
+def register_commands(app):
+    """
+    Register custom CLI commands for the Flask application (flask <command>).
+    """
+
+    @app.cli.command('create-tables')
+    def create_tables():
+        """
+        Create the tables declared in the models that are missing from an existing
+        database (e.g. table_version). Existing tables are left untouched.
+        """
+        models = all_models()
+        db.create_all()
+        for model in models:
+            click.echo(f"{model.__tablename__}: ok")
+
+    @app.cli.command('create-indexes')
+    def create_indexes():
+        """
+        Create the secondary indexes declared in the models on an existing database,
+        and drop the ones they replace. Indexes that already exist are left
+        untouched, so the command can be re-run.
+        """
+        for name in REPLACED_INDEXES:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        db.session.commit()
+        for model in all_models():
+            for index in model.__table__.indexes:
+                # IF NOT EXISTS: SQLite does not reflect expression indexes, so checkfirst misses them
+                db.session.execute(CreateIndex(index, if_not_exists=True))
+                click.echo(f"{index.name}: ok")
+        db.session.commit()
+
+    @app.cli.command('advise-indexes')
+    @click.argument('paths', nargs=-1)
+    def advise_indexes(paths):
+        """
+        Send the read requests of every collection, report, search and lookup (and
+        the given PATHS, e.g. '/api/task/?status=pending&sort=-start_date') through
+        the application, run EXPLAIN QUERY PLAN over the statements they issue and
+        report the ones that scan a whole table or sort without an index.
+        """
+        with db.engine.connect() as connection:
+            findings = advise(app, connection, all_models(), paths)
+        for path, statement, plan in findings:
+            click.echo(f"{path}:")
+            click.echo(f"    {statement}")
+            for detail in plan:
+                click.echo(f"    {detail}")
+        click.echo(f"{len(findings)} statements without a supporting index.")
+
+    @app.cli.command('rebuild-rollups')
+    def rebuild_revenue_rollups():
+        """
+        Recompute the revenue rollups from the invoice table and recreate the
+        triggers that keep them up to date.
+        """
+        for table, count in rebuild_rollups().items():
+            click.echo(f"{table}: {count} rows")
+
+    @app.cli.command('rebuild-search')
+    def rebuild_search():
+        """
+        Reindex every client, vehicle, work and task in the full-text search index
+        and recreate the triggers that keep it up to date.
+        """
+        for table, count in rebuild_search_index().items():
+            click.echo(f"{table}: {count} documents")
+
+    @app.cli.command('sync-replicas')
+    def sync_read_replicas():
+        """
+        Copy the primary database into the SQLite read replicas of DATABASE_REPLICA_URIS,
+        then report the replication lag of every replica.
+        """
+        names = sync_replicas()
+        if not names:
+            click.echo("No replica configured (DATABASE_REPLICA_URIS).")
+            return
+        for name, state in get_replica_set().stats().items():
+            click.echo(f"{name}: lag {state['lag']:.3f} s")
@@ -6,4 +6,78 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URI")
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Collection pagination (0 disables the default page size)
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 0)) or None
+    PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 1000))
+
+    # Rows fetched per database round trip when streaming NDJSON exports
+    STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 1000))
+
+    # What to do with filters and sorts on columns without an index: 'warn' or 'reject'
+    FILTER_UNINDEXED = os.getenv("FILTER_UNINDEXED", "warn")
+
+    # Rows written per INSERT statement by the bulk endpoints
+    BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 500))
+
+    # Seconds settings are served from memory before the setting table version is polled again
+    SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", 5))
+
+    # Total size of the GET responses kept in memory by each worker (0 disables the cache)
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+    # Seconds the dashboard summary is served from memory before the table versions are polled again
+    DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", 5))
+
+    # Seconds the reports are served from memory before the table versions are polled again
+    REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", 5))
+
+    # Maximum number of license plates of a bulk lookup request
+    LOOKUP_MAX_PLATES = int(os.getenv("LOOKUP_MAX_PLATES", 1000))
+
+    # Threads running the requests handed to the Flask application by the ASGI serving mode (asgi.py)
+    ASGI_SYNC_THREADS = int(os.getenv("ASGI_SYNC_THREADS", 16))
+
+    # Connection pool of every worker, sized for its request threads
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", ASGI_SYNC_THREADS))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 4))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+    # PRAGMAs run on every new SQLite connection (an empty value keeps the SQLite default):
+    # WAL lets readers run alongside the writer, NORMAL only syncs at checkpoints in WAL
+    # mode, a negative cache size is in KiB, the busy timeout is in milliseconds
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-65536")
+    SQLITE_BUSY_TIMEOUT = os.getenv("SQLITE_BUSY_TIMEOUT", "5000")
+    SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "ON")
+
+    # Serve GET requests with read-only sessions (no autoflush, no commit, deferred transactions)
+    READ_ONLY_GET_SESSIONS = os.getenv("READ_ONLY_GET_SESSIONS", "1").lower() in ("1", "true", "yes", "on")
+
+    # Read replicas of the database, comma separated URIs: the GET requests read from them
+    # (see utils.replicas). The replicas are kept up to date outside the application,
+    # e.g. with flask sync-replicas for SQLite files.
+    DATABASE_REPLICA_URIS = [uri.strip() for uri in os.getenv("DATABASE_REPLICA_URIS", "").split(",") if uri.strip()]
+    # Replica chosen for each GET request: 'round_robin' or 'least_lag'
+    REPLICA_SELECTOR = os.getenv("REPLICA_SELECTOR", "round_robin")
+    # Seconds of replication lag above which a replica is not read from, and seconds between two lag checks
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", 1))
+
+    # Time the requests (SQL, serialization, total) in a Server-Timing header and a logged JSON record
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "0").lower() in ("1", "true", "yes", "on")
+    # Fraction of the requests timed when enabled (1 times every request)
+    SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", 1))
+
+    # Record request, SQL, pool and cache metrics and serve them at /metrics (Prometheus text format)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes", "on")
+
+    # N+1 query detection for development and test runs: 'off', 'log' or 'raise' when a request
+    # runs the same statement more than NPLUSONE_THRESHOLD times
+    NPLUSONE_MODE = os.getenv("NPLUSONE_MODE", "off")
+    NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", 10))
+    # Make every lazy load of a relationship raise instead of running a query
+    STRICT_RELATIONSHIPS = os.getenv("STRICT_RELATIONSHIPS", "0").lower() in ("1", "true", "yes", "on")
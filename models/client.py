@@ -1,4 +1,5 @@
 from utils.database import db
+from utils.lookup import email_key, phone_key
 
 
 # Model definition for the 'Client' table
@@ -15,17 +16,27 @@ class Client(db.Model):
         created_at (datetime): Timestamp when the client was created. Defaults to the current time.
     """
 
+    # Secondary indexes: creation order
+    __table_args__ = (
+        db.Index('ix_client_created_at', 'created_at'),
+    )
+
     # Define columns for the table
     client_id = db.Column(db.Integer, primary_key=True)  # Unique identifier for each client
     name = db.Column(db.String(80), unique=True, nullable=False)  # Client name, must be unique
     email = db.Column(db.String(200), nullable=False)  # Client email
     phone = db.Column(db.String(20), nullable=False)  # Client phone number
     address = db.Column(db.String(200), nullable=False)  # Client address
-    created_at = db.Column(db.DateTime, server_default=db.func.now())  # Auto-generated timestamp
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())  # Auto-generated timestamp
 
     def __repr__(self):
         """
         String representation of the Client object.
         Useful for debugging and logging purposes.
         """
-        return f"<Client {self.name}>"
\ No newline at end of file
+        return f"<Client {self.name}>"
+
+
+# Expression indexes of the normalized phone number and email, used by the lookup endpoints
+db.Index('ix_client_phone_key', phone_key(Client.__table__.c.phone))
+db.Index('ix_client_email_key', email_key(Client.__table__.c.email))
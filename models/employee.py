@@ -14,6 +14,11 @@ class Employee(db.Model):
         hired_date (date): Date when the employee was hired.
         created_at (datetime): Timestamp indicating when the record was created. Auto-generated by the database.
     """
+    # Secondary indexes: creation order
+    __table_args__ = (
+        db.Index('ix_employee_created_at', 'created_at'),
+    )
+
     # Primary key column
     employee_id = db.Column(db.Integer, primary_key=True)
 
@@ -27,7 +32,7 @@ class Employee(db.Model):
     hired_date = db.Column(db.Date, nullable=False)  # Mandatory hire date
 
     # Audit information
-    created_at = db.Column(db.DateTime, server_default=db.func.now())  # Timestamp for when the record was created
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())  # Timestamp for when the record was created
 
     def __repr__(self):
         """
@@ -13,6 +13,13 @@ class Invoice(db.Model):
         iva (float): The IVA (tax) applied to the invoice.
         total_with_iva (float): The total amount including IVA.
     """
+    # Secondary indexes: foreign key (joins, cascades, ending in the primary key so the
+    # pages of a client are read in keyset order) and issue date ranges
+    __table_args__ = (
+        db.Index('ix_invoice_client_id', 'client_id', 'invoice_id'),
+        db.Index('ix_invoice_issued_at', 'issued_at'),
+    )
+
     # Primary key column
     invoice_id = db.Column(db.Integer, primary_key=True)
 
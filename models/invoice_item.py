@@ -12,6 +12,12 @@ class InvoiceItem(db.Model):
         invoice_id (int): Foreign key referencing the associated invoice.
         task_id (int): Foreign key referencing the associated task (optional).
     """
+    # Secondary indexes: foreign keys (joins, cascades)
+    __table_args__ = (
+        db.Index('ix_invoice_item_invoice_id', 'invoice_id'),
+        db.Index('ix_invoice_item_task_id', 'task_id'),
+    )
+
     # Primary key column
     item_id = db.Column(db.Integer, primary_key=True)
 
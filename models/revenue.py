@@ -0,0 +1,65 @@
+from utils.database import db
+
+
+class RevenueTotals:
+    """
+    Columns shared by the revenue rollups: the aggregates of the invoices of a period.
+
+    Attributes:
+        invoice_count (int): Number of invoices issued in the period.
+        total (float): Sum of the invoice totals.
+        total_with_iva (float): Sum of the invoice totals including IVA.
+    """
+    invoice_count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0)
+    total_with_iva = db.Column(db.Float, nullable=False, default=0)
+
+
+class RevenueDaily(RevenueTotals, db.Model):
+    """
+    Revenue of every day with at least one invoice, maintained by the invoice
+    triggers (see utils.rollups).
+
+    Attributes:
+        day (date): Primary key, the day the invoices were issued.
+    """
+    __tablename__ = 'revenue_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+
+    def __repr__(self):
+        return f"<RevenueDaily {self.day} - Total: {self.total}>"
+
+
+class RevenueMonthly(RevenueTotals, db.Model):
+    """
+    Revenue of every month with at least one invoice, maintained by the invoice
+    triggers (see utils.rollups).
+
+    Attributes:
+        month (str): Primary key, the month the invoices were issued (YYYY-MM).
+    """
+    __tablename__ = 'revenue_monthly'
+
+    month = db.Column(db.String(7), primary_key=True)
+
+    def __repr__(self):
+        return f"<RevenueMonthly {self.month} - Total: {self.total}>"
+
+
+class RevenueClient(RevenueTotals, db.Model):
+    """
+    Monthly revenue of every client, maintained by the invoice triggers (see utils.rollups).
+    client_id has no foreign key so the rollup never blocks deleting a client.
+
+    Attributes:
+        client_id (int): Part of the primary key, the client the invoices were issued to.
+        month (str): Part of the primary key, the month the invoices were issued (YYYY-MM).
+    """
+    __tablename__ = 'revenue_client'
+
+    client_id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)
+
+    def __repr__(self):
+        return f"<RevenueClient {self.client_id} {self.month} - Total: {self.total}>"
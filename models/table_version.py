@@ -0,0 +1,22 @@
+from utils.database import db
+
+
+class TableVersion(db.Model):
+    """
+    Change counter of a table, shared by every worker through the database.
+
+    Triggers on every tracked table increment its counter in the transaction of
+    the write (see utils.versioning), so in-process caches can tell whether their copy is stale with a single
+    primary key lookup instead of reloading the data.
+
+    Attributes:
+        table_name (str): Primary key, name of the tracked table.
+        version (int): Incremented on every committed change to the table.
+    """
+    __tablename__ = 'table_version'
+
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TableVersion {self.table_name} - Version: {self.version}>"
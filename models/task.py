@@ -15,6 +15,17 @@ class Task(db.Model):
         work_id (int): Foreign key referencing the work associated with the task.
         created_at (datetime): Timestamp indicating when the task was created. Auto-generated by the database.
     """
+    # Secondary indexes: foreign keys (joins, cascades) and status lookups, ending in the
+    # primary key so filtered pages are read in keyset order. The last one covers the
+    # workload report (see services.report_service)
+    __table_args__ = (
+        db.Index('ix_task_work_id', 'work_id', 'task_id'),
+        db.Index('ix_task_employee_id', 'employee_id', 'task_id'),
+        db.Index('ix_task_status', 'status', 'task_id'),
+        db.Index('ix_task_created_at', 'created_at'),
+        db.Index('ix_task_employee_id_status_dates', 'employee_id', 'status', 'end_date', 'start_date'),
+    )
+
     # Primary key column
     task_id = db.Column(db.Integer, primary_key=True)
 
@@ -27,7 +38,7 @@ class Task(db.Model):
     work_id = db.Column(db.Integer, db.ForeignKey('work.work_id'), nullable=False)  # Foreign key to Work
 
     # Audit information
-    created_at = db.Column(db.DateTime, server_default=db.func.now())  # Timestamp for when the record was created
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())  # Timestamp for when the record was created
 
     # Relationships
     employee = db.relationship('Employee', backref='tasks')  # Relationship with Employee model
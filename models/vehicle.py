@@ -1,4 +1,5 @@
 from utils.database import db
+from utils.lookup import plate_key
 
 
 # Model definition for the 'Vehicle' table
@@ -16,6 +17,12 @@ class Vehicle(db.Model):
         created_at (datetime): Timestamp when the vehicle was created. Defaults to the current time.
     """
 
+    # Secondary indexes: foreign key (joins, cascades) and creation order
+    __table_args__ = (
+        db.Index('ix_vehicle_client_id', 'client_id'),
+        db.Index('ix_vehicle_created_at', 'created_at'),
+    )
+
     # Define columns for the table
     vehicle_id = db.Column(db.Integer, primary_key=True)  # Unique identifier for each vehicle
     brand = db.Column(db.String(80), nullable=False)  # Vehicle brand
@@ -23,7 +30,7 @@ class Vehicle(db.Model):
     year = db.Column(db.Integer, nullable=False)  # Year of the vehicle
     license_plate = db.Column(db.String(20), unique=True, nullable=False)  # Unique license plate
     client_id = db.Column(db.Integer, db.ForeignKey('client.client_id'), nullable=False)  # Associated client
-    created_at = db.Column(db.DateTime, server_default=db.func.now())  # Auto-generated timestamp
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())  # Auto-generated timestamp
 
     # Relationship (optional, for accessing related client data)
     client = db.relationship('Client', backref='vehicles', lazy=True)
@@ -34,3 +41,7 @@ class Vehicle(db.Model):
         Useful for debugging and logging purposes.
         """
         return f"<Vehicle {self.license_plate} - {self.brand} {self.model}>"
+
+
+# Expression index of the normalized plate, used by the lookup endpoints
+db.Index('ix_vehicle_plate_key', plate_key(Vehicle.__table__.c.license_plate))
@@ -17,13 +17,21 @@ class Work(db.Model):
         end_date (date): The date when the work was completed.
     """
 
+    # Secondary indexes: foreign key (joins, cascades) and status lookups, ending in the
+    # primary key so filtered pages are read in keyset order
+    __table_args__ = (
+        db.Index('ix_work_vehicle_id', 'vehicle_id', 'work_id'),
+        db.Index('ix_work_status', 'status', 'work_id'),
+        db.Index('ix_work_created_at', 'created_at'),
+    )
+
     # Define columns for the table
     work_id = db.Column(db.Integer, primary_key=True)  # Unique identifier for each work
     description = db.Column(db.String(255), nullable=False)  # Brief description of the work
     cost = db.Column(db.Float, nullable=False)  # Cost of the work
     status = db.Column(db.String(20), nullable=False)  # Current status of the work
     vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.vehicle_id'), nullable=False)  # Associated vehicle
-    created_at = db.Column(db.DateTime, server_default=db.func.now())  # Auto-generated timestamp
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())  # Auto-generated timestamp
     start_date = db.Column(db.Date, nullable=True)  # Start date of the work
     end_date = db.Column(db.Date, nullable=True)  # End date of the work
 
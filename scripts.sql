@@ -5,7 +5,7 @@ CREATE TABLE client (
     email TEXT UNIQUE NOT NULL,
     phone TEXT,
     address TEXT,
-    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
+    created_at DATETIME NOT NULL DEFAULT (CURRENT_TIMESTAMP)
 );
 
 -- Tabela de funcionários
@@ -16,7 +16,7 @@ CREATE TABLE employee (
     phone TEXT,
     role TEXT CHECK (role IN ('mechanic', 'manager', 'admin')) DEFAULT 'mechanic',
     hired_date DATE NOT NULL,
-    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
+    created_at DATETIME NOT NULL DEFAULT (CURRENT_TIMESTAMP)
 );
 
 -- Tabela de veículos
@@ -27,7 +27,7 @@ CREATE TABLE vehicle (
     year INTEGER NOT NULL,
     license_plate TEXT UNIQUE NOT NULL,
     client_id INTEGER NOT NULL,
-    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    created_at DATETIME NOT NULL DEFAULT (CURRENT_TIMESTAMP),
     FOREIGN KEY (client_id) REFERENCES client(client_id)
 );
 
@@ -38,7 +38,7 @@ CREATE TABLE work (
     cost REAL NOT NULL,
     status TEXT CHECK (status IN ('pending', 'in_progress', 'completed', 'canceled')) DEFAULT 'pending',
     vehicle_id INTEGER NOT NULL,
-    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    created_at DATETIME NOT NULL DEFAULT (CURRENT_TIMESTAMP),
     start_date DATE,
     end_date DATE,
     FOREIGN KEY (vehicle_id) REFERENCES vehicle(vehicle_id)
@@ -53,7 +53,7 @@ CREATE TABLE task (
     end_date DATE,
     status TEXT NOT NULL DEFAULT 'pending',
     work_id INTEGER NOT NULL,
-    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    created_at DATETIME NOT NULL DEFAULT (CURRENT_TIMESTAMP),
     FOREIGN KEY (employee_id) REFERENCES employee(employee_id),
     FOREIGN KEY (work_id) REFERENCES work(work_id)
 );
@@ -88,6 +88,146 @@ CREATE TABLE setting (
     updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
 );
 
+-- Contadores de alterações por tabela (invalidação das caches entre workers)
+CREATE TABLE table_version (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Agregados de faturação por dia, mês e cliente (mantidos pelos triggers da tabela invoice)
+CREATE TABLE revenue_daily (
+    day DATE PRIMARY KEY,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    total_with_iva REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE revenue_monthly (
+    month TEXT PRIMARY KEY,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    total_with_iva REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE revenue_client (
+    client_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    total_with_iva REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (client_id, month)
+);
+
+CREATE TRIGGER invoice_revenue_insert AFTER INSERT ON invoice FOR EACH ROW BEGIN
+    INSERT INTO revenue_daily (day, invoice_count, total, total_with_iva) VALUES (date(NEW.issued_at), 1, NEW.total, NEW.total_with_iva) ON CONFLICT (day) DO UPDATE SET invoice_count = invoice_count + 1, total = total + excluded.total, total_with_iva = total_with_iva + excluded.total_with_iva;
+    INSERT INTO revenue_monthly (month, invoice_count, total, total_with_iva) VALUES (strftime('%Y-%m', NEW.issued_at), 1, NEW.total, NEW.total_with_iva) ON CONFLICT (month) DO UPDATE SET invoice_count = invoice_count + 1, total = total + excluded.total, total_with_iva = total_with_iva + excluded.total_with_iva;
+    INSERT INTO revenue_client (client_id, month, invoice_count, total, total_with_iva) VALUES (NEW.client_id, strftime('%Y-%m', NEW.issued_at), 1, NEW.total, NEW.total_with_iva) ON CONFLICT (client_id, month) DO UPDATE SET invoice_count = invoice_count + 1, total = total + excluded.total, total_with_iva = total_with_iva + excluded.total_with_iva;
+END;
+
+CREATE TRIGGER invoice_revenue_update AFTER UPDATE OF client_id, issued_at, total, total_with_iva ON invoice FOR EACH ROW BEGIN
+    UPDATE revenue_daily SET invoice_count = invoice_count - 1, total = total - OLD.total, total_with_iva = total_with_iva - OLD.total_with_iva WHERE day = date(OLD.issued_at);
+    DELETE FROM revenue_daily WHERE day = date(OLD.issued_at) AND invoice_count <= 0;
+    UPDATE revenue_monthly SET invoice_count = invoice_count - 1, total = total - OLD.total, total_with_iva = total_with_iva - OLD.total_with_iva WHERE month = strftime('%Y-%m', OLD.issued_at);
+    DELETE FROM revenue_monthly WHERE month = strftime('%Y-%m', OLD.issued_at) AND invoice_count <= 0;
+    UPDATE revenue_client SET invoice_count = invoice_count - 1, total = total - OLD.total, total_with_iva = total_with_iva - OLD.total_with_iva WHERE client_id = OLD.client_id AND month = strftime('%Y-%m', OLD.issued_at);
+    DELETE FROM revenue_client WHERE client_id = OLD.client_id AND month = strftime('%Y-%m', OLD.issued_at) AND invoice_count <= 0;
+    INSERT INTO revenue_daily (day, invoice_count, total, total_with_iva) VALUES (date(NEW.issued_at), 1, NEW.total, NEW.total_with_iva) ON CONFLICT (day) DO UPDATE SET invoice_count = invoice_count + 1, total = total + excluded.total, total_with_iva = total_with_iva + excluded.total_with_iva;
+    INSERT INTO revenue_monthly (month, invoice_count, total, total_with_iva) VALUES (strftime('%Y-%m', NEW.issued_at), 1, NEW.total, NEW.total_with_iva) ON CONFLICT (month) DO UPDATE SET invoice_count = invoice_count + 1, total = total + excluded.total, total_with_iva = total_with_iva + excluded.total_with_iva;
+    INSERT INTO revenue_client (client_id, month, invoice_count, total, total_with_iva) VALUES (NEW.client_id, strftime('%Y-%m', NEW.issued_at), 1, NEW.total, NEW.total_with_iva) ON CONFLICT (client_id, month) DO UPDATE SET invoice_count = invoice_count + 1, total = total + excluded.total, total_with_iva = total_with_iva + excluded.total_with_iva;
+END;
+
+CREATE TRIGGER invoice_revenue_delete AFTER DELETE ON invoice FOR EACH ROW BEGIN
+    UPDATE revenue_daily SET invoice_count = invoice_count - 1, total = total - OLD.total, total_with_iva = total_with_iva - OLD.total_with_iva WHERE day = date(OLD.issued_at);
+    DELETE FROM revenue_daily WHERE day = date(OLD.issued_at) AND invoice_count <= 0;
+    UPDATE revenue_monthly SET invoice_count = invoice_count - 1, total = total - OLD.total, total_with_iva = total_with_iva - OLD.total_with_iva WHERE month = strftime('%Y-%m', OLD.issued_at);
+    DELETE FROM revenue_monthly WHERE month = strftime('%Y-%m', OLD.issued_at) AND invoice_count <= 0;
+    UPDATE revenue_client SET invoice_count = invoice_count - 1, total = total - OLD.total, total_with_iva = total_with_iva - OLD.total_with_iva WHERE client_id = OLD.client_id AND month = strftime('%Y-%m', OLD.issued_at);
+    DELETE FROM revenue_client WHERE client_id = OLD.client_id AND month = strftime('%Y-%m', OLD.issued_at) AND invoice_count <= 0;
+END;
+
+-- Índice de pesquisa de texto (FTS5) sobre clientes, veículos, trabalhos e tarefas (mantido por triggers)
+CREATE VIRTUAL TABLE search_index USING fts5(
+    resource UNINDEXED,
+    resource_id UNINDEXED,
+    content,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER client_search_insert AFTER INSERT ON client FOR EACH ROW BEGIN
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.client_id * 4 + 0, 'client', NEW.client_id, coalesce(NEW.name, '') || ' ' || coalesce(NEW.email, '') || ' ' || coalesce(NEW.address, ''));
+END;
+
+CREATE TRIGGER client_search_update AFTER UPDATE OF name, email, address ON client FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.client_id * 4 + 0;
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.client_id * 4 + 0, 'client', NEW.client_id, coalesce(NEW.name, '') || ' ' || coalesce(NEW.email, '') || ' ' || coalesce(NEW.address, ''));
+END;
+
+CREATE TRIGGER client_search_delete AFTER DELETE ON client FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.client_id * 4 + 0;
+END;
+
+CREATE TRIGGER vehicle_search_insert AFTER INSERT ON vehicle FOR EACH ROW BEGIN
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.vehicle_id * 4 + 1, 'vehicle', NEW.vehicle_id, coalesce(NEW.brand, '') || ' ' || coalesce(NEW.model, '') || ' ' || coalesce(NEW.license_plate, ''));
+END;
+
+CREATE TRIGGER vehicle_search_update AFTER UPDATE OF brand, model, license_plate ON vehicle FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.vehicle_id * 4 + 1;
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.vehicle_id * 4 + 1, 'vehicle', NEW.vehicle_id, coalesce(NEW.brand, '') || ' ' || coalesce(NEW.model, '') || ' ' || coalesce(NEW.license_plate, ''));
+    DELETE FROM search_index WHERE rowid IN (SELECT work.work_id * 4 + 2 FROM work WHERE work.vehicle_id = NEW.vehicle_id);
+    INSERT INTO search_index (rowid, resource, resource_id, content) SELECT work.work_id * 4 + 2, 'work', work.work_id, coalesce(work.description, '') || ' ' || coalesce((SELECT vehicle.brand || ' ' || vehicle.model || ' ' || vehicle.license_plate FROM vehicle WHERE vehicle.vehicle_id = work.vehicle_id), '') FROM work WHERE work.vehicle_id = NEW.vehicle_id;
+END;
+
+CREATE TRIGGER vehicle_search_delete AFTER DELETE ON vehicle FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.vehicle_id * 4 + 1;
+END;
+
+CREATE TRIGGER work_search_insert AFTER INSERT ON work FOR EACH ROW BEGIN
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.work_id * 4 + 2, 'work', NEW.work_id, coalesce(NEW.description, '') || ' ' || coalesce((SELECT vehicle.brand || ' ' || vehicle.model || ' ' || vehicle.license_plate FROM vehicle WHERE vehicle.vehicle_id = NEW.vehicle_id), ''));
+END;
+
+CREATE TRIGGER work_search_update AFTER UPDATE OF description, vehicle_id ON work FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.work_id * 4 + 2;
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.work_id * 4 + 2, 'work', NEW.work_id, coalesce(NEW.description, '') || ' ' || coalesce((SELECT vehicle.brand || ' ' || vehicle.model || ' ' || vehicle.license_plate FROM vehicle WHERE vehicle.vehicle_id = NEW.vehicle_id), ''));
+END;
+
+CREATE TRIGGER work_search_delete AFTER DELETE ON work FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.work_id * 4 + 2;
+END;
+
+CREATE TRIGGER task_search_insert AFTER INSERT ON task FOR EACH ROW BEGIN
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.task_id * 4 + 3, 'task', NEW.task_id, coalesce(NEW.description, ''));
+END;
+
+CREATE TRIGGER task_search_update AFTER UPDATE OF description ON task FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.task_id * 4 + 3;
+    INSERT INTO search_index (rowid, resource, resource_id, content) VALUES (NEW.task_id * 4 + 3, 'task', NEW.task_id, coalesce(NEW.description, ''));
+END;
+
+CREATE TRIGGER task_search_delete AFTER DELETE ON task FOR EACH ROW BEGIN
+    DELETE FROM search_index WHERE rowid = OLD.task_id * 4 + 3;
+END;
+
+-- Índices secundários (chaves estrangeiras, estados e ordenação por data)
+CREATE INDEX IF NOT EXISTS ix_client_created_at ON client (created_at);
+CREATE INDEX IF NOT EXISTS ix_client_phone_key ON client (replace(replace(replace(replace(replace(replace(phone, ' ', ''), '-', ''), '.', ''), '(', ''), ')', ''), '+', ''));
+CREATE INDEX IF NOT EXISTS ix_client_email_key ON client (lower(trim(email)));
+CREATE INDEX IF NOT EXISTS ix_employee_created_at ON employee (created_at);
+CREATE INDEX IF NOT EXISTS ix_vehicle_client_id ON vehicle (client_id);
+CREATE INDEX IF NOT EXISTS ix_vehicle_created_at ON vehicle (created_at);
+CREATE INDEX IF NOT EXISTS ix_vehicle_plate_key ON vehicle (upper(replace(replace(replace(license_plate, '-', ''), ' ', ''), '.', '')));
+CREATE INDEX IF NOT EXISTS ix_work_vehicle_id ON work (vehicle_id, work_id);
+CREATE INDEX IF NOT EXISTS ix_work_status ON work (status, work_id);
+CREATE INDEX IF NOT EXISTS ix_work_created_at ON work (created_at);
+CREATE INDEX IF NOT EXISTS ix_task_work_id ON task (work_id, task_id);
+CREATE INDEX IF NOT EXISTS ix_task_employee_id ON task (employee_id, task_id);
+CREATE INDEX IF NOT EXISTS ix_task_status ON task (status, task_id);
+CREATE INDEX IF NOT EXISTS ix_task_created_at ON task (created_at);
+CREATE INDEX IF NOT EXISTS ix_task_employee_id_status_dates ON task (employee_id, status, end_date, start_date);
+CREATE INDEX IF NOT EXISTS ix_invoice_client_id ON invoice (client_id, invoice_id);
+CREATE INDEX IF NOT EXISTS ix_invoice_issued_at ON invoice (issued_at);
+CREATE INDEX IF NOT EXISTS ix_invoice_item_invoice_id ON invoice_item (invoice_id);
+CREATE INDEX IF NOT EXISTS ix_invoice_item_task_id ON invoice_item (task_id);
 
 -- Inserir dados na tabela de clientes
 INSERT INTO client (name, email, phone, address) VALUES
@@ -1,53 +1,82 @@
 import logging
-from utils.database import db
+from sqlalchemy.exc import IntegrityError
+from utils.database import db, integrity_error, update_returning
+from utils.async_queries import get_one_async, get_page_async
+from utils.bulk import bulk_create, bulk_update, bulk_delete
+from utils.filters import apply_filters
+from utils.pagination import paginate
+from utils.projection import load_fields, to_dict, to_dicts
 from models.client import Client
 
 logger = logging.getLogger(__name__)
 
-def get_all_clients():
+def get_all_clients(fields=None, filters=None, limit=None, after=None, sort=None, with_total=False):
     """
-    Retrieve all clients.
-    :return: list: A list of dictionaries containing information about all clients.
+    Retrieve a page of clients.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of clients to return (optional, all clients when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all clients.
+    :return: dict: The page of clients as dictionaries ('items'), the next cursor and the total.
     """
     try:
-        clients = Client.query.all()  # Retrieve all clients from the database
-        return [
-            {
-                "client_id": client.client_id,
-                "name": client.name,
-                "email": client.email,
-                "phone": client.phone,
-                "address": client.address,
-                "created_at": client.created_at,
-            }
-            for client in clients
-        ]
+        query = apply_filters(load_fields(Client.query, Client, fields), Client, filters)
+        page = paginate(query, Client, limit=limit, after=after, sort=sort, with_total=with_total)
+        page["items"] = to_dicts(page["items"], Client, fields)
+        return page
     except Exception as e:
         logger.error(f"Error fetching all clients: {e}")
-        return {"error": "Internal Server Error"}
+        raise
+
+def stream_clients(fields=None, filters=None):
+    """
+    Build the query used to export all (matching) clients.
+    The rows are meant to be iterated with a server-side cursor (yield_per).
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :return: Query: The clients ordered by ID.
+    """
+    query = apply_filters(load_fields(Client.query, Client, fields), Client, filters)
+    return query.order_by(Client.client_id)
 
-def get_client(client_id):
+def get_client(client_id, fields=None):
     """
     Retrieve a client by ID.
     :param client_id: The ID of the client to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
     :return: dict: A dictionary containing the client's information or an error message.
     """
     try:
-        client = Client.query.get(client_id)
+        client = load_fields(Client.query, Client, fields).get(client_id)
         if not client:
             return None
-        return {
-            "client_id": client.client_id,
-            "name": client.name,
-            "email": client.email,
-            "phone": client.phone,
-            "address": client.address,
-            "created_at": client.created_at,
-        }
+        return to_dict(client, Client, fields)
     except Exception as e:
         logger.error(f"Error fetching client {client_id}: {e}")
         return {"error": "Internal Server Error"}
 
+async def get_all_clients_async(session, fields=None, filters=None, limit=None, after=None, sort=None,
+                                with_total=False):
+    """
+    Async variant of get_all_clients, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :return: dict: The page of clients as dictionaries ('items'), the next cursor and the total.
+    """
+    return await get_page_async(session, Client, fields=fields, filters=filters, limit=limit, after=after,
+                                sort=sort, with_total=with_total)
+
+async def get_client_async(session, client_id, fields=None):
+    """
+    Async variant of get_client, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param client_id: The ID of the client to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :return: dict: A dictionary containing the client's information or None if not found.
+    """
+    return await get_one_async(session, Client, client_id, fields=fields)
+
 def create_client(name, email, phone, address):
     """
     Create a new client.
@@ -69,11 +98,24 @@ def create_client(name, email, phone, address):
             "address": client.address,
             "created_at": client.created_at,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error creating client: {e}")
         return {"error": "Internal Server Error"}
 
 
+def create_clients_bulk(items, batch_size=None):
+    """
+    Create many clients in a single transaction.
+    :param items: A list of dictionaries with the same fields accepted by create_client.
+    :param batch_size: The number of clients inserted per statement (optional).
+    :return: dict: The created clients ('created') and the rejected items with their position ('errors').
+    """
+    return bulk_create(Client, items, batch_size)
+
+
 def update_client(client_id, name, email, phone, address):
     """
     Update an existing client.
@@ -85,18 +127,13 @@ def update_client(client_id, name, email, phone, address):
     :return: tuple: A dictionary containing the updated client's information or an error message and the HTTP status code.
     """
     try:
-        # Find the client by ID
-        client = Client.query.get(client_id)
+        # Update the fields if new values are provided (they can be optional)
+        values = {"name": name, "email": email, "phone": phone, "address": address}
+        client = update_returning(Client, client_id, {key: value for key, value in values.items() if value})
 
         if not client:
             return None
 
-        # Update the fields if new values are provided (they can be optional)
-        client.name = name if name else client.name
-        client.email = email if email else client.email
-        client.phone = phone if phone else client.phone
-        client.address = address if address else client.address
-
         # Commit the changes to the database
         db.session.commit()
         # Return updated client information
@@ -108,11 +145,27 @@ def update_client(client_id, name, email, phone, address):
             "address": client.address,
             "created_at": client.created_at,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         # If an error occurs, rollback the transaction
         db.session.rollback()
         logger.error(f"Error updating client {client_id}: {e}")
         return {"error": "Internal Server Error"}
+
+
+def update_clients_bulk(values, ids=None, filters=None):
+    """
+    Update many clients with a single UPDATE statement.
+    :param values: A dictionary with the fields to set on every matched client.
+    :param ids: The IDs of the clients to update (optional when filters are given).
+    :param filters: Filter expressions selecting the clients (optional when ids are given).
+    :return: dict: The number of updated clients ('updated').
+    """
+    return bulk_update(Client, values, ids, filters)
+
+
 def delete_client(client_id):
     """
     Delete a client.
@@ -128,6 +181,19 @@ def delete_client(client_id):
         # Commit the deletion
         db.session.commit()
         return client
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e, deleting=True)
     except Exception as e:
         logger.error(f"Error deleting client {client_id}: {e}")
-        return {"error": "Internal Server Error"}
\ No newline at end of file
+        return {"error": "Internal Server Error"}
+
+
+def delete_clients_bulk(ids=None, filters=None):
+    """
+    Delete many clients with a single DELETE statement.
+    :param ids: The IDs of the clients to delete (optional when filters are given).
+    :param filters: Filter expressions selecting the clients (optional when ids are given).
+    :return: dict: The number of deleted clients ('deleted').
+    """
+    return bulk_delete(Client, ids, filters)
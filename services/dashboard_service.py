@@ -0,0 +1,99 @@
+import logging
+from datetime import datetime
+from sqlalchemy import func, literal, null, select, union_all
+from models.client import Client
+from models.employee import Employee
+from models.invoice import Invoice
+from models.task import Task
+from models.work import Work
+from utils.cache import VersionedCache
+from utils.database import db
+
+logger = logging.getLogger(__name__)
+
+# Statuses of the works that are not finished yet
+OPEN_WORK_STATUSES = ('pending', 'in_progress')
+
+# Status of the tasks an employee is currently working on
+TASK_IN_PROGRESS_STATUS = 'in_progress'
+
+def _month_start():
+    """
+    :return: datetime: Midnight of the first day of the current month.
+    """
+    return datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _summary_statement(month_start):
+    """
+    Build the statement computing every figure of the dashboard in one pass.
+    Each branch of the UNION ALL is an aggregate served by an index (client
+    primary key, work and task status indexes, invoice issue date index) and
+    returns (metric, key, label, value) rows.
+    :param month_start: Start of the revenue period.
+    :return: The SELECT statement.
+    """
+    return union_all(
+        select(literal('clients'), null(), null(), func.count()).select_from(Client),
+        select(literal('works'), Work.status, null(), func.count())
+        .where(Work.status.in_(OPEN_WORK_STATUSES))
+        .group_by(Work.status),
+        select(literal('tasks'), Task.employee_id, Employee.name, func.count())
+        .outerjoin(Employee, Employee.employee_id == Task.employee_id)
+        .where(Task.status == TASK_IN_PROGRESS_STATUS)
+        .group_by(Task.employee_id, Employee.name),
+        select(literal('revenue'), null(), null(), func.coalesce(func.sum(Invoice.total), 0))
+        .where(Invoice.issued_at >= month_start),
+        select(literal('revenue_with_iva'), null(), null(), func.coalesce(func.sum(Invoice.total_with_iva), 0))
+        .where(Invoice.issued_at >= month_start),
+    )
+
+def _load_summary():
+    """
+    Compute the dashboard figures with a single query.
+    :return: dict: The dashboard summary.
+    """
+    month_start = _month_start()
+    summary = {
+        "month": month_start.strftime('%Y-%m'),
+        "clients": 0,
+        "open_works": 0,
+        "works_by_status": [],
+        "tasks_in_progress": [],
+        "revenue": 0.0,
+        "revenue_with_iva": 0.0,
+        "generated_at": datetime.now(),
+    }
+    for metric, key, label, value in db.session.execute(_summary_statement(month_start)):
+        if metric == 'works':
+            summary["works_by_status"].append({"status": key, "count": value})
+            summary["open_works"] += value
+        elif metric == 'tasks':
+            summary["tasks_in_progress"].append({"employee_id": key, "name": label, "count": value})
+        else:
+            summary[metric] = value
+    return summary
+
+# The summary is read by every dashboard page: it is computed once and served from
+# memory until one of the tables it is built from changes.
+summary_cache = VersionedCache(
+    (Client.__tablename__, Work.__tablename__, Task.__tablename__, Employee.__tablename__, Invoice.__tablename__),
+    _load_summary,
+    'DASHBOARD_CACHE_TTL'
+)
+
+def get_summary():
+    """
+    Retrieve the dashboard summary: number of clients, open works by status,
+    tasks in progress per employee and revenue of the current month.
+    :return: dict: The dashboard summary.
+    """
+    try:
+        summary = summary_cache.get()
+        # The revenue period starts over on the first day of the month
+        if summary["month"] != _month_start().strftime('%Y-%m'):
+            summary_cache.invalidate()
+            summary = summary_cache.get()
+        return summary
+    except Exception as e:
+        logger.error(f"Error computing the dashboard summary: {e}")
+        raise
@@ -1,47 +1,85 @@
 import logging
+from sqlalchemy.exc import IntegrityError
 from models.employee import Employee
-from utils.database import db
+from utils.database import db, integrity_error, update_returning
+from utils.async_queries import get_one_async, get_page_async
+from utils.bulk import bulk_create, bulk_update, bulk_delete
+from utils.filters import apply_filters
+from utils.pagination import paginate
+from utils.projection import load_fields, to_dict, to_dicts
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def get_all_employees():
+def get_all_employees(fields=None, filters=None, limit=None, after=None, sort=None, with_total=False):
     """
-    Retrieve all employees.
-    :return: dict: A list of dictionaries containing employee information.
+    Retrieve a page of employees.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of employees to return (optional, all employees when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all employees.
+    :return: dict: The page of employees as dictionaries ('items'), the next cursor and the total.
     """
     try:
-        employees = Employee.query.all()
-        return [{"employee_id": employee.employee_id, "name": employee.name, "email": employee.email, "phone": employee.phone, "role": employee.role, "hired_date": employee.hired_date, "created_at": employee.created_at} for employee in employees]
+        query = apply_filters(load_fields(Employee.query, Employee, fields), Employee, filters)
+        page = paginate(query, Employee, limit=limit, after=after, sort=sort, with_total=with_total)
+        page["items"] = to_dicts(page["items"], Employee, fields)
+        return page
     except Exception as e:
         logger.error(f"Error fetching all employees: {e}")
-        return {"error": "Internal Server Error"}
+        raise
 
-def get_employee(employee_id):
+def stream_employees(fields=None, filters=None):
+    """
+    Build the query used to export all (matching) employees.
+    The rows are meant to be iterated with a server-side cursor (yield_per).
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :return: Query: The employees ordered by ID.
+    """
+    query = apply_filters(load_fields(Employee.query, Employee, fields), Employee, filters)
+    return query.order_by(Employee.employee_id)
+
+def get_employee(employee_id, fields=None):
     """
     Retrieve an employee by ID.
     :param employee_id: The ID of the employee to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
     :return: dict: A dictionary containing the employee's information or None if not found.
     """
     try:
         # Query the database for the employee by ID
-        employee = Employee.query.get(employee_id)
+        employee = load_fields(Employee.query, Employee, fields).get(employee_id)
         if not employee:
             return None  # Return None if the employee is not found
         # Return employee data as a dictionary
-        return {
-            "employee_id": employee.employee_id,
-            "name": employee.name,
-            "email": employee.email,
-            "phone": employee.phone,
-            "role": employee.role,
-            "hired_date": employee.hired_date,
-            "created_at": employee.created_at,
-        }
+        return to_dict(employee, Employee, fields)
     except Exception as e:
         logger.error(f"Error fetching employee {employee_id}: {e}")
         raise  # Raise the exception to let the API layer handle it
 
+async def get_all_employees_async(session, fields=None, filters=None, limit=None, after=None, sort=None,
+                                  with_total=False):
+    """
+    Async variant of get_all_employees, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :return: dict: The page of employees as dictionaries ('items'), the next cursor and the total.
+    """
+    return await get_page_async(session, Employee, fields=fields, filters=filters, limit=limit, after=after,
+                                sort=sort, with_total=with_total)
+
+async def get_employee_async(session, employee_id, fields=None):
+    """
+    Async variant of get_employee, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param employee_id: The ID of the employee to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :return: dict: A dictionary containing the employee's information or None if not found.
+    """
+    return await get_one_async(session, Employee, employee_id, fields=fields)
+
 def create_employee(name, email, phone, role, hired_date):
     """
     Create a new employee.
@@ -59,6 +97,9 @@ def create_employee(name, email, phone, role, hired_date):
         db.session.add(employee)  # Save the new employee to the database
         db.session.commit()
         return {"employee_id": employee.employee_id, "name": employee.name, "email": employee.email, "phone": employee.phone, "role": employee.role, "hired_date": employee.hired_date, "created_at": employee.created_at}
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error creating employee: {e}")
         return {"error": "Internal Server Error"}
@@ -67,6 +108,16 @@ def create_employee(name, email, phone, role, hired_date):
 from datetime import datetime
 
 
+def create_employees_bulk(items, batch_size=None):
+    """
+    Create many employees in a single transaction.
+    :param items: A list of dictionaries with the same fields accepted by create_employee.
+    :param batch_size: The number of employees inserted per statement (optional).
+    :return: dict: The created employees ('created') and the rejected items with their position ('errors').
+    """
+    return bulk_create(Employee, items, batch_size)
+
+
 def update_employee(employee_id, name, email, phone, role, hired_date):
     """
     Update an existing employee.
@@ -82,18 +133,17 @@ def update_employee(employee_id, name, email, phone, role, hired_date):
         # Convert hired_date string to datetime.date object
         hired_date_obj = datetime.strptime(hired_date, "%Y-%m-%d").date()
 
-        # Get the employee from the database
-        employee = Employee.query.get(employee_id)
+        # Update the employee's attributes and get the updated row back
+        employee = update_returning(Employee, employee_id, {
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "role": role,
+            "hired_date": hired_date_obj,  # Update hired date
+        })
         if not employee:
             return {"error": f"Employee with ID {employee_id} not found."}, 404
 
-        # Update the employee's attributes
-        employee.name = name
-        employee.email = email
-        employee.phone = phone
-        employee.role = role
-        employee.hired_date = hired_date_obj  # Update hired date
-
         db.session.commit()  # Commit the transaction
 
         return {
@@ -106,11 +156,24 @@ def update_employee(employee_id, name, email, phone, role, hired_date):
             "created_at": employee.created_at,
         }
 
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         db.session.rollback()  # Rollback on error
         logger.error(f"Error updating employee {employee_id}: {e}")
         return {"error": "Internal Server Error"}, 500
 
+def update_employees_bulk(values, ids=None, filters=None):
+    """
+    Update many employees with a single UPDATE statement.
+    :param values: A dictionary with the fields to set on every matched employee.
+    :param ids: The IDs of the employees to update (optional when filters are given).
+    :param filters: Filter expressions selecting the employees (optional when ids are given).
+    :return: dict: The number of updated employees ('updated').
+    """
+    return bulk_update(Employee, values, ids, filters)
+
 def delete_employee(employee_id):
     """
     Delete an employee.
@@ -121,9 +184,22 @@ def delete_employee(employee_id):
         employee = Employee.query.get(employee_id)
         if not employee:
             return None
-        employee.delete()  # Delete the employee from the database
+        db.session.delete(employee)  # Delete the employee from the database
+        db.session.commit()
         return employee
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e, deleting=True)
     except Exception as e:
         logger.error(f"Error deleting employee {employee_id}: {e}")
         return {"error": "Internal Server Error"}, 500
 
+
+def delete_employees_bulk(ids=None, filters=None):
+    """
+    Delete many employees with a single DELETE statement.
+    :param ids: The IDs of the employees to delete (optional when filters are given).
+    :param filters: Filter expressions selecting the employees (optional when ids are given).
+    :return: dict: The number of deleted employees ('deleted').
+    """
+    return bulk_delete(Employee, ids, filters)
@@ -1,51 +1,82 @@
 import logging
+from sqlalchemy.exc import IntegrityError
 from models.invoice_item import InvoiceItem
-from utils.database import db
+from utils.database import db, integrity_error, update_returning
+from utils.async_queries import get_one_async, get_page_async
+from utils.bulk import bulk_create, bulk_update, bulk_delete
+from utils.filters import apply_filters
+from utils.pagination import paginate
+from utils.projection import load_fields, to_dict, to_dicts
 
 logger = logging.getLogger(__name__)
 
-def get_all_invoice_items():
+def get_all_invoice_items(fields=None, filters=None, limit=None, after=None, sort=None, with_total=False):
     """
-    Retrieve all invoice items.
-    :return: list: A list of dictionaries containing invoice item information.
+    Retrieve a page of invoice items.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of invoice items to return (optional, all invoice items when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all invoice items.
+    :return: dict: The page of invoice items as dictionaries ('items'), the next cursor and the total.
     """
     try:
-        invoice_items = InvoiceItem.query.all()
-        return [
-            {
-                "item_id": item.item_id,
-                "description": item.description,
-                "cost": item.cost,
-                "invoice_id": item.invoice_id,
-                "task_id": item.task_id,
-            }
-            for item in invoice_items
-        ]
+        query = apply_filters(load_fields(InvoiceItem.query, InvoiceItem, fields), InvoiceItem, filters)
+        page = paginate(query, InvoiceItem, limit=limit, after=after, sort=sort, with_total=with_total)
+        page["items"] = to_dicts(page["items"], InvoiceItem, fields)
+        return page
     except Exception as e:
         logger.error(f"Error fetching all invoice items: {e}")
-        return {"error": "Internal Server Error"}
+        raise
+
+def stream_invoice_items(fields=None, filters=None):
+    """
+    Build the query used to export all (matching) invoice items.
+    The rows are meant to be iterated with a server-side cursor (yield_per).
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :return: Query: The invoice items ordered by ID.
+    """
+    query = apply_filters(load_fields(InvoiceItem.query, InvoiceItem, fields), InvoiceItem, filters)
+    return query.order_by(InvoiceItem.item_id)
 
-def get_invoice_item(item_id):
+def get_invoice_item(item_id, fields=None):
     """
     Retrieve an invoice item by ID.
     :param item_id: The ID of the invoice item to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
     :return: dict: A dictionary containing the invoice item's information or None if not found.
     """
     try:
-        invoice_item = InvoiceItem.query.get(item_id)
+        invoice_item = load_fields(InvoiceItem.query, InvoiceItem, fields).get(item_id)
         if not invoice_item:
             return None
-        return {
-            "item_id": invoice_item.item_id,
-            "description": invoice_item.description,
-            "cost": invoice_item.cost,
-            "invoice_id": invoice_item.invoice_id,
-            "task_id": invoice_item.task_id,
-        }
+        return to_dict(invoice_item, InvoiceItem, fields)
     except Exception as e:
         logger.error(f"Error fetching invoice item {item_id}: {e}")
         raise
 
+async def get_all_invoice_items_async(session, fields=None, filters=None, limit=None, after=None, sort=None,
+                                      with_total=False):
+    """
+    Async variant of get_all_invoice_items, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :return: dict: The page of invoice items as dictionaries ('items'), the next cursor and the total.
+    """
+    return await get_page_async(session, InvoiceItem, fields=fields, filters=filters, limit=limit, after=after,
+                                sort=sort, with_total=with_total)
+
+async def get_invoice_item_async(session, item_id, fields=None):
+    """
+    Async variant of get_invoice_item, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param item_id: The ID of the invoice item to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :return: dict: A dictionary containing the invoice item's information or None if not found.
+    """
+    return await get_one_async(session, InvoiceItem, item_id, fields=fields)
+
 def create_invoice_item(description, cost, invoice_id, task_id=None):
     """
     Create a new invoice item.
@@ -71,11 +102,23 @@ def create_invoice_item(description, cost, invoice_id, task_id=None):
             "invoice_id": invoice_item.invoice_id,
             "task_id": invoice_item.task_id,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error creating invoice item: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}
 
+def create_invoice_items_bulk(items, batch_size=None):
+    """
+    Create many invoice items in a single transaction.
+    :param items: A list of dictionaries with the same fields accepted by create_invoice_item.
+    :param batch_size: The number of invoice items inserted per statement (optional).
+    :return: dict: The created invoice items ('created') and the rejected items with their position ('errors').
+    """
+    return bulk_create(InvoiceItem, items, batch_size)
+
 def update_invoice_item(item_id, description, cost, invoice_id, task_id=None):
     """
     Update an existing invoice item.
@@ -87,16 +130,16 @@ def update_invoice_item(item_id, description, cost, invoice_id, task_id=None):
     :return: dict: A dictionary containing the updated invoice item's information or an error message.
     """
     try:
-        invoice_item = InvoiceItem.query.get(item_id)
+        # Update the invoice item's attributes and get the updated row back
+        invoice_item = update_returning(InvoiceItem, item_id, {
+            "description": description,
+            "cost": cost,
+            "invoice_id": invoice_id,
+            "task_id": task_id,
+        })
         if not invoice_item:
             return {"error": f"Invoice item with ID {item_id} not found."}, 404
 
-        # Update the invoice item's attributes
-        invoice_item.description = description
-        invoice_item.cost = cost
-        invoice_item.invoice_id = invoice_id
-        invoice_item.task_id = task_id
-
         db.session.commit()
 
         return {
@@ -106,11 +149,24 @@ def update_invoice_item(item_id, description, cost, invoice_id, task_id=None):
             "invoice_id": invoice_item.invoice_id,
             "task_id": invoice_item.task_id,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error updating invoice item {item_id}: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}, 500
 
+def update_invoice_items_bulk(values, ids=None, filters=None):
+    """
+    Update many invoice items with a single UPDATE statement.
+    :param values: A dictionary with the fields to set on every matched invoice item.
+    :param ids: The IDs of the invoice items to update (optional when filters are given).
+    :param filters: Filter expressions selecting the invoice items (optional when ids are given).
+    :return: dict: The number of updated invoice items ('updated').
+    """
+    return bulk_update(InvoiceItem, values, ids, filters)
+
 def delete_invoice_item(item_id):
     """
     Delete an invoice item.
@@ -131,7 +187,19 @@ def delete_invoice_item(item_id):
             "invoice_id": invoice_item.invoice_id,
             "task_id": invoice_item.task_id,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e, deleting=True)
     except Exception as e:
         logger.error(f"Error deleting invoice item {item_id}: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}, 500
+
+def delete_invoice_items_bulk(ids=None, filters=None):
+    """
+    Delete many invoice items with a single DELETE statement.
+    :param ids: The IDs of the invoice items to delete (optional when filters are given).
+    :param filters: Filter expressions selecting the invoice items (optional when ids are given).
+    :return: dict: The number of deleted invoice items ('deleted').
+    """
+    return bulk_delete(InvoiceItem, ids, filters)
@@ -1,54 +1,91 @@
 import logging
+from sqlalchemy.exc import IntegrityError
 from models.invoice import Invoice
-from utils.database import db
+from utils.database import db, integrity_error, update_returning
+from utils.async_queries import get_one_async, get_page_async
+from utils.bulk import bulk_create, bulk_update, bulk_delete
+from utils.filters import apply_filters
+from utils.pagination import paginate
+from utils.projection import load_fields, to_dict, to_dicts
+from utils.includes import load_includes
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def get_all_invoices():
+def get_all_invoices(fields=None, filters=None, limit=None, after=None, sort=None, with_total=False,
+                     include=None):
     """
-    Retrieve all invoices.
-    :return: list: A list of dictionaries containing invoice information.
+    Retrieve a page of invoices.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of invoices to return (optional, all invoices when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all invoices.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: The page of invoices as dictionaries ('items'), the next cursor and the total.
     """
     try:
-        invoices = Invoice.query.all()
-        return [
-            {
-                "invoice_id": invoice.invoice_id,
-                "client_id": invoice.client_id,
-                "issued_at": invoice.issued_at,
-                "total": invoice.total,
-                "iva": invoice.iva,
-                "total_with_iva": invoice.total_with_iva,
-            }
-            for invoice in invoices
-        ]
+        query = apply_filters(load_fields(Invoice.query, Invoice, fields), Invoice, filters)
+        query = load_includes(query, Invoice, include)
+        page = paginate(query, Invoice, limit=limit, after=after, sort=sort, with_total=with_total)
+        page["items"] = to_dicts(page["items"], Invoice, fields, include)
+        return page
     except Exception as e:
         logger.error(f"Error fetching all invoices: {e}")
-        return {"error": "Internal Server Error"}
+        raise
+
+def stream_invoices(fields=None, filters=None, include=None):
+    """
+    Build the query used to export all (matching) invoices.
+    The rows are meant to be iterated with a server-side cursor (yield_per).
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: Query: The invoices ordered by ID.
+    """
+    query = apply_filters(load_fields(Invoice.query, Invoice, fields), Invoice, filters)
+    query = load_includes(query, Invoice, include)
+    return query.order_by(Invoice.invoice_id)
 
-def get_invoice(invoice_id):
+def get_invoice(invoice_id, fields=None, include=None):
     """
     Retrieve an invoice by ID.
     :param invoice_id: The ID of the invoice to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
     :return: dict: A dictionary containing the invoice's information or None if not found.
     """
     try:
-        invoice = Invoice.query.get(invoice_id)
+        invoice = load_includes(load_fields(Invoice.query, Invoice, fields), Invoice, include).get(invoice_id)
         if not invoice:
             return None
-        return {
-            "invoice_id": invoice.invoice_id,
-            "client_id": invoice.client_id,
-            "issued_at": invoice.issued_at,
-            "total": invoice.total,
-            "iva": invoice.iva,
-            "total_with_iva": invoice.total_with_iva,
-        }
+        return to_dict(invoice, Invoice, fields, include)
     except Exception as e:
         logger.error(f"Error fetching invoice {invoice_id}: {e}")
         raise
 
+async def get_all_invoices_async(session, fields=None, filters=None, limit=None, after=None, sort=None,
+                                 with_total=False, include=None):
+    """
+    Async variant of get_all_invoices, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :return: dict: The page of invoices as dictionaries ('items'), the next cursor and the total.
+    """
+    return await get_page_async(session, Invoice, fields=fields, filters=filters, limit=limit, after=after,
+                                sort=sort, with_total=with_total, include=include)
+
+async def get_invoice_async(session, invoice_id, fields=None, include=None):
+    """
+    Async variant of get_invoice, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param invoice_id: The ID of the invoice to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: A dictionary containing the invoice's information or None if not found.
+    """
+    return await get_one_async(session, Invoice, invoice_id, fields=fields, include=include)
+
 def create_invoice(client_id, issued_at, total, iva, total_with_iva):
     """
     Create a new invoice.
@@ -78,11 +115,23 @@ def create_invoice(client_id, issued_at, total, iva, total_with_iva):
             "iva": invoice.iva,
             "total_with_iva": invoice.total_with_iva,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error creating invoice: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}
 
+def create_invoices_bulk(items, batch_size=None):
+    """
+    Create many invoices in a single transaction.
+    :param items: A list of dictionaries with the same fields accepted by create_invoice.
+    :param batch_size: The number of invoices inserted per statement (optional).
+    :return: dict: The created invoices ('created') and the rejected items with their position ('errors').
+    """
+    return bulk_create(Invoice, items, batch_size)
+
 def update_invoice(invoice_id, client_id, issued_at, total, iva, total_with_iva):
     """
     Update an existing invoice.
@@ -96,16 +145,16 @@ def update_invoice(invoice_id, client_id, issued_at, total, iva, total_with_iva)
     """
     try:
         issued_at_obj = datetime.strptime(issued_at, "%Y-%m-%d %H:%M:%S")
-        invoice = Invoice.query.get(invoice_id)
+        invoice = update_returning(Invoice, invoice_id, {
+            "client_id": client_id,
+            "issued_at": issued_at_obj,
+            "total": total,
+            "iva": iva,
+            "total_with_iva": total_with_iva,
+        })
         if not invoice:
             return {"error": f"Invoice with ID {invoice_id} not found."}, 404
 
-        invoice.client_id = client_id
-        invoice.issued_at = issued_at_obj
-        invoice.total = total
-        invoice.iva = iva
-        invoice.total_with_iva = total_with_iva
-
         db.session.commit()
         return {
             "invoice_id": invoice.invoice_id,
@@ -115,11 +164,24 @@ def update_invoice(invoice_id, client_id, issued_at, total, iva, total_with_iva)
             "iva": invoice.iva,
             "total_with_iva": invoice.total_with_iva,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error updating invoice {invoice_id}: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}, 500
 
+def update_invoices_bulk(values, ids=None, filters=None):
+    """
+    Update many invoices with a single UPDATE statement.
+    :param values: A dictionary with the fields to set on every matched invoice.
+    :param ids: The IDs of the invoices to update (optional when filters are given).
+    :param filters: Filter expressions selecting the invoices (optional when ids are given).
+    :return: dict: The number of updated invoices ('updated').
+    """
+    return bulk_update(Invoice, values, ids, filters)
+
 def delete_invoice(invoice_id):
     """
     Delete an invoice.
@@ -141,7 +203,19 @@ def delete_invoice(invoice_id):
             "iva": invoice.iva,
             "total_with_iva": invoice.total_with_iva,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e, deleting=True)
     except Exception as e:
         logger.error(f"Error deleting invoice {invoice_id}: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}, 500
+
+def delete_invoices_bulk(ids=None, filters=None):
+    """
+    Delete many invoices with a single DELETE statement.
+    :param ids: The IDs of the invoices to delete (optional when filters are given).
+    :param filters: Filter expressions selecting the invoices (optional when ids are given).
+    :return: dict: The number of deleted invoices ('deleted').
+    """
+    return bulk_delete(Invoice, ids, filters)
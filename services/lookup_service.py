@@ -0,0 +1,85 @@
+import logging
+from sqlalchemy.orm import joinedload
+from models.client import Client
+from models.vehicle import Vehicle
+from utils.database import db
+from utils.includes import include_serializer
+from utils.lookup import (
+    email_key, normalize_email, normalize_phone, normalize_plate, phone_key, plate_key, prefix_range
+)
+
+logger = logging.getLogger(__name__)
+
+# Vehicles are returned with their owner, which is what the front desk and the gate need
+VEHICLE_INCLUDE = {'client': {}}
+
+# Plates matched per IN (...) statement by the bulk lookup, below the SQLite variable limit
+PLATE_BATCH_SIZE = 500
+
+# Normalization and indexed SQL expression of every lookup key
+LOOKUP_KEYS = {
+    'plate': (Vehicle, Vehicle.license_plate, normalize_plate, plate_key),
+    'phone': (Client, Client.phone, normalize_phone, phone_key),
+    'email': (Client, Client.email, normalize_email, email_key),
+}
+
+def lookup(key, value, prefix=False, limit=20):
+    """
+    Find the vehicles or clients whose plate, phone number or email matches a value,
+    ignoring case and separators ("aa-12-bb" finds "AA 12 BB"). Both exact and prefix
+    lookups are range scans of the expression index of the normalized column.
+    :param key: What to look up: 'plate', 'phone' or 'email'.
+    :param value: The plate, phone number or email as typed.
+    :param prefix: Whether the value is the beginning of the key rather than all of it.
+    :param limit: Maximum number of rows to return.
+    :return: dict: The matching 'vehicles' and 'clients', ordered by the normalized key,
+        or None when the value is empty once normalized.
+    """
+    model, column, normalize, expression = LOOKUP_KEYS[key]
+    normalized = normalize(value)
+    if not normalized:
+        return None
+    indexed = expression(column)
+    condition = prefix_range(indexed, normalized) if prefix else indexed == normalized
+    query = model.query.filter(condition).order_by(indexed).limit(limit)
+    try:
+        if model is Vehicle:
+            serialize = include_serializer(Vehicle, None, VEHICLE_INCLUDE)
+            vehicles = query.options(joinedload(Vehicle.client)).all()
+            return {"vehicles": [serialize(vehicle) for vehicle in vehicles], "clients": []}
+        serialize = include_serializer(Client)
+        return {"vehicles": [], "clients": [serialize(client) for client in query.all()]}
+    except Exception as e:
+        logger.error(f"Error looking up {key} '{value}': {e}")
+        raise
+
+def lookup_plates(plates):
+    """
+    Find the vehicles of a batch of license plates, e.g. the plates read by the
+    gate camera, with one indexed IN (...) query per PLATE_BATCH_SIZE plates.
+    :param plates: The plates as read, in any format.
+    :return: list: For every plate, in the given order: the plate, its normalized
+        form and the matching vehicles (with their client).
+    """
+    normalized = [normalize_plate(plate) for plate in plates]
+    keys = sorted({key for key in normalized if key})
+    serialize = include_serializer(Vehicle, None, VEHICLE_INCLUDE)
+    indexed = plate_key(Vehicle.license_plate)
+    matches = {}
+    try:
+        for start in range(0, len(keys), PLATE_BATCH_SIZE):
+            rows = (
+                db.session.query(indexed, Vehicle)
+                .filter(indexed.in_(keys[start:start + PLATE_BATCH_SIZE]))
+                .options(joinedload(Vehicle.client))
+                .all()
+            )
+            for key, vehicle in rows:
+                matches.setdefault(key, []).append(serialize(vehicle))
+    except Exception as e:
+        logger.error(f"Error looking up {len(plates)} plates: {e}")
+        raise
+    return [
+        {"plate": plate, "normalized": key, "vehicles": matches.get(key, [])}
+        for plate, key in zip(plates, normalized)
+    ]
@@ -0,0 +1,194 @@
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select
+from models.employee import Employee
+from models.revenue import RevenueClient, RevenueDaily, RevenueMonthly
+from models.task import Task
+from utils.cache import VersionedCache
+from utils.database import db
+
+logger = logging.getLogger(__name__)
+
+# Statuses of the tasks that are finished
+CLOSED_TASK_STATUSES = ('completed', 'canceled')
+
+# Status of the tasks counted in the throughput and the average duration
+COMPLETED_TASK_STATUS = 'completed'
+
+# Number of weeks averaged by the rolling throughput
+ROLLING_WEEKS = 4
+
+def get_revenue(group_by='month', start=None, end=None, client_id=None):
+    """
+    Retrieve the revenue per day, month or client and month.
+    Only the rollup tables are read (see utils.rollups), so the cost depends on the
+    number of periods reported, not on the number of invoices.
+    :param group_by: 'day', 'month' or 'client'.
+    :param start: First day of the report (optional).
+    :param end: Last day of the report (optional).
+    :param client_id: Restrict a per client report to one client (optional).
+    :return: list: The revenue of every period as dictionaries.
+    """
+    try:
+        if group_by == 'day':
+            model, period = RevenueDaily, RevenueDaily.day
+            start_key = date(start.year, start.month, start.day) if start else None
+            end_key = date(end.year, end.month, end.day) if end else None
+        else:
+            model = RevenueClient if group_by == 'client' else RevenueMonthly
+            period = model.month
+            start_key = start.strftime('%Y-%m') if start else None
+            end_key = end.strftime('%Y-%m') if end else None
+
+        query = model.query
+        if start_key:
+            query = query.filter(period >= start_key)
+        if end_key:
+            query = query.filter(period <= end_key)
+        if model is RevenueClient:
+            if client_id is not None:
+                query = query.filter(RevenueClient.client_id == client_id)
+            query = query.order_by(period, RevenueClient.client_id)
+        else:
+            query = query.order_by(period)
+
+        return [
+            {
+                "period": row.day.isoformat() if model is RevenueDaily else row.month,
+                "client_id": getattr(row, 'client_id', None),
+                "invoice_count": row.invoice_count,
+                "total": row.total,
+                "total_with_iva": row.total_with_iva,
+            }
+            for row in query.all()
+        ]
+    except Exception as e:
+        logger.error(f"Error fetching the revenue report: {e}")
+        raise
+
+def _workload_statement():
+    """
+    Build the statement computing the task counters and the average duration of
+    every employee. The tasks are aggregated in one pass over the covering index
+    ix_task_employee_id_status_dates before being joined to the employees.
+    :return: The SELECT statement.
+    """
+    completed = Task.status == COMPLETED_TASK_STATUS
+    tasks = (
+        select(
+            Task.employee_id,
+            func.count().filter(Task.status.notin_(CLOSED_TASK_STATUSES)).label('open_tasks'),
+            func.count().filter(completed).label('completed_tasks'),
+            func.avg(func.julianday(Task.end_date) - func.julianday(Task.start_date))
+            .filter(completed, Task.end_date.isnot(None))
+            .label('avg_duration_days'),
+        )
+        .group_by(Task.employee_id)
+        .subquery()
+    )
+    return (
+        select(
+            Employee.employee_id,
+            Employee.name,
+            func.coalesce(tasks.c.open_tasks, 0).label('open_tasks'),
+            func.coalesce(tasks.c.completed_tasks, 0).label('completed_tasks'),
+            tasks.c.avg_duration_days,
+        )
+        .outerjoin(tasks, tasks.c.employee_id == Employee.employee_id)
+        .order_by(Employee.employee_id)
+    )
+
+def _throughput_statement():
+    """
+    Build the statement counting the tasks every employee completed per week
+    (weeks start on Monday), with the average of the last ROLLING_WEEKS calendar
+    weeks computed by a window function. The tasks are first counted per day, so
+    the date functions only run once per employee and day. Weeks without completed
+    tasks have no row.
+    :return: The SELECT statement.
+    """
+    # The status is filtered inside the count: a WHERE on it would make SQLite
+    # prefer the status index and read every task row instead of the covering index
+    days = (
+        select(
+            Task.employee_id,
+            Task.end_date,
+            func.count().filter(Task.status == COMPLETED_TASK_STATUS).label('completed'),
+        )
+        .where(Task.end_date.isnot(None))
+        .group_by(Task.employee_id, Task.end_date)
+        .subquery()
+    )
+    week = func.date(days.c.end_date, 'weekday 0', '-6 days')
+    completed = func.sum(days.c.completed)
+    window = func.sum(completed).over(
+        partition_by=days.c.employee_id,
+        order_by=func.julianday(week),
+        range_=(-7 * (ROLLING_WEEKS - 1), 0),
+    )
+    return (
+        select(
+            days.c.employee_id,
+            week.label('week'),
+            completed.label('completed'),
+            (window / float(ROLLING_WEEKS)).label('rolling_average'),
+        )
+        .group_by(days.c.employee_id, week)
+        .having(completed > 0)
+        .order_by(days.c.employee_id, week)
+    )
+
+def _load_workload():
+    """
+    Compute the workload of every employee over the whole task history with two
+    aggregate queries.
+    :return: dict: The workload report, with every week of throughput.
+    """
+    employees = {}
+    for row in db.session.execute(_workload_statement()):
+        employees[row.employee_id] = {
+            "employee_id": row.employee_id,
+            "name": row.name,
+            "open_tasks": row.open_tasks,
+            "completed_tasks": row.completed_tasks,
+            "avg_duration_days": row.avg_duration_days,
+            "weekly": [],
+        }
+    for row in db.session.execute(_throughput_statement()):
+        if row.employee_id in employees:
+            employees[row.employee_id]["weekly"].append({
+                "week": row.week,
+                "completed": row.completed,
+                "rolling_average": row.rolling_average,
+            })
+    return {"generated_at": datetime.now(), "employees": list(employees.values())}
+
+# The report only changes with the task and employee tables: it is computed once
+# and served from memory until one of them changes.
+workload_cache = VersionedCache(
+    (Task.__tablename__, Employee.__tablename__),
+    _load_workload,
+    'REPORT_CACHE_TTL'
+)
+
+def get_workload(weeks=8, employee_id=None):
+    """
+    Retrieve the workload of the employees: open and completed tasks, average task
+    duration (end_date - start_date, in days) and completed tasks per week.
+    :param weeks: Number of weeks of throughput to return, the current one included.
+    :param employee_id: Restrict the report to one employee (optional).
+    :return: dict: The workload report.
+    """
+    try:
+        report = workload_cache.get()
+        today = date.today()
+        since = (today - timedelta(days=today.weekday(), weeks=weeks - 1)).isoformat()
+        employees = [
+            dict(employee, weekly=[week for week in employee["weekly"] if week["week"] >= since])
+            for employee in report["employees"]
+            if employee_id is None or employee["employee_id"] == employee_id
+        ]
+        return {"generated_at": report["generated_at"], "since": since, "employees": employees}
+    except Exception as e:
+        logger.error(f"Error fetching the workload report: {e}")
+        raise
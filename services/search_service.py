@@ -0,0 +1,62 @@
+import logging
+from sqlalchemy import text
+from werkzeug.exceptions import BadRequest
+from utils.database import db
+from utils.pagination import encode_cursor
+from utils.search import SEARCH_TABLE, match_expression
+
+logger = logging.getLogger(__name__)
+
+def search(q, resource=None, limit=20, after=None):
+    """
+    Search the clients, vehicles, works and tasks with the full-text index.
+    Results are ranked by relevance (bm25) and paged with a keyset on (rank, rowid),
+    like the collections (see utils.pagination).
+    :param q: The search text; every word must appear, possibly as a prefix.
+    :param resource: Restrict the search to one resource, e.g. 'vehicle' (optional).
+    :param limit: Maximum number of results to return.
+    :param after: Decoded cursor of the previous page (optional).
+    :return: dict: The page of results ('items') and the next cursor, or None when the text has no words.
+    :raises BadRequest: When the cursor was not returned by a search.
+    """
+    expression = match_expression(q)
+    if not expression:
+        return None
+    conditions, params = [], {"q": expression, "limit": limit + 1}
+    if resource:
+        conditions.append("resource = :resource")
+        params["resource"] = resource
+    if after:
+        if after["sort"] != 'rank' or len(after["values"]) != 2:
+            raise BadRequest("Invalid pagination cursor.")
+        conditions.append("(rank, rowid) > (:rank, :rowid)")
+        params["rank"], params["rowid"] = after["values"]
+    statement = (
+        f"SELECT * FROM ("
+        f"SELECT rowid, resource, resource_id, rank, "
+        f"snippet({SEARCH_TABLE}, 2, '[', ']', '...', 12) AS snippet "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :q"
+        f")" + (f" WHERE {' AND '.join(conditions)}" if conditions else "") +
+        f" ORDER BY rank, rowid LIMIT :limit"
+    )
+    try:
+        rows = db.session.execute(text(statement), params).all()
+    except Exception as e:
+        logger.error(f"Error searching for '{q}': {e}")
+        raise
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor('rank', [rows[-1].rank, rows[-1].rowid])
+    items = [
+        {
+            "resource": row.resource,
+            "id": row.resource_id,
+            "url": f"/api/{row.resource}/{row.resource_id}",
+            "snippet": row.snippet,
+            "rank": row.rank,
+        }
+        for row in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,9 +1,32 @@
 import logging
 from models.setting import Setting
+from utils.cache import VersionedCache
 from utils.database import db
 
 logger = logging.getLogger(__name__)
 
+def _load_settings():
+    """
+    Load the whole setting table.
+    :return: dict: The setting values by key name.
+    """
+    return {setting.key_name: setting.value for setting in Setting.query.all()}
+
+# Settings are read on hot paths (e.g. the IVA rate of invoice totals), so they are
+# served from memory and only reloaded when the setting table version changes.
+settings_cache = VersionedCache(Setting.__tablename__, _load_settings, 'SETTINGS_CACHE_TTL')
+
+def load_settings():
+    """
+    Warm the settings cache, e.g. when the application starts.
+    :return: dict: The setting values by key name or None if an error occurs.
+    """
+    try:
+        return settings_cache.get()
+    except Exception as e:
+        logger.error(f"Error loading settings: {e}")
+        return None
+
 def get_setting(key_name):
     """
     Retrieve the value of a specific setting by its key name.
@@ -11,8 +34,7 @@ def get_setting(key_name):
     :return: The value of the setting or None if not found.
     """
     try:
-        setting = Setting.query.filter_by(key_name=key_name).first()
-        return setting.value if setting else None
+        return settings_cache.get().get(key_name)
     except Exception as e:
         logger.error(f"Error fetching setting {key_name}: {e}")
         return None
@@ -30,7 +52,8 @@ def update_setting(key_name, value):
             return None
 
         setting.value = value
-        db.session.commit()
+        db.session.commit()  # Also bumps the setting table version for the other workers
+        settings_cache.invalidate()
         return setting
     except Exception as e:
         db.session.rollback()
@@ -1,58 +1,91 @@
 import logging
+from sqlalchemy.exc import IntegrityError
 from models.task import Task
-from utils.database import db
+from utils.database import db, integrity_error, update_returning
+from utils.async_queries import get_one_async, get_page_async
+from utils.bulk import bulk_create, bulk_update, bulk_delete
+from utils.filters import apply_filters
+from utils.pagination import paginate
+from utils.projection import load_fields, to_dict, to_dicts
+from utils.includes import load_includes
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def get_all_tasks():
+def get_all_tasks(fields=None, filters=None, limit=None, after=None, sort=None, with_total=False,
+                  include=None):
     """
-    Retrieve all tasks.
-    :return: list: A list of dictionaries containing task information.
+    Retrieve a page of tasks.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of tasks to return (optional, all tasks when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all tasks.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: The page of tasks as dictionaries ('items'), the next cursor and the total.
     """
     try:
-        tasks = Task.query.all()
-        return [
-            {
-                "task_id": task.task_id,
-                "description": task.description,
-                "employee_id": task.employee_id,
-                "start_date": task.start_date,
-                "end_date": task.end_date,
-                "status": task.status,
-                "work_id": task.work_id,
-                "created_at": task.created_at,
-            }
-            for task in tasks
-        ]
+        query = apply_filters(load_fields(Task.query, Task, fields), Task, filters)
+        query = load_includes(query, Task, include)
+        page = paginate(query, Task, limit=limit, after=after, sort=sort, with_total=with_total)
+        page["items"] = to_dicts(page["items"], Task, fields, include)
+        return page
     except Exception as e:
         logger.error(f"Error fetching all tasks: {e}")
-        return {"error": "Internal Server Error"}
+        raise
+
+def stream_tasks(fields=None, filters=None, include=None):
+    """
+    Build the query used to export all (matching) tasks.
+    The rows are meant to be iterated with a server-side cursor (yield_per).
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: Query: The tasks ordered by ID.
+    """
+    query = apply_filters(load_fields(Task.query, Task, fields), Task, filters)
+    query = load_includes(query, Task, include)
+    return query.order_by(Task.task_id)
 
-def get_task(task_id):
+def get_task(task_id, fields=None, include=None):
     """
     Retrieve a task by ID.
     :param task_id: The ID of the task to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
     :return: dict: A dictionary containing the task's information or None if not found.
     """
     try:
-        task = Task.query.get(task_id)
+        task = load_includes(load_fields(Task.query, Task, fields), Task, include).get(task_id)
         if not task:
             return None
-        return {
-            "task_id": task.task_id,
-            "description": task.description,
-            "employee_id": task.employee_id,
-            "start_date": task.start_date,
-            "end_date": task.end_date,
-            "status": task.status,
-            "work_id": task.work_id,
-            "created_at": task.created_at,
-        }
+        return to_dict(task, Task, fields, include)
     except Exception as e:
         logger.error(f"Error fetching task {task_id}: {e}")
         raise
 
+async def get_all_tasks_async(session, fields=None, filters=None, limit=None, after=None, sort=None,
+                              with_total=False, include=None):
+    """
+    Async variant of get_all_tasks, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :return: dict: The page of tasks as dictionaries ('items'), the next cursor and the total.
+    """
+    return await get_page_async(session, Task, fields=fields, filters=filters, limit=limit, after=after,
+                                sort=sort, with_total=with_total, include=include)
+
+async def get_task_async(session, task_id, fields=None, include=None):
+    """
+    Async variant of get_task, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param task_id: The ID of the task to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: A dictionary containing the task's information or None if not found.
+    """
+    return await get_one_async(session, Task, task_id, fields=fields, include=include)
+
 def create_task(description, employee_id, start_date, end_date=None, status="pending", work_id=None):
     """
     Create a new task.
@@ -90,11 +123,23 @@ def create_task(description, employee_id, start_date, end_date=None, status="pen
             "work_id": task.work_id,
             "created_at": task.created_at,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error creating task: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}
 
+def create_tasks_bulk(items, batch_size=None):
+    """
+    Create many tasks in a single transaction.
+    :param items: A list of dictionaries with the same fields accepted by create_task.
+    :param batch_size: The number of tasks inserted per statement (optional).
+    :return: dict: The created tasks ('created') and the rejected items with their position ('errors').
+    """
+    return bulk_create(Task, items, batch_size)
+
 def update_task(task_id, description, employee_id, start_date, end_date=None, status="pending", work_id=None):
     """
     Update an existing task.
@@ -113,17 +158,17 @@ def update_task(task_id, description, employee_id, start_date, end_date=None, st
         if end_date:
             end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-        task = Task.query.get(task_id)
+        task = update_returning(Task, task_id, {
+            "description": description,
+            "employee_id": employee_id,
+            "start_date": start_date_obj,
+            "end_date": end_date_obj,
+            "status": status,
+            "work_id": work_id,
+        })
         if not task:
             return {"error": f"Task with ID {task_id} not found."}, 404
 
-        task.description = description
-        task.employee_id = employee_id
-        task.start_date = start_date_obj
-        task.end_date = end_date_obj
-        task.status = status
-        task.work_id = work_id
-
         db.session.commit()
         return {
             "task_id": task.task_id,
@@ -135,11 +180,24 @@ def update_task(task_id, description, employee_id, start_date, end_date=None, st
             "work_id": task.work_id,
             "created_at": task.created_at,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error updating task {task_id}: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}, 500
 
+def update_tasks_bulk(values, ids=None, filters=None):
+    """
+    Update many tasks with a single UPDATE statement.
+    :param values: A dictionary with the fields to set on every matched task.
+    :param ids: The IDs of the tasks to update (optional when filters are given).
+    :param filters: Filter expressions selecting the tasks (optional when ids are given).
+    :return: dict: The number of updated tasks ('updated').
+    """
+    return bulk_update(Task, values, ids, filters)
+
 def delete_task(task_id):
     """
     Delete a task.
@@ -163,7 +221,19 @@ def delete_task(task_id):
             "work_id": task.work_id,
             "created_at": task.created_at,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e, deleting=True)
     except Exception as e:
         logger.error(f"Error deleting task {task_id}: {e}")
         db.session.rollback()
         return {"error": "Internal Server Error"}, 500
+
+def delete_tasks_bulk(ids=None, filters=None):
+    """
+    Delete many tasks with a single DELETE statement.
+    :param ids: The IDs of the tasks to delete (optional when filters are given).
+    :param filters: Filter expressions selecting the tasks (optional when ids are given).
+    :return: dict: The number of deleted tasks ('deleted').
+    """
+    return bulk_delete(Task, ids, filters)
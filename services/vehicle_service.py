@@ -1,56 +1,91 @@
 import logging
+from sqlalchemy.exc import IntegrityError
 from models.vehicle import Vehicle
-from utils.database import db
+from utils.database import db, integrity_error, update_returning
+from utils.async_queries import get_one_async, get_page_async
+from utils.bulk import bulk_create, bulk_update, bulk_delete
+from utils.filters import apply_filters
+from utils.pagination import paginate
+from utils.projection import load_fields, to_dict, to_dicts
+from utils.includes import load_includes
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def get_all_vehicles():
+def get_all_vehicles(fields=None, filters=None, limit=None, after=None, sort=None, with_total=False,
+                     include=None):
     """
-    Retrieve all vehicles.
-    :return: list: A list of dictionaries containing vehicle information.
+    Retrieve a page of vehicles.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of vehicles to return (optional, all vehicles when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all vehicles.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: The page of vehicles as dictionaries ('items'), the next cursor and the total.
     """
     try:
-        vehicles = Vehicle.query.all()
-        return [
-            {
-                "vehicle_id": vehicle.vehicle_id,
-                "brand": vehicle.brand,
-                "model": vehicle.model,
-                "year": vehicle.year,
-                "license_plate": vehicle.license_plate,
-                "client_id": vehicle.client_id,
-                "created_at": vehicle.created_at,
-            }
-            for vehicle in vehicles
-        ]
+        query = apply_filters(load_fields(Vehicle.query, Vehicle, fields), Vehicle, filters)
+        query = load_includes(query, Vehicle, include)
+        page = paginate(query, Vehicle, limit=limit, after=after, sort=sort, with_total=with_total)
+        page["items"] = to_dicts(page["items"], Vehicle, fields, include)
+        return page
     except Exception as e:
         logger.error(f"Error fetching all vehicles: {e}")
-        return {"error": "Internal Server Error"}
+        raise
 
-def get_vehicle(vehicle_id):
+def stream_vehicles(fields=None, filters=None, include=None):
+    """
+    Build the query used to export all (matching) vehicles.
+    The rows are meant to be iterated with a server-side cursor (yield_per).
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: Query: The vehicles ordered by ID.
+    """
+    query = apply_filters(load_fields(Vehicle.query, Vehicle, fields), Vehicle, filters)
+    query = load_includes(query, Vehicle, include)
+    return query.order_by(Vehicle.vehicle_id)
+
+def get_vehicle(vehicle_id, fields=None, include=None):
     """
     Retrieve a vehicle by ID.
     :param vehicle_id: The ID of the vehicle to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
     :return: dict: A dictionary containing the vehicle's information or None if not found.
     """
     try:
-        vehicle = Vehicle.query.get(vehicle_id)
+        vehicle = load_includes(load_fields(Vehicle.query, Vehicle, fields), Vehicle, include).get(vehicle_id)
         if not vehicle:
             return None
-        return {
-            "vehicle_id": vehicle.vehicle_id,
-            "brand": vehicle.brand,
-            "model": vehicle.model,
-            "year": vehicle.year,
-            "license_plate": vehicle.license_plate,
-            "client_id": vehicle.client_id,
-            "created_at": vehicle.created_at,
-        }
+        return to_dict(vehicle, Vehicle, fields, include)
     except Exception as e:
         logger.error(f"Error fetching vehicle {vehicle_id}: {e}")
         raise  # Raise the exception to let the API layer handle it
 
+async def get_all_vehicles_async(session, fields=None, filters=None, limit=None, after=None, sort=None,
+                                 with_total=False, include=None):
+    """
+    Async variant of get_all_vehicles, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :return: dict: The page of vehicles as dictionaries ('items'), the next cursor and the total.
+    """
+    return await get_page_async(session, Vehicle, fields=fields, filters=filters, limit=limit, after=after,
+                                sort=sort, with_total=with_total, include=include)
+
+async def get_vehicle_async(session, vehicle_id, fields=None, include=None):
+    """
+    Async variant of get_vehicle, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param vehicle_id: The ID of the vehicle to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: A dictionary containing the vehicle's information or None if not found.
+    """
+    return await get_one_async(session, Vehicle, vehicle_id, fields=fields, include=include)
+
 def create_vehicle(brand, model, year, license_plate, client_id):
     """
     Create a new vehicle.
@@ -80,10 +115,22 @@ def create_vehicle(brand, model, year, license_plate, client_id):
             "client_id": vehicle.client_id,
             "created_at": vehicle.created_at,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error creating vehicle: {e}")
         return {"error": "Internal Server Error"}
 
+def create_vehicles_bulk(items, batch_size=None):
+    """
+    Create many vehicles in a single transaction.
+    :param items: A list of dictionaries with the same fields accepted by create_vehicle.
+    :param batch_size: The number of vehicles inserted per statement (optional).
+    :return: dict: The created vehicles ('created') and the rejected items with their position ('errors').
+    """
+    return bulk_create(Vehicle, items, batch_size)
+
 def update_vehicle(vehicle_id, brand, model, year, license_plate, client_id):
     """
     Update an existing vehicle.
@@ -96,16 +143,16 @@ def update_vehicle(vehicle_id, brand, model, year, license_plate, client_id):
     :return: dict: A dictionary containing the updated vehicle's information or None if not found.
     """
     try:
-        vehicle = Vehicle.query.get(vehicle_id)
+        vehicle = update_returning(Vehicle, vehicle_id, {
+            "brand": brand,
+            "model": model,
+            "year": year,
+            "license_plate": license_plate,
+            "client_id": client_id,
+        })
         if not vehicle:
             return {"error": f"Vehicle with ID {vehicle_id} not found."}, 404
 
-        vehicle.brand = brand
-        vehicle.model = model
-        vehicle.year = year
-        vehicle.license_plate = license_plate
-        vehicle.client_id = client_id
-
         db.session.commit()
         return {
             "vehicle_id": vehicle.vehicle_id,
@@ -116,11 +163,24 @@ def update_vehicle(vehicle_id, brand, model, year, license_plate, client_id):
             "client_id": vehicle.client_id,
             "created_at": vehicle.created_at,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         db.session.rollback()  # Rollback on error
         logger.error(f"Error updating vehicle {vehicle_id}: {e}")
         return {"error": "Internal Server Error"}, 500
 
+def update_vehicles_bulk(values, ids=None, filters=None):
+    """
+    Update many vehicles with a single UPDATE statement.
+    :param values: A dictionary with the fields to set on every matched vehicle.
+    :param ids: The IDs of the vehicles to update (optional when filters are given).
+    :param filters: Filter expressions selecting the vehicles (optional when ids are given).
+    :return: dict: The number of updated vehicles ('updated').
+    """
+    return bulk_update(Vehicle, values, ids, filters)
+
 def delete_vehicle(vehicle_id):
     """
     Delete a vehicle.
@@ -134,7 +194,19 @@ def delete_vehicle(vehicle_id):
         db.session.delete(vehicle)
         db.session.commit()
         return vehicle
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e, deleting=True)
     except Exception as e:
         db.session.rollback()  # Rollback on error
         logger.error(f"Error deleting vehicle {vehicle_id}: {e}")
         return {"error": "Internal Server Error"}, 500
+
+def delete_vehicles_bulk(ids=None, filters=None):
+    """
+    Delete many vehicles with a single DELETE statement.
+    :param ids: The IDs of the vehicles to delete (optional when filters are given).
+    :param filters: Filter expressions selecting the vehicles (optional when ids are given).
+    :return: dict: The number of deleted vehicles ('deleted').
+    """
+    return bulk_delete(Vehicle, ids, filters)
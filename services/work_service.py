@@ -1,60 +1,94 @@
 import logging
-from utils.database import db
+from sqlalchemy.exc import IntegrityError
+from utils.database import db, integrity_error, update_returning
+from utils.async_queries import get_one_async, get_page_async
+from utils.bulk import bulk_create, bulk_update, bulk_delete
+from utils.filters import apply_filters
+from utils.pagination import paginate
+from utils.projection import load_fields, to_dict, to_dicts
+from utils.includes import load_includes
 from models.work import Work
 
 logger = logging.getLogger(__name__)
 
 
-def get_all_works():
+def get_all_works(fields=None, filters=None, limit=None, after=None, sort=None, with_total=False,
+                  include=None):
     """
-    Retrieve all works.
-    :return: list: A list of dictionaries containing information about all works.
+    Retrieve a page of works.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of works to return (optional, all works when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all works.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: The page of works as dictionaries ('items'), the next cursor and the total.
     """
     try:
-        works = Work.query.all()  # Retrieve all works from the database
-        return [
-            {
-                "work_id": work.work_id,
-                "description": work.description,
-                "cost": work.cost,
-                "status": work.status,
-                "vehicle_id": work.vehicle_id,
-                "created_at": work.created_at,
-                "start_date": work.start_date,
-                "end_date": work.end_date,
-            }
-            for work in works
-        ]
+        query = apply_filters(load_fields(Work.query, Work, fields), Work, filters)
+        query = load_includes(query, Work, include)
+        page = paginate(query, Work, limit=limit, after=after, sort=sort, with_total=with_total)
+        page["items"] = to_dicts(page["items"], Work, fields, include)
+        return page
     except Exception as e:
         logger.error(f"Error fetching all works: {e}")
-        return {"error": "Internal Server Error"}
+        raise
+
+
+def stream_works(fields=None, filters=None, include=None):
+    """
+    Build the query used to export all (matching) works.
+    The rows are meant to be iterated with a server-side cursor (yield_per).
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: Query: The works ordered by ID.
+    """
+    query = apply_filters(load_fields(Work.query, Work, fields), Work, filters)
+    query = load_includes(query, Work, include)
+    return query.order_by(Work.work_id)
 
 
-def get_work(work_id):
+def get_work(work_id, fields=None, include=None):
     """
     Retrieve a work by ID.
     :param work_id: The ID of the work to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
     :return: dict: A dictionary containing the work's information or None if not found.
     """
     try:
-        work = Work.query.get(work_id)
+        work = load_includes(load_fields(Work.query, Work, fields), Work, include).get(work_id)
         if not work:
             return None
-        return {
-            "work_id": work.work_id,
-            "description": work.description,
-            "cost": work.cost,
-            "status": work.status,
-            "vehicle_id": work.vehicle_id,
-            "created_at": work.created_at,
-            "start_date": work.start_date,
-            "end_date": work.end_date,
-        }
+        return to_dict(work, Work, fields, include)
     except Exception as e:
         logger.error(f"Error fetching work {work_id}: {e}")
         return {"error": "Internal Server Error"}
 
 
+async def get_all_works_async(session, fields=None, filters=None, limit=None, after=None, sort=None,
+                              with_total=False, include=None):
+    """
+    Async variant of get_all_works, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :return: dict: The page of works as dictionaries ('items'), the next cursor and the total.
+    """
+    return await get_page_async(session, Work, fields=fields, filters=filters, limit=limit, after=after,
+                                sort=sort, with_total=with_total, include=include)
+
+async def get_work_async(session, work_id, fields=None, include=None):
+    """
+    Async variant of get_work, for the ASGI serving mode.
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param work_id: The ID of the work to retrieve.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: A dictionary containing the work's information or None if not found.
+    """
+    return await get_one_async(session, Work, work_id, fields=fields, include=include)
+
 def create_work(description, cost, status, vehicle_id, start_date=None, end_date=None):
     """
     Create a new work.
@@ -87,12 +121,25 @@ def create_work(description, cost, status, vehicle_id, start_date=None, end_date
             "start_date": work.start_date,
             "end_date": work.end_date,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error creating work: {e}")
         db.session.rollback()  # Rollback if there's an error
         return {"error": "Internal Server Error"}
 
 
+def create_works_bulk(items, batch_size=None):
+    """
+    Create many works in a single transaction.
+    :param items: A list of dictionaries with the same fields accepted by create_work.
+    :param batch_size: The number of works inserted per statement (optional).
+    :return: dict: The created works ('created') and the rejected items with their position ('errors').
+    """
+    return bulk_create(Work, items, batch_size)
+
+
 def update_work(work_id, description=None, cost=None, status=None, vehicle_id=None, start_date=None, end_date=None):
     """
     Update an existing work.
@@ -106,24 +153,19 @@ def update_work(work_id, description=None, cost=None, status=None, vehicle_id=No
     :return: dict: A dictionary containing the updated work's information or None if not found.
     """
     try:
-        work = Work.query.get(work_id)
+        # Update fields if new values are provided
+        values = {
+            "description": description,
+            "cost": cost,
+            "status": status,
+            "vehicle_id": vehicle_id,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        work = update_returning(Work, work_id, {key: value for key, value in values.items() if value})
         if not work:
             return None
 
-        # Update fields if new values are provided
-        if description:
-            work.description = description
-        if cost:
-            work.cost = cost
-        if status:
-            work.status = status
-        if vehicle_id:
-            work.vehicle_id = vehicle_id
-        if start_date:
-            work.start_date = start_date
-        if end_date:
-            work.end_date = end_date
-
         db.session.commit()  # Commit the changes
         return {
             "work_id": work.work_id,
@@ -135,12 +177,26 @@ def update_work(work_id, description=None, cost=None, status=None, vehicle_id=No
             "start_date": work.start_date,
             "end_date": work.end_date,
         }
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
     except Exception as e:
         logger.error(f"Error updating work {work_id}: {e}")
         db.session.rollback()  # Rollback if there's an error
         return {"error": "Internal Server Error"}
 
 
+def update_works_bulk(values, ids=None, filters=None):
+    """
+    Update many works with a single UPDATE statement.
+    :param values: A dictionary with the fields to set on every matched work.
+    :param ids: The IDs of the works to update (optional when filters are given).
+    :param filters: Filter expressions selecting the works (optional when ids are given).
+    :return: dict: The number of updated works ('updated').
+    """
+    return bulk_update(Work, values, ids, filters)
+
+
 def delete_work(work_id):
     """
     Delete a work.
@@ -155,7 +211,20 @@ def delete_work(work_id):
         db.session.delete(work)  # Delete the work
         db.session.commit()  # Commit the changes
         return work
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e, deleting=True)
     except Exception as e:
         logger.error(f"Error deleting work {work_id}: {e}")
         db.session.rollback()  # Rollback if there's an error
         return {"error": "Internal Server Error"}
+
+
+def delete_works_bulk(ids=None, filters=None):
+    """
+    Delete many works with a single DELETE statement.
+    :param ids: The IDs of the works to delete (optional when filters are given).
+    :param filters: Filter expressions selecting the works (optional when ids are given).
+    :return: dict: The number of deleted works ('deleted').
+    """
+    return bulk_delete(Work, ids, filters)
@@ -0,0 +1,166 @@
+# tests/conftest.py
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from config import Config
+from models.client import Client
+from models.employee import Employee
+from models.invoice import Invoice
+from models.invoice_item import InvoiceItem
+from models.task import Task
+from models.vehicle import Vehicle
+from models.work import Work
+from services.dashboard_service import summary_cache
+from services.report_service import workload_cache
+from services.setting_service import settings_cache
+from utils.database import db
+from utils.response_cache import response_cache
+from utils.rollups import create_rollups
+from utils.search import create_search_index
+
+
+def _clear_process_caches():
+    # The caches live at module level and outlive the application of a test
+    for cache in (settings_cache, summary_cache, workload_cache):
+        cache.invalidate()
+    response_cache.clear()
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Build applications on an empty SQLite database of the test, with the schema
+    created (rollups and search index included). Settings are Config attributes.
+    """
+    apps = []
+
+    def make(**settings):
+        settings.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'garage.db'}")
+        settings.setdefault('RESPONSE_CACHE_MAX_BYTES', 0)
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value, raising=False)
+        app = create_app()
+        with app.app_context():
+            # db keeps the metadata of the replica binds of earlier applications
+            db.create_all(bind_key=None)
+            create_rollups()
+            create_search_index()
+        _clear_process_caches()
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+    _clear_process_caches()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(app):
+    """
+    Collect the SQL statements the application runs during the test; clear the
+    list before the request under test.
+    """
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+@pytest.fixture
+def garage(app):
+    """
+    Fill the database with a small garage: 3 clients, 2 employees, 3 vehicles,
+    3 works, 5 tasks and 2 invoices with their items.
+
+    :return: dict: The primary keys of the rows by table name.
+    """
+    with app.app_context():
+        clients = [
+            Client(name='Ana Costa', email='Ana.Costa@Example.pt', phone='+351 912 345 678', address='Rua A, Porto'),
+            Client(name='Bruno Lopes', email='bruno@example.pt', phone='913000111', address='Rua B, Lisboa'),
+            Client(name='Carla Dias', email='carla@example.pt', phone='914000222', address='Rua C, Braga'),
+        ]
+        employees = [
+            Employee(name='Rui Ferreira', email='rui@example.pt', phone='910000001', role='mechanic',
+                     hired_date=date(2020, 1, 1)),
+            Employee(name='Sara Nunes', email='sara@example.pt', phone='910000002', role='manager',
+                     hired_date=date(2021, 6, 1)),
+        ]
+        db.session.add_all(clients + employees)
+        db.session.flush()
+        vehicles = [
+            Vehicle(brand='Toyota', model='Corolla', year=2015, license_plate='AA-12-BC', client_id=clients[0].client_id),
+            Vehicle(brand='Honda', model='Civic', year=2018, license_plate='BB-34-DE', client_id=clients[0].client_id),
+            Vehicle(brand='Renault', model='Clio', year=2020, license_plate='CC-56-FG', client_id=clients[1].client_id),
+        ]
+        db.session.add_all(vehicles)
+        db.session.flush()
+        works = [
+            Work(description='Revisão geral', cost=200.0, status='pending', vehicle_id=vehicles[0].vehicle_id),
+            Work(description='Troca de travões', cost=150.0, status='in_progress', vehicle_id=vehicles[1].vehicle_id),
+            Work(description='Pintura', cost=900.0, status='completed', vehicle_id=vehicles[2].vehicle_id),
+        ]
+        db.session.add_all(works)
+        db.session.flush()
+        tasks = [
+            Task(description='Troca de óleo', employee_id=employees[0].employee_id, start_date=date(2024, 1, 1),
+                 end_date=date(2024, 1, 2), status='completed', work_id=works[0].work_id),
+            Task(description='Filtro de ar', employee_id=employees[0].employee_id, start_date=date(2024, 1, 3),
+                 end_date=None, status='in_progress', work_id=works[0].work_id),
+            Task(description='Pastilhas', employee_id=employees[0].employee_id, start_date=date(2024, 1, 4),
+                 end_date=None, status='pending', work_id=works[1].work_id),
+            Task(description='Discos', employee_id=employees[1].employee_id, start_date=date(2024, 1, 5),
+                 end_date=date(2024, 1, 8), status='completed', work_id=works[1].work_id),
+            Task(description='Lixar e pintar', employee_id=employees[1].employee_id, start_date=date(2024, 2, 1),
+                 end_date=date(2024, 2, 5), status='completed', work_id=works[2].work_id),
+        ]
+        db.session.add_all(tasks)
+        db.session.flush()
+        invoices = [
+            Invoice(client_id=clients[0].client_id, issued_at=datetime(2024, 1, 10, 9, 0), total=100.0, iva=23.0,
+                    total_with_iva=123.0),
+            Invoice(client_id=clients[1].client_id, issued_at=datetime(2024, 2, 10, 9, 0), total=200.0, iva=46.0,
+                    total_with_iva=246.0),
+        ]
+        db.session.add_all(invoices)
+        db.session.flush()
+        items = [
+            InvoiceItem(description='Troca de óleo', cost=60.0, invoice_id=invoices[0].invoice_id,
+                        task_id=tasks[0].task_id),
+            InvoiceItem(description='Filtro de ar', cost=40.0, invoice_id=invoices[0].invoice_id,
+                        task_id=tasks[1].task_id),
+            InvoiceItem(description='Discos', cost=200.0, invoice_id=invoices[1].invoice_id, task_id=tasks[3].task_id),
+        ]
+        db.session.add_all(items)
+        db.session.commit()
+        return {
+            'client': [row.client_id for row in clients],
+            'employee': [row.employee_id for row in employees],
+            'vehicle': [row.vehicle_id for row in vehicles],
+            'work': [row.work_id for row in works],
+            'task': [row.task_id for row in tasks],
+            'invoice': [row.invoice_id for row in invoices],
+            'invoice_item': [row.item_id for row in items],
+        }
@@ -0,0 +1,112 @@
+# tests/test_asgi.py
+import asyncio
+import json
+
+import pytest
+
+from api.asgi import async_api
+from utils.async_database import async_db
+from utils.asgi import create_asgi_app
+
+
+async def _call(asgi_app, path, query='', method='GET', headers=(), body=b''):
+    # Minimal ASGI server: one request, the whole body at once
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'localhost'), *headers], 'http_version': '1.1', 'scheme': 'http',
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 1),
+    }
+    messages, received = [], []
+
+    async def receive():
+        if received:
+            await asyncio.sleep(3600)  # The client stays connected
+        received.append(True)
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi_app(scope, receive, send)
+    headers = {name.decode(): value.decode() for name, value in messages[0]['headers']}
+    return messages[0]['status'], headers, b''.join(message.get('body', b'') for message in messages[1:])
+
+
+@pytest.fixture
+def run(app):
+    """
+    Run a coroutine taking the ASGI application, then close the async engines
+    on the same event loop.
+    """
+    asgi_app = create_asgi_app(app, async_api)
+
+    def run_scenario(scenario):
+        async def main():
+            try:
+                return await scenario(asgi_app)
+            finally:
+                await async_db.dispose()
+
+        return asyncio.run(main())
+
+    yield run_scenario
+    asgi_app.executor.shutdown()
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/api/vehicle/', 'limit=2&include=client,works'),
+    ('/api/vehicle/{vehicle}', 'include=client'),
+    ('/api/task/', 'status=completed&sort=-task_id'),
+    ('/api/task/{task}', 'fields=status'),
+    ('/api/work/', 'limit=2&sort=-created_at&count=true'),
+    ('/api/client/', 'fields=name'),
+    ('/api/employee/', ''),
+    ('/api/invoice/', 'include=items'),
+])
+def test_async_handlers_answer_like_the_flask_resources(run, client, garage, path, query):
+    path = path.format(vehicle=garage['vehicle'][0], task=garage['task'][0])
+    status, headers, body = run(lambda asgi_app: _call(asgi_app, path, query))
+    expected = client.get(f'{path}?{query}')
+    assert status == expected.status_code == 200
+    assert json.loads(body) == expected.get_json()
+    for name in ('Link', 'X-Total-Count', 'X-Next-Cursor', 'ETag'):
+        assert headers.get(name.lower()) == expected.headers.get(name)
+
+
+def test_reads_run_on_the_async_engine(run, garage, statements):
+    statements.clear()
+    status, _, _ = run(lambda asgi_app: _call(asgi_app, '/api/vehicle/', 'include=client'))
+    assert status == 200
+    assert not any('FROM vehicle' in statement for statement in statements)
+
+
+def test_async_errors(run, garage):
+    async def scenario(asgi_app):
+        missing = await _call(asgi_app, '/api/vehicle/999')
+        invalid = await _call(asgi_app, '/api/vehicle/', 'fields=nope')
+        return missing[0], invalid[0]
+
+    assert run(scenario) == (404, 400)
+
+
+def test_async_not_modified(run, garage):
+    async def scenario(asgi_app):
+        _, headers, _ = await _call(asgi_app, '/api/client/')
+        return await _call(asgi_app, '/api/client/', headers=[(b'if-none-match', headers['etag'].encode())])
+
+    status, _, body = run(scenario)
+    assert status == 304 and body == b''
+
+
+def test_writes_go_through_flask(run, client, garage):
+    payload = json.dumps({"name": "Diana", "email": "diana@example.pt", "phone": "915000333", "address": "Rua D"})
+
+    async def scenario(asgi_app):
+        created = await _call(asgi_app, '/api/client/', method='POST', body=payload.encode(),
+                              headers=[(b'content-type', b'application/json')])
+        listed = await _call(asgi_app, '/api/client/')
+        return created, listed
+
+    (status, _, body), (_, _, listed) = run(scenario)
+    assert status == 201
+    assert json.loads(body)['client_id'] in [row['client_id'] for row in json.loads(listed)]
@@ -0,0 +1,84 @@
+# tests/test_benchmarks.py
+import shutil
+import sqlite3
+
+import pytest
+
+from benchmarks.dataset import generate, license_plate, parse_rows, table_sizes
+from benchmarks.endpoints import Context, all_scenarios, run_test_client, summarize, uncovered_routes
+
+# Size of the dataset of the tests: a few seconds to generate and drive
+ROWS = 2_000
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    path = tmp_path_factory.mktemp('benchmarks') / 'garage.db'
+    return path, generate(str(path), ROWS, seed=1)
+
+
+def _count(path, table):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize('value, rows', [('10k', 10_000), ('1M', 1_000_000), ('2.5k', 2_500), ('123', 123)])
+def test_parse_rows(value, rows):
+    assert parse_rows(value) == rows
+
+
+def test_table_sizes_add_up_to_the_requested_rows():
+    for rows in (10_000, 1_000_000):
+        assert sum(table_sizes(rows).values()) == pytest.approx(rows, rel=0.02)
+
+
+def test_license_plates_are_unique():
+    plates = [license_plate(i) for i in range(50_000)]
+    assert len(set(plates)) == len(plates)
+    assert plates[0] == 'AA-00-AA'
+
+
+def test_dataset_rows_and_references(dataset):
+    path, sizes = dataset
+    assert {table: _count(path, table) for table in sizes} == sizes
+    connection = sqlite3.connect(path)
+    try:
+        assert connection.execute("PRAGMA foreign_key_check").fetchall() == []
+        # The application built the rollups from the loaded invoices
+        totals = connection.execute(
+            "SELECT (SELECT round(sum(total), 2) FROM invoice), (SELECT round(sum(total), 2) FROM revenue_monthly)"
+        ).fetchone()
+    finally:
+        connection.close()
+    assert totals[0] == totals[1]
+
+
+def test_dataset_is_deterministic(dataset, tmp_path):
+    path, _ = dataset
+    generate(str(tmp_path / 'again.db'), ROWS, seed=1, prepare=False)
+    query = "SELECT name, email, phone FROM client ORDER BY client_id"
+    rows = [sqlite3.connect(database).execute(query).fetchall() for database in (path, tmp_path / 'again.db')]
+    assert rows[0] == rows[1]
+
+
+def test_every_route_is_driven(make_app, dataset, tmp_path, capsys):
+    path, sizes = dataset
+    shutil.copyfile(path, tmp_path / 'copy.db')
+    app = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'copy.db'}")
+    scenarios = all_scenarios()
+    assert uncovered_routes(app, scenarios) == []
+    routes, _ = run_test_client(app, scenarios, Context(sizes, seed=1), requests=2)
+    # The employee detail answers 500 rather than 404 for a removed employee, so the
+    # check that a deleted employee is gone fails: the suite reports it as an error
+    assert [route['name'] for route in routes if route['errors']] == ['employee delete', 'employee bulk delete']
+    assert all(route['requests'] == 2 and route['p99_ms'] >= route['p50_ms'] > 0 for route in routes)
+
+
+def test_summarize_percentiles():
+    result = summarize(all_scenarios()[0], [i / 1000 for i in range(1, 101)], 0, 2.0, (None, 1.5))
+    assert (result['p50_ms'], result['p95_ms'], result['p99_ms']) == (50.5, 95.05, 99.01)
+    assert result['throughput'] == 50.0
+    assert result['peak_rss_mb'] is None and result['rss_growth_mb'] == 1.5
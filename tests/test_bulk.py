@@ -0,0 +1,74 @@
+# tests/test_bulk.py
+import pytest
+
+
+def _client(i, **values):
+    return {"name": f"Bulk {i}", "email": f"bulk{i}@example.pt", "phone": "912000000", "address": "Porto", **values}
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 500])
+def test_bulk_create(client, batch_size):
+    response = client.post(f'/api/client/bulk?batch_size={batch_size}', json=[_client(i) for i in range(5)])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['errors'] == []
+    assert [row['name'] for row in body['created']] == [f"Bulk {i}" for i in range(5)]
+    assert all(row['client_id'] and row['created_at'] for row in body['created'])
+    assert len(client.get('/api/client/').get_json()) == 5
+
+
+@pytest.mark.parametrize('batch_size', [1, 3, 500])
+def test_bulk_create_rejects_only_the_invalid_items(client, batch_size):
+    items = [
+        _client(0),
+        _client(1, phone=None),  # Mandatory field missing
+        'not an object',
+        _client(3),
+        _client(0, email='other@example.pt'),  # Duplicate name, rejected by the database
+        _client(5),
+    ]
+    response = client.post(f'/api/client/bulk?batch_size={batch_size}', json=items)
+    assert response.status_code == 207
+    body = response.get_json()
+    assert [row['name'] for row in body['created']] == ['Bulk 0', 'Bulk 3', 'Bulk 5']
+    assert [error['index'] for error in body['errors']] == [1, 2, 4]
+    assert "Missing mandatory field 'phone'" in body['errors'][0]['message']
+    assert 'UNIQUE' in body['errors'][2]['message']
+    assert len(client.get('/api/client/').get_json()) == 3
+
+
+def test_bulk_create_expects_a_list(client):
+    assert client.post('/api/client/bulk', json=_client(0)).status_code == 400
+    assert client.post('/api/client/bulk?batch_size=0', json=[_client(0)]).status_code == 400
+
+
+def test_bulk_update(client, garage):
+    response = client.patch('/api/task/bulk?status=pending', json={"values": {"status": "in_progress"}})
+    assert response.get_json() == {"updated": 1}
+    statuses = [row['status'] for row in client.get('/api/task/').get_json()]
+    assert statuses == ['completed', 'in_progress', 'in_progress', 'completed', 'completed']
+    response = client.patch('/api/task/bulk', json={"ids": garage['task'][:2], "values": {"end_date": "2024-03-01"}})
+    assert response.get_json() == {"updated": 2}
+
+
+@pytest.mark.parametrize('payload', [
+    {"values": {"status": "done"}},  # Neither ids nor filters
+    {"ids": [1], "values": {"task_id": 9}},  # Primary key
+    {"ids": [1], "values": {"description": None}},
+    {"ids": ["1"], "values": {"status": "done"}},
+])
+def test_bulk_update_rejects_invalid_requests(client, garage, payload):
+    assert client.patch('/api/task/bulk', json=payload).status_code == 400
+
+
+def test_bulk_delete_cascades_to_the_items(client, garage):
+    response = client.delete('/api/invoice/bulk', json={"ids": garage['invoice'][:1]})
+    assert response.get_json() == {"deleted": 1}
+    assert [row['invoice_id'] for row in client.get('/api/invoice_item/').get_json()] == garage['invoice'][1:]
+
+
+def test_bulk_delete_of_referenced_rows_is_a_conflict(client, garage):
+    response = client.delete('/api/client/bulk', json={"ids": garage['client']})
+    assert response.status_code == 409
+    assert 'referenced by' in response.get_json()['message']
+    assert len(client.get('/api/client/').get_json()) == 3
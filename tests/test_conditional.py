@@ -0,0 +1,53 @@
+# tests/test_conditional.py
+from sqlalchemy import text
+
+from utils.database import db
+from utils.versioning import get_versions
+
+
+def test_not_modified_without_reading_the_rows(client, garage, statements):
+    response = client.get('/api/client/?limit=2')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+    statements.clear()
+    response = client.get('/api/client/?limit=2', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert not any('FROM client' in statement for statement in statements)
+
+
+def test_etag_depends_on_the_representation(client, garage):
+    etag = client.get('/api/client/').headers['ETag']
+    assert client.get('/api/client/?fields=name').headers['ETag'] != etag
+    assert client.get(f"/api/client/{garage['client'][0]}").headers['ETag'] != etag
+
+
+def test_writes_change_the_etag(client, garage):
+    path = f"/api/vehicle/{garage['vehicle'][0]}"
+    etag = client.get(path).headers['ETag']
+    client.patch('/api/vehicle/bulk', json={"ids": [garage['vehicle'][1]], "values": {"year": 2019}})
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_include_depends_on_the_included_tables(client, garage):
+    path = f"/api/vehicle/{garage['vehicle'][0]}?include=client"
+    etag = client.get(path).headers['ETag']
+    client.put(f"/api/client/{garage['client'][0]}", json={
+        "name": "Ana Costa", "email": "ana@example.pt", "phone": "912345678", "address": "Rua A, Porto"})
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_versions_are_bumped_once_per_commit(app, client, garage):
+    with app.app_context():
+        before = get_versions(['client', 'invoice', 'revenue_monthly'])
+    client.post('/api/client/bulk', json=[
+        {"name": f"Bulk {i}", "email": f"b{i}@example.pt", "phone": "912000000", "address": "Porto"} for i in range(10)
+    ])
+    response = client.post('/api/invoice/', json={"client_id": garage['client'][0], "issued_at": "2024-03-01 10:00:00",
+                                                  "total": 10.0, "iva": 2.3, "total_with_iva": 12.3})
+    assert response.status_code == 201
+    with app.app_context():
+        after = get_versions(['client', 'invoice', 'revenue_monthly'])
+        triggers = db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+    assert {name: after[name] - before[name] for name in after} == {'client': 1, 'invoice': 1, 'revenue_monthly': 1}
+    assert not [name for name in triggers if '_version_' in name]
@@ -0,0 +1,38 @@
+# tests/test_dashboard.py
+from datetime import datetime
+
+
+def _summary_queries(statements):
+    return [statement for statement in statements if 'UNION ALL' in statement]
+
+
+def test_summary_figures(client, garage):
+    issued_at = datetime.now().replace(microsecond=0)
+    client.post('/api/invoice/', json={"client_id": garage['client'][2], "issued_at": f"{issued_at:%Y-%m-%d %H:%M:%S}",
+                                       "total": 50.0, "iva": 11.5, "total_with_iva": 61.5})
+    summary = client.get('/api/dashboard/summary').get_json()
+    assert summary['month'] == f"{issued_at:%Y-%m}"
+    assert summary['clients'] == 3
+    assert summary['open_works'] == 2
+    assert sorted((row['status'], row['count']) for row in summary['works_by_status']) == [
+        ('in_progress', 1), ('pending', 1)]
+    assert [(row['name'], row['count']) for row in summary['tasks_in_progress']] == [('Rui Ferreira', 1)]
+    assert summary['revenue'] == 50.0
+    assert summary['revenue_with_iva'] == 61.5
+
+
+def test_summary_is_one_query_and_cached(client, garage, statements):
+    statements.clear()
+    client.get('/api/dashboard/summary')
+    assert len(_summary_queries(statements)) == 1
+    statements.clear()
+    client.get('/api/dashboard/summary')
+    assert _summary_queries(statements) == []
+
+
+def test_write_refreshes_the_summary_after_the_ttl(app, client, garage):
+    app.config['DASHBOARD_CACHE_TTL'] = 0
+    client.get('/api/dashboard/summary')
+    client.put(f"/api/work/{garage['work'][2]}", json={"description": "Pintura", "cost": 900.0,
+                                                       "status": "pending", "vehicle_id": garage['vehicle'][2]})
+    assert client.get('/api/dashboard/summary').get_json()['open_works'] == 3
@@ -0,0 +1,70 @@
+# tests/test_database.py
+import pytest
+from sqlalchemy import text
+
+from utils.database import ReadOnlySession, db, engine_options
+
+
+def _pragmas(app, *names):
+    with app.app_context():
+        with db.engine.connect() as connection:
+            return [connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names]
+
+
+def test_engine_profile(app):
+    assert _pragmas(app, 'journal_mode', 'synchronous', 'foreign_keys', 'busy_timeout', 'cache_size') == [
+        'wal', 1, 1, 5000, -65536]
+    with app.app_context():
+        assert db.engine.pool.size() == app.config['DB_POOL_SIZE']
+
+
+def test_empty_pragma_keeps_the_sqlite_default(make_app):
+    assert _pragmas(make_app(SQLITE_JOURNAL_MODE='', SQLITE_SYNCHRONOUS=' '), 'journal_mode', 'synchronous') == [
+        'delete', 2]
+
+
+def test_database_in_memory_keeps_its_single_connection():
+    assert engine_options({"SQLALCHEMY_DATABASE_URI": 'sqlite://'}) == {}
+
+
+def test_reads_take_no_write_lock(client, garage, statements):
+    statements.clear()
+    client.get('/api/client/')
+    assert 'BEGIN' in statements and 'BEGIN IMMEDIATE' not in statements
+    statements.clear()
+    client.post('/api/client/', json={"name": "Diana", "email": "diana@example.pt", "phone": "915000333",
+                                      "address": "Rua D"})
+    assert statements[0] == 'BEGIN IMMEDIATE'
+
+
+def test_get_requests_use_read_only_sessions(app, garage):
+    with app.test_request_context('/api/client/'):
+        app.preprocess_request()
+        session = db.session()
+        assert isinstance(session, ReadOnlySession)
+        assert not session.autoflush
+        with pytest.raises(RuntimeError):
+            session.commit()
+
+
+def test_read_only_sessions_can_be_disabled(make_app):
+    app = make_app(READ_ONLY_GET_SESSIONS=False)
+    with app.test_request_context('/api/client/'):
+        app.preprocess_request()
+        assert not isinstance(db.session(), ReadOnlySession)
+
+
+@pytest.mark.parametrize('path', ['/api/client/{client}', '/api/employee/{employee}', '/api/vehicle/{vehicle}'])
+def test_deleting_a_referenced_row_is_a_conflict(client, garage, path):
+    response = client.delete(path.format(client=garage['client'][0], employee=garage['employee'][0],
+                                         vehicle=garage['vehicle'][0]))
+    assert response.status_code == 409
+    assert response.get_json()['message'].startswith('The row is still referenced by')
+
+
+def test_foreign_keys_are_enforced(app, garage):
+    with app.app_context():
+        with pytest.raises(Exception, match='FOREIGN KEY'):
+            db.session.execute(text("UPDATE vehicle SET client_id = 999 WHERE vehicle_id = :id"),
+                               {"id": garage['vehicle'][0]})
+        db.session.rollback()
@@ -0,0 +1,68 @@
+# tests/test_filters.py
+from datetime import date
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from models.task import Task
+from utils.filters import Filter, parse_filters
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+def test_operators_and_type_coercion(app_context):
+    args = MultiDict([('status', 'pending'), ('start_date[gte]', '2024-01-03'), ('end_date[null]', 'true')])
+    assert parse_filters(Task, args) == [
+        Filter('status', 'eq', 'pending'),
+        Filter('start_date', 'gte', date(2024, 1, 3)),
+        Filter('end_date', 'null', True),
+    ]
+
+
+def test_repeated_equality_and_in_lists(app_context):
+    assert parse_filters(Task, MultiDict([('status', 'pending'), ('status', 'completed')])) == [
+        Filter('status', 'in', ['pending', 'completed']),
+    ]
+    assert parse_filters(Task, MultiDict([('task_id[in]', '1,2,3')])) == [Filter('task_id', 'in', [1, 2, 3])]
+
+
+def test_reserved_arguments_are_not_filters(app_context):
+    assert parse_filters(Task, MultiDict([('limit', '5'), ('status', 'pending')]), reserved=['limit']) == [
+        Filter('status', 'eq', 'pending'),
+    ]
+
+
+@pytest.mark.parametrize('key, value, message', [
+    ('password', 'x', "Unknown filter 'password'"),
+    ('status[like]', 'x', "Unknown operator 'like'"),
+    ('task_id', 'one', "Invalid value for filter 'task_id'"),
+    ('start_date[gt]', '2024-13-01', "Invalid value for filter 'start_date[gt]'"),
+])
+def test_invalid_filters(app_context, key, value, message):
+    with pytest.raises(ValueError, match=message.replace('[', r'\[').replace(']', r'\]')):
+        parse_filters(Task, MultiDict([(key, value)]))
+
+
+def test_filtered_collection(client, garage):
+    response = client.get('/api/task/?status=completed&start_date[lt]=2024-02-01')
+    assert [row['task_id'] for row in response.get_json()] == [garage['task'][0], garage['task'][3]]
+    response = client.get('/api/task/?end_date[null]=true')
+    assert [row['status'] for row in response.get_json()] == ['in_progress', 'pending']
+
+
+def test_invalid_filter_is_a_bad_request(client, garage):
+    response = client.get('/api/task/?colour=red')
+    assert response.status_code == 400
+    assert "Unknown filter 'colour'" in response.get_json()['errors']['filters']
+
+
+def test_unindexed_filter_policy(make_app):
+    client = make_app(FILTER_UNINDEXED='reject').test_client()
+    assert client.get('/api/task/?status=pending').status_code == 200
+    response = client.get('/api/task/?description=Discos')
+    assert response.status_code == 400
+    assert 'No index supports filtering task by description' in response.get_json()['errors']['filters']
@@ -0,0 +1,53 @@
+# tests/test_includes.py
+import pytest
+
+from models.work import Work
+from utils.includes import included_tables, parse_includes
+
+
+def _queries(statements):
+    # The SELECTs of the rows, without the version reads of the ETag
+    return [statement for statement in statements if statement.startswith('SELECT') and 'table_version' not in statement]
+
+
+def test_parse_includes_builds_a_tree():
+    tree = parse_includes(Work, 'vehicle.client, tasks.employee,tasks')
+    assert tree == {'vehicle': {'client': {}}, 'tasks': {'employee': {}}}
+    assert included_tables(Work, tree) == ['vehicle', 'client', 'task', 'employee']
+
+
+@pytest.mark.parametrize('value', ['owner', 'vehicle.owner', 'tasks.employee.tasks.work'])
+def test_invalid_includes(value):
+    with pytest.raises(ValueError):
+        parse_includes(Work, value)
+
+
+def test_related_rows_are_embedded(client, garage):
+    work = client.get(f"/api/work/{garage['work'][1]}?include=vehicle.client,tasks.employee").get_json()
+    assert work['vehicle']['license_plate'] == 'BB-34-DE'
+    assert work['vehicle']['client']['name'] == 'Ana Costa'
+    assert [task['employee']['name'] for task in work['tasks']] == ['Rui Ferreira', 'Sara Nunes']
+
+
+def test_empty_collection_is_a_list(client, garage):
+    tasks = client.get('/api/task/?include=invoice_items').get_json()
+    assert [len(task['invoice_items']) for task in tasks] == [1, 1, 0, 1, 0]
+
+
+def test_unknown_include_is_rejected(client, garage):
+    assert client.get('/api/work/?include=owner').status_code == 400
+
+
+def test_query_count_does_not_depend_on_the_rows(client, garage, statements):
+    path = '/api/work/?include=vehicle.client,tasks.employee'
+    statements.clear()
+    assert len(client.get(path).get_json()) == 3
+    queries = len(_queries(statements))
+
+    client.post('/api/work/bulk', json=[
+        {"description": f"Work {i}", "cost": 10.0, "status": "pending", "vehicle_id": garage['vehicle'][i % 3]}
+        for i in range(20)
+    ])
+    statements.clear()
+    assert len(client.get(path).get_json()) == 23
+    assert len(_queries(statements)) == queries
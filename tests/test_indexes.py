@@ -0,0 +1,61 @@
+# tests/test_indexes.py
+import logging
+
+import pytest
+
+from models.invoice import Invoice
+from models.task import Task
+from models.work import Work
+from utils.database import db
+from utils.filters import Filter, check_indexed, index_orders, serves_order
+from utils.index_advisor import advise, capture_statements, is_full_scan
+
+
+def test_indexes_end_in_the_primary_key():
+    assert ['status', 'task_id'] in index_orders(Task)
+    assert ['employee_id', 'task_id'] in index_orders(Task)
+    assert ['client_id', 'invoice_id'] in index_orders(Invoice)
+
+
+@pytest.mark.parametrize('filters, key, served', [
+    ([Filter('employee_id', 'eq', 1)], 'task_id', True),
+    ([Filter('status', 'eq', 'pending')], 'task_id', True),
+    ([Filter('status', 'eq', 'pending')], 'status', True),
+    ([Filter('status', 'eq', 'pending')], 'created_at', False),
+    ([Filter('employee_id', 'eq', 1), Filter('status', 'eq', 'pending')], 'task_id', False),
+    ([Filter('start_date', 'gte', '2024-01-01')], 'created_at', True),
+])
+def test_serves_order(filters, key, served):
+    assert serves_order(Task, filters, key) is served
+
+
+def test_check_indexed_flags_a_sort_no_index_serves(app, caplog):
+    with app.app_context(), caplog.at_level(logging.WARNING, logger='utils.filters'):
+        check_indexed(Task, ['task_id'], 'sorting', [Filter('status', 'eq', 'pending')])
+        assert not caplog.records
+        check_indexed(Task, ['created_at'], 'sorting', [Filter('status', 'eq', 'pending')])
+    assert 'rows filtered by status in created_at order' in caplog.text
+
+
+@pytest.mark.parametrize('detail, reported', [
+    ('SCAN task', True),
+    ('USE TEMP B-TREE FOR ORDER BY', True),
+    ('SEARCH task USING INDEX ix_task_status (status=?)', False),
+    ('SCAN task USING COVERING INDEX ix_task_employee_id_status_dates', False),
+    ('SCAN search_index VIRTUAL TABLE INDEX 0:M3', False),
+])
+def test_is_full_scan(detail, reported):
+    assert is_full_scan(detail, {'task', 'search_index'}) is reported
+
+
+def test_advisor_follows_the_next_page(app, garage):
+    with app.app_context():
+        statements = capture_statements(app, ['/api/task/?limit=2'])
+    assert {path for _, path in statements.values()} == {'/api/task/?limit=2', '/api/task/?limit=2 (next page)'}
+
+
+def test_filtered_pages_are_read_in_index_order(app, garage):
+    with app.app_context(), db.engine.connect() as connection:
+        findings = advise(app, connection, [Task, Work, Invoice])
+    filtered = [(path, plan) for path, _, plan in findings if any(f"{name}=" in path for name in ('_id', 'status'))]
+    assert filtered == []
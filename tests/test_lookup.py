@@ -0,0 +1,68 @@
+# tests/test_lookup.py
+import pytest
+from sqlalchemy import text
+
+from models.vehicle import Vehicle
+from utils.database import db
+from utils.lookup import normalize_email, normalize_phone, normalize_plate, plate_key, prefix_range
+
+
+@pytest.mark.parametrize('plate', ['AA-12-BC', 'aa12bc', 'AA 12 BC', ' aa.12.bc '])
+def test_normalize_plate(plate):
+    assert normalize_plate(plate) == 'AA12BC'
+
+
+def test_normalize_phone_and_email():
+    assert normalize_phone('(+351) 912-345 678') == '351912345678'
+    assert normalize_email('  Ana.Costa@Example.PT ') == 'ana.costa@example.pt'
+
+
+@pytest.mark.parametrize('query', ['plate=aa12bc', 'plate=AA%2012%20BC', 'plate=aa-12-bc'])
+def test_plate_lookup_ignores_case_and_separators(client, garage, query):
+    vehicles = client.get(f'/api/lookup/?{query}').get_json()['vehicles']
+    assert [vehicle['vehicle_id'] for vehicle in vehicles] == [garage['vehicle'][0]]
+    assert vehicles[0]['client']['name'] == 'Ana Costa'
+
+
+def test_client_lookups(client, garage):
+    # The stored values keep their original format
+    assert client.get('/api/lookup/?email=ana.costa@example.pt').get_json()['clients'][0]['email'] == \
+        'Ana.Costa@Example.pt'
+    assert client.get('/api/lookup/?phone=%2B351912345678').get_json()['clients'][0]['client_id'] == \
+        garage['client'][0]
+    assert client.get('/api/lookup/?phone=912345678').get_json()['clients'] == []
+
+
+def test_prefix_lookup(client, garage):
+    vehicles = client.get('/api/lookup/?plate=aa-1&prefix=true').get_json()['vehicles']
+    assert [vehicle['license_plate'] for vehicle in vehicles] == ['AA-12-BC']
+    clients = client.get('/api/lookup/?phone=91&prefix=true').get_json()['clients']
+    assert [row['name'] for row in clients] == ['Bruno Lopes', 'Carla Dias']
+
+
+@pytest.mark.parametrize('query', ['', 'plate=aa&email=a@b.pt', 'plate=--'])
+def test_invalid_lookups(client, garage, query):
+    assert client.get(f'/api/lookup/?{query}').status_code == 400
+
+
+def test_lookups_use_the_expression_index(app):
+    with app.app_context():
+        indexed = plate_key(Vehicle.license_plate)
+        for condition in (indexed == 'AA12BC', prefix_range(indexed, 'AA1')):
+            statement = db.select(Vehicle).where(condition).compile(
+                db.engine, compile_kwargs={"literal_binds": True})
+            plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}")).all()
+            assert 'USING INDEX ix_vehicle_plate_key' in plan[0].detail
+
+
+def test_plate_batch(client, garage):
+    response = client.post('/api/lookup/plates', json={"plates": ['cc56fg', 'ZZ-99-ZZ', 'aa 12 bc', 'CC-56-FG']})
+    results = response.get_json()
+    assert [row['normalized'] for row in results] == ['CC56FG', 'ZZ99ZZ', 'AA12BC', 'CC56FG']
+    assert [[vehicle['vehicle_id'] for vehicle in row['vehicles']] for row in results] == [
+        [garage['vehicle'][2]], [], [garage['vehicle'][0]], [garage['vehicle'][2]]]
+
+
+def test_plate_batch_limit(app, client, garage):
+    app.config['LOOKUP_MAX_PLATES'] = 2
+    assert client.post('/api/lookup/plates', json={"plates": ['a', 'b', 'c']}).status_code == 413
@@ -0,0 +1,78 @@
+# tests/test_metrics.py
+import re
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.metrics import CONTENT_TYPE, MetricsRegistry, _observe_statement
+from utils.timing import _before_cursor_execute, statement_listeners
+
+
+def _sample(text, name, **labels):
+    # Value of a sample of the Prometheus text format, 0 when absent
+    pattern = re.escape(name) + (r'\{' + ','.join(f'{key}="{re.escape(value)}"' for key, value in labels.items())
+                                 + r'\}' if labels else '') + r' (\S+)\n'
+    match = re.search(pattern, text)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_counters_of_every_thread_are_summed():
+    registry = MetricsRegistry()
+    registry.counter('jobs_total', 'Jobs.', labels=('kind',))
+
+    def work():
+        for _ in range(1000):
+            registry.inc('jobs_total', ('a',))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.inc('jobs_total', ('b"c',))
+    text = registry.render()
+    assert _sample(text, 'jobs_total', kind='a') == 4000
+    assert 'jobs_total{kind="b\\"c"} 1' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        registry.observe('latency_seconds', (), value)
+    text = registry.render()
+    assert [_sample(text, 'latency_seconds_bucket', le=le) for le in ('0.1', '1.0', '+Inf')] == [2, 3, 4]
+    assert _sample(text, 'latency_seconds_sum') == 3.65
+    assert _sample(text, 'latency_seconds_count') == 4
+
+
+def test_requests_and_statements_are_measured(client, garage):
+    before = client.get('/metrics').get_data(as_text=True)
+    client.get('/api/client/')
+    client.get(f"/api/vehicle/{garage['vehicle'][0]}")
+    response = client.get('/metrics')
+    assert response.content_type == CONTENT_TYPE
+    after = response.get_data(as_text=True)
+
+    def delta(name, **labels):
+        return _sample(after, name, **labels) - _sample(before, name, **labels)
+
+    assert delta('http_requests_total', namespace='client', method='GET', route='/api/client/', status='200') == 1
+    assert delta('http_request_duration_seconds_count', namespace='vehicle', method='GET',
+                 route='/api/vehicle/<int:vehicle_id>') == 1
+    assert delta('db_statement_duration_seconds_count', operation='SELECT') >= 2
+    # Only the scrape itself is in flight
+    assert _sample(after, 'http_requests_in_flight', method='GET') == 1
+    assert _sample(after, 'db_pool_size', engine='default') > 0
+
+
+def test_statements_are_timed_by_a_single_hook(make_app):
+    make_app()
+    make_app()
+    assert statement_listeners.count(_observe_statement) == 1
+    assert event.contains(Engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def test_metrics_can_be_disabled(make_app):
+    assert make_app(METRICS_ENABLED=False).test_client().get('/metrics').status_code == 404
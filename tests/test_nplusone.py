@@ -0,0 +1,77 @@
+# tests/test_nplusone.py
+import logging
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from models.task import Task
+from models.work import Work
+from utils.database import db
+from utils.nplusone import NPlusOneError, _raise_on_lazy_load, normalize_statement, suspend_tracking, track_queries
+
+
+def _load_tasks_lazily():
+    # One SELECT of the tasks per work
+    return [len(work.tasks) for work in db.session.execute(db.select(Work)).scalars()]
+
+
+@pytest.fixture
+def strict_app(make_app):
+    """
+    Application with STRICT_RELATIONSHIPS; the Session listener it installs is
+    process wide, so it is removed after the test.
+    """
+    yield make_app(STRICT_RELATIONSHIPS=True)
+    event.remove(Session, "do_orm_execute", _raise_on_lazy_load)
+
+
+def test_normalize_statement():
+    assert normalize_statement('SELECT *\n  FROM task WHERE task_id IN (?, ?,?)') == \
+        normalize_statement('SELECT * FROM task WHERE task_id IN (?)') == 'SELECT * FROM task WHERE task_id IN (?)'
+
+
+def test_repeated_statement_raises(app, garage):
+    with app.app_context(), pytest.raises(NPlusOneError, match='ran 3 times'):
+        with track_queries('raise', threshold=2):
+            _load_tasks_lazily()
+
+
+def test_repeated_statement_is_logged_with_its_stack(app, garage, caplog):
+    with app.app_context(), track_queries('log', threshold=2) as counts:
+        assert _load_tasks_lazily() == [2, 2, 1]
+    assert max(counts.values()) == 3
+    assert 'Possible N+1 query' in caplog.text
+    assert '_load_tasks_lazily' in caplog.text
+
+
+def test_suspended_statements_are_not_counted(app, garage):
+    with app.app_context(), track_queries('raise', threshold=2) as counts:
+        with suspend_tracking():
+            _load_tasks_lazily()
+    assert counts == {}
+
+
+def test_requests_are_tracked(make_app, garage):
+    client = make_app(NPLUSONE_MODE='raise', NPLUSONE_THRESHOLD=2).test_client()
+    assert client.get('/api/work/?include=vehicle.client,tasks.employee').status_code == 200
+    # The rows of a failed batch are retried one by one on purpose
+    items = [{"name": f"Bulk {i}", "email": f"bulk{i}@example.pt", "phone": "912000000", "address": "Porto"}
+             for i in range(6)] + [{"name": "Ana Costa", "email": "ana2@example.pt", "phone": "1", "address": "x"}]
+    assert client.post('/api/client/bulk', json=items).status_code == 207
+
+
+def test_unknown_mode(make_app):
+    with pytest.raises(ValueError):
+        make_app(NPLUSONE_MODE='loud')
+
+
+def test_strict_relationships(strict_app, garage):
+    with strict_app.app_context():
+        task = db.session.execute(db.select(Task)).scalars().first()
+        with pytest.raises(InvalidRequestError):
+            task.work
+        work = db.session.execute(db.select(Work).options(db.selectinload(Work.tasks))).scalars().first()
+        assert len(work.tasks) == 2
+    assert strict_app.test_client().get('/api/task/?include=employee,work').status_code == 200
@@ -0,0 +1,77 @@
+# tests/test_pagination.py
+import pytest
+
+from models.client import Client
+from models.task import Task
+from utils.pagination import decode_cursor, encode_cursor, sort_keys
+
+
+def _walk(client, path):
+    # Follow the X-Next-Cursor headers from the first page to the last one
+    pages, url = [], path
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([row[next(iter(row))] for row in response.get_json()])
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f"{path}&after={cursor}" if cursor else None
+    return pages
+
+
+def test_cursor_round_trip():
+    token = encode_cursor('-issued_at', ['2024-01-10 09:00:00', 7])
+    assert '=' not in token
+    assert decode_cursor(token) == {"sort": '-issued_at', "values": ['2024-01-10 09:00:00', 7]}
+
+
+@pytest.mark.parametrize('token', ['not-a-cursor', 'e30', '!!!'])
+def test_invalid_cursor(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def test_sort_keys_skip_nullable_columns():
+    keys = sort_keys(Task)
+    assert keys[:2] == ['task_id', 'created_at']
+    assert 'end_date' not in keys
+    assert 'created_at' in sort_keys(Client)
+
+
+def test_pages_cover_the_collection_once(client, garage):
+    pages = _walk(client, '/api/task/?limit=2')
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [ident for page in pages for ident in page] == garage['task']
+
+
+def test_descending_sort(client, garage):
+    pages = _walk(client, '/api/task/?limit=2&sort=-task_id')
+    assert [ident for page in pages for ident in page] == garage['task'][::-1]
+
+
+def test_sort_by_created_at(client, garage):
+    # Every row has the same timestamp: the primary key breaks the ties
+    pages = _walk(client, '/api/work/?limit=2&sort=-created_at')
+    assert [ident for page in pages for ident in page] == garage['work'][::-1]
+
+
+def test_link_and_total_headers(client, garage):
+    response = client.get('/api/client/?limit=2&count=true')
+    assert response.headers['X-Total-Count'] == '3'
+    assert response.headers['Link'].endswith('rel="next"')
+    assert f"after={response.headers['X-Next-Cursor']}" in response.headers['Link']
+
+
+def test_last_page_has_no_cursor(client, garage):
+    response = client.get('/api/client/?limit=3')
+    assert len(response.get_json()) == 3
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_cursor_of_another_sort_is_rejected(client, garage):
+    cursor = client.get('/api/client/?limit=1').headers['X-Next-Cursor']
+    assert client.get(f'/api/client/?limit=1&sort=-client_id&after={cursor}').status_code == 400
+
+
+@pytest.mark.parametrize('query', ['after=garbage', 'limit=0', 'sort=end_date'])
+def test_invalid_arguments(client, garage, query):
+    assert client.get(f'/api/task/?{query}').status_code == 400
@@ -0,0 +1,28 @@
+# tests/test_projection.py
+from models.client import Client
+from utils.projection import column_names
+
+
+def test_column_names_keep_the_primary_key():
+    assert column_names(Client, ['email', 'name']) == ['client_id', 'name', 'email']
+    assert column_names(Client) == [column.name for column in Client.__table__.columns]
+
+
+def test_list_selects_the_requested_columns_only(client, garage, statements):
+    statements.clear()
+    response = client.get('/api/client/?fields=name&limit=10')
+    assert response.get_json() == [{'name': 'Ana Costa'}, {'name': 'Bruno Lopes'}, {'name': 'Carla Dias'}]
+    select = next(statement for statement in statements if statement.startswith('SELECT') and 'FROM client' in statement)
+    assert 'client.name' in select
+    assert 'client.email' not in select and 'client.address' not in select
+
+
+def test_detail_fields(client, garage):
+    response = client.get(f"/api/vehicle/{garage['vehicle'][0]}?fields=license_plate,year")
+    assert response.get_json() == {'year': 2015, 'license_plate': 'AA-12-BC'}
+
+
+def test_unknown_field_is_rejected(client, garage):
+    response = client.get('/api/client/?fields=name,password')
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['errors']['fields']
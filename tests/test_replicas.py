@@ -0,0 +1,95 @@
+# tests/test_replicas.py
+import sqlite3
+import time
+
+import pytest
+
+from utils.replicas import CONSISTENCY_HEADER, format_token, get_replica_set, parse_token, sync_replicas
+
+NEW_CLIENT = {"name": "Diana", "email": "diana@example.pt", "phone": "915000333", "address": "Rua D"}
+
+
+@pytest.fixture
+def replica_path(tmp_path):
+    return tmp_path / 'replica.db'
+
+
+@pytest.fixture
+def app(make_app, replica_path):
+    # Lag checked on every request, so the tests do not wait for the interval
+    return make_app(DATABASE_REPLICA_URIS=[f"sqlite:///{replica_path}"], REPLICA_LAG_CHECK_INTERVAL=0)
+
+
+def _sync(app, replica_path, client_id):
+    # Copy the primary to the replica, then rename a client in the replica only, to
+    # tell the reads of the replica from the reads of the primary
+    with app.app_context():
+        sync_replicas()
+    connection = sqlite3.connect(replica_path)
+    connection.execute("UPDATE client SET name = 'Replica' WHERE client_id = ?", (client_id,))
+    connection.commit()
+    connection.close()
+
+
+@pytest.fixture
+def synced(app, garage, replica_path):
+    _sync(app, replica_path, garage['client'][0])
+    return garage
+
+
+def _name(client, garage, **headers):
+    return client.get(f"/api/client/{garage['client'][0]}", headers=headers).get_json()['name']
+
+
+def test_token_round_trip():
+    assert parse_token('client:3, task:x,vehicle:2,client:5,garbage') == {'client': 5, 'vehicle': 2}
+    assert format_token({'vehicle': 2, 'client': 5}) == 'client:5,vehicle:2'
+    assert parse_token(None) == {}
+
+
+def test_reads_go_to_the_replica(client, synced):
+    assert _name(client, synced) == 'Replica'
+    # Writes always go to the primary
+    assert client.post('/api/client/', json=NEW_CLIENT).status_code == 201
+
+
+def test_read_after_write(app, client, synced, replica_path):
+    response = client.post('/api/client/', json=NEW_CLIENT)
+    token = response.headers[CONSISTENCY_HEADER]
+    assert parse_token(token)['client'] > 0
+    new_path = f"/api/client/{response.get_json()['client_id']}"
+
+    # The writer (cookie) and whoever holds the token read from the primary
+    assert client.get(new_path).status_code == 200
+    assert _name(client, synced) == 'Ana Costa'
+    other = app.test_client()
+    assert other.get(new_path, headers={CONSISTENCY_HEADER: token}).status_code == 200
+    # Without the token the replica still serves, without the new row
+    assert other.get(new_path).status_code == 404
+
+    # Once the replica has the write, the token no longer keeps the reads on the primary
+    _sync(app, replica_path, synced['client'][0])
+    assert other.get(new_path).status_code == 200
+    assert _name(other, synced, **{CONSISTENCY_HEADER: token}) == 'Replica'
+
+
+def test_lagging_replica_is_not_read(make_app, replica_path, garage):
+    app = make_app(DATABASE_REPLICA_URIS=[f"sqlite:///{replica_path}"], REPLICA_LAG_CHECK_INTERVAL=0,
+                   REPLICA_MAX_LAG=0.2)
+    client = app.test_client()
+    with app.app_context():
+        sync_replicas()
+    client.post('/api/client/', json=NEW_CLIENT)
+    other = app.test_client()
+    assert len(other.get('/api/client/').get_json()) == 3
+    time.sleep(0.3)
+    assert len(other.get('/api/client/').get_json()) == 4
+    with app.app_context():
+        assert get_replica_set().stats()['replica0']['lag'] > 0.2
+
+
+def test_unavailable_replica(app, client, garage):
+    # The replica was never synced: it has no tables to read the versions from
+    assert len(client.get('/api/client/').get_json()) == 3
+    with app.app_context():
+        assert get_replica_set().stats()['replica0']['available'] is False
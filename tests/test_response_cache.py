@@ -0,0 +1,66 @@
+# tests/test_response_cache.py
+import pytest
+
+from utils.response_cache import ResponseCache, response_cache
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(RESPONSE_CACHE_MAX_BYTES=1024 * 1024)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_bytes=30)
+    cache.set('a', ['client'], b'x' * 10, 200, [])
+    cache.set('b', ['client'], b'x' * 10, 200, [])
+    cache.get('a')
+    cache.set('c', ['vehicle'], b'x' * 10, 200, [])
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_oversized_body_is_not_cached():
+    cache = ResponseCache(max_bytes=10)
+    cache.set('a', ['client'], b'x' * 20, 200, [])
+    assert cache.stats()['entries'] == 0
+
+
+def test_invalidate_drops_the_entries_of_the_table():
+    cache = ResponseCache(max_bytes=1000)
+    cache.set('a', ['client'], b'a', 200, [])
+    cache.set('b', ['vehicle', 'client'], b'b', 200, [])
+    cache.set('c', ['work'], b'c', 200, [])
+    cache.invalidate(['client'])
+    assert cache.stats()['entries'] == 1 and cache.get('c') is not None
+
+
+def test_second_request_is_served_from_the_cache(client, garage, statements):
+    first = client.get('/api/client/?limit=2')
+    assert first.headers['X-Cache'] == 'MISS'
+    statements.clear()
+    second = client.get('/api/client/?limit=2')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert not any('FROM client' in statement for statement in statements)
+
+
+def test_write_invalidates_the_cached_responses(client, garage):
+    path = f"/api/client/{garage['client'][1]}"
+    client.get(path)
+    client.put(path, json={"name": "Bruno L.", "email": "bruno@example.pt", "phone": "913000111",
+                           "address": "Rua B, Lisboa"})
+    response = client.get(path)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['name'] == 'Bruno L.'
+    assert response_cache.stats()['invalidations'] >= 1
+
+
+def test_cache_endpoint(client, garage):
+    hits = response_cache.stats()['hits']
+    client.get('/api/work/')
+    client.get('/api/work/')
+    assert client.get('/api/cache/').get_json()['hits'] == hits + 1
+    assert client.delete('/api/cache/').status_code == 204
+    assert client.get('/api/cache/').get_json()['entries'] == 0
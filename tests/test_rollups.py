@@ -0,0 +1,80 @@
+# tests/test_rollups.py
+import pytest
+from sqlalchemy import text
+
+from utils.database import db
+from utils.rollups import ROLLUP_KEYS, rebuild_rollups
+
+
+def _invoice(client_id, issued_at, total):
+    return {"client_id": client_id, "issued_at": issued_at, "total": total, "iva": round(total * 0.23, 2),
+            "total_with_iva": round(total * 1.23, 2)}
+
+
+def _rollups(app):
+    # Every row of every rollup table, comparable after a rebuild
+    with app.app_context():
+        return {
+            model.__tablename__: sorted(
+                tuple(row) for row in db.session.execute(text(f"SELECT * FROM {model.__tablename__}"))
+            )
+            for model in ROLLUP_KEYS
+        }
+
+
+def _rebuilt(app):
+    with app.app_context():
+        rebuild_rollups()
+    return _rollups(app)
+
+
+def test_rollups_are_filled_from_the_existing_invoices(app, garage):
+    rollups = _rollups(app)
+    assert rollups['revenue_monthly'] == [('2024-01', 1, 100.0, 123.0), ('2024-02', 1, 200.0, 246.0)]
+    assert rollups == _rebuilt(app)
+
+
+def test_triggers_follow_the_invoice_writes(app, client, garage):
+    first, second = garage['client'][0], garage['client'][1]
+    response = client.post('/api/invoice/', json=_invoice(first, '2024-01-20 10:00:00', 50.0))
+    invoice_id = response.get_json()['invoice_id']
+    client.post('/api/invoice/bulk', json=[_invoice(second, '2024-03-05 10:00:00', 10.0 * i) for i in range(1, 4)])
+    assert _rollups(app) == _rebuilt(app)
+
+    # Moving an invoice to another client and month leaves its former rows
+    client.put(f'/api/invoice/{invoice_id}', json=_invoice(second, '2024-02-20 10:00:00', 80.0))
+    assert _rollups(app) == _rebuilt(app)
+
+    client.delete(f"/api/invoice/{garage['invoice'][1]}")
+    client.delete(f'/api/invoice/{invoice_id}')
+    rollups = _rollups(app)
+    assert rollups == _rebuilt(app)
+    assert [row[0] for row in rollups['revenue_monthly']] == ['2024-01', '2024-03']
+
+
+@pytest.mark.parametrize('group_by, periods', [
+    ('day', ['2024-01-10', '2024-02-10']),
+    ('month', ['2024-01', '2024-02']),
+    ('client', ['2024-01', '2024-02']),
+])
+def test_report_reads_only_the_rollups(client, garage, statements, group_by, periods):
+    statements.clear()
+    rows = client.get(f'/api/report/revenue?group_by={group_by}').get_json()
+    assert [row['period'] for row in rows] == periods
+    assert [row['total'] for row in rows] == [100.0, 200.0]
+    assert not any('FROM invoice' in statement for statement in statements)
+
+
+def test_report_filters(client, garage):
+    rows = client.get('/api/report/revenue?group_by=client&start=2024-02-01').get_json()
+    assert [(row['client_id'], row['total_with_iva']) for row in rows] == [(garage['client'][1], 246.0)]
+    rows = client.get(f"/api/report/revenue?group_by=client&client_id={garage['client'][0]}").get_json()
+    assert [row['period'] for row in rows] == ['2024-01']
+
+
+def test_rebuild_command(app, garage):
+    with app.app_context():
+        db.session.execute(text("DELETE FROM revenue_daily"))
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['rebuild-rollups'])
+    assert 'revenue_daily: 2 rows' in result.output
@@ -0,0 +1,63 @@
+# tests/test_search.py
+import pytest
+
+from utils.search import match_expression
+
+
+def _hits(client, q, **args):
+    query = '&'.join(f'{name}={value}' for name, value in {"q": q, **args}.items())
+    response = client.get(f'/api/search/?{query}')
+    assert response.status_code == 200
+    return [(row['resource'], row['id']) for row in response.get_json()]
+
+
+@pytest.mark.parametrize('query, expression', [
+    ('Corolla pastilhas', '"Corolla"* "pastilhas"*'),
+    ('AA-12 "OR" *', '"AA"* "12"* "OR"*'),
+    ('  -- ', None),
+])
+def test_match_expression(query, expression):
+    assert match_expression(query) == expression
+
+
+def test_prefix_and_accents(client, garage):
+    assert _hits(client, 'travõ') == [('work', garage['work'][1])]
+    assert _hits(client, 'Rua Bra') == [('client', garage['client'][2])]
+
+
+def test_works_are_found_by_their_vehicle(client, garage):
+    assert _hits(client, 'Corolla revis') == [('work', garage['work'][0])]
+    client.put(f"/api/vehicle/{garage['vehicle'][0]}", json={
+        "brand": "Toyota", "model": "Yaris", "year": 2015, "license_plate": "AA-12-BC", "client_id": garage['client'][0]})
+    assert _hits(client, 'Corolla revis') == []
+    assert _hits(client, 'Yaris revis') == [('work', garage['work'][0])]
+
+
+def test_index_follows_the_writes(client, garage):
+    task_id = client.post('/api/task/', json={
+        "description": "Alinhamento da direção", "employee_id": garage['employee'][0], "start_date": "2024-03-01",
+        "end_date": None, "status": "pending", "work_id": garage['work'][0]}).get_json()['task_id']
+    assert _hits(client, 'alinhamento') == [('task', task_id)]
+    client.delete(f'/api/task/{task_id}')
+    assert _hits(client, 'alinhamento') == []
+
+
+def test_resource_filter_and_ranking(client, garage):
+    assert {resource for resource, _ in _hits(client, 'troca')} == {'work', 'task'}
+    assert _hits(client, 'troca', resource='task') == [('task', garage['task'][0])]
+    # The best match comes first
+    assert _hits(client, 'pintura')[0] == ('work', garage['work'][2])
+
+
+def test_paging(client, garage):
+    response = client.get('/api/search/?q=rua&limit=2')
+    assert len(response.get_json()) == 2
+    cursor = response.headers['X-Next-Cursor']
+    rest = client.get(f'/api/search/?q=rua&limit=2&after={cursor}').get_json()
+    assert len(rest) == 1
+    seen = [row['id'] for row in response.get_json()] + [row['id'] for row in rest]
+    assert sorted(seen) == garage['client']
+
+
+def test_text_without_words_is_rejected(client, garage):
+    assert client.get('/api/search/?q=--').status_code == 400
@@ -0,0 +1,55 @@
+# tests/test_serialization.py
+import json
+from datetime import date, datetime
+
+import pytest
+from flask_restx import Api, marshal
+
+from models.invoice import Invoice
+from models.task import Task
+from models.vehicle import Vehicle
+from utils.database import db
+from utils.serialization import dumps, row_serializer
+from utils.utils import generate_swagger_model
+
+
+def test_dumps_encodes_dates_in_iso_format():
+    data = {"day": date(2024, 1, 2), "at": datetime(2024, 1, 2, 9, 30)}
+    assert json.loads(dumps(data)) == {"day": "2024-01-02", "at": "2024-01-02T09:30:00"}
+
+
+def test_serializer_is_compiled_once():
+    assert row_serializer(Task) is row_serializer(Task)
+    assert row_serializer(Task, ['status']) is not row_serializer(Task)
+
+
+@pytest.mark.parametrize('model', [Task, Invoice, Vehicle])
+def test_same_body_as_flask_restx(app, garage, model):
+    # The compiled serializers replace marshal_with: the decoded bodies must not change
+    swagger_model = generate_swagger_model(Api(), model)
+    with app.app_context():
+        rows = db.session.execute(db.select(model)).scalars().all()
+        expected = json.loads(json.dumps(marshal(rows, swagger_model)))
+        assert json.loads(dumps([row_serializer(model)(row) for row in rows])) == expected
+
+
+def test_float_columns_render_floats(app, garage):
+    with app.app_context():
+        invoice = db.session.get(Invoice, garage['invoice'][0])
+        invoice.total = 100
+        assert isinstance(row_serializer(Invoice)(invoice)['total'], float)
+
+
+def test_unloaded_columns_are_loaded(app, garage):
+    with app.app_context():
+        task = db.session.get(Task, garage['task'][0])
+        db.session.expire(task)
+        assert row_serializer(Task, ['status'])(task) == {"status": "completed"}
+
+
+def test_api_encodes_dates(client, garage):
+    task = client.get(f"/api/task/{garage['task'][0]}").get_json()
+    assert task['start_date'] == '2024-01-01'
+    assert task['end_date'] == '2024-01-02'
+    invoice = client.get(f"/api/invoice/{garage['invoice'][0]}").get_json()
+    assert invoice['issued_at'] == '2024-01-10T09:00:00'
@@ -0,0 +1,66 @@
+# tests/test_settings.py
+import sqlite3
+
+import pytest
+
+from models.setting import Setting
+from services.setting_service import get_setting, settings_cache, update_setting
+from utils.database import db
+
+
+@pytest.fixture
+def settings_app(make_app):
+    def make(ttl):
+        app = make_app(SETTINGS_CACHE_TTL=ttl)
+        with app.app_context():
+            db.session.add(Setting(key_name='iva_rate', value='23'))
+            db.session.commit()
+        settings_cache.invalidate()
+        return app
+    return make
+
+
+def _write_from_another_worker(app, value, bump=True):
+    # A write of another process: plain SQL on its own connection
+    with app.app_context():
+        path = db.engine.url.database
+    connection = sqlite3.connect(path)
+    connection.execute("UPDATE setting SET value = ? WHERE key_name = 'iva_rate'", (value,))
+    if bump:
+        connection.execute("UPDATE table_version SET version = version + 1 WHERE table_name = 'setting'")
+    connection.commit()
+    connection.close()
+
+
+def test_reads_are_served_from_memory(settings_app, statements):
+    app = settings_app(ttl=60)
+    with app.app_context():
+        assert get_setting('iva_rate') == '23'
+        statements.clear()
+        assert get_setting('iva_rate') == '23'
+        assert get_setting('missing') is None
+    assert statements == []
+
+
+def test_update_is_written_through(settings_app):
+    app = settings_app(ttl=60)
+    with app.app_context():
+        assert get_setting('iva_rate') == '23'
+        assert update_setting('iva_rate', '6').value == '6'
+        assert get_setting('iva_rate') == '6'
+        assert update_setting('missing', '1') is None
+
+
+def test_writes_of_other_workers_are_seen_through_the_table_version(settings_app):
+    app = settings_app(ttl=0)
+
+    def read():
+        # One application context per read, like the requests: the transaction ends with it
+        with app.app_context():
+            return get_setting('iva_rate')
+
+    assert read() == '23'
+    _write_from_another_worker(app, '13', bump=False)
+    assert read() == '23'  # Same version: the value is not reloaded
+    _write_from_another_worker(app, '6')
+    assert read() == '6'
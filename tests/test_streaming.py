@@ -0,0 +1,40 @@
+# tests/test_streaming.py
+import json
+
+import pytest
+
+from utils.streaming import NDJSON_MIMETYPE
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 1000])
+def test_stream_every_row(make_app, batch_size):
+    app = make_app(STREAM_BATCH_SIZE=batch_size)
+    client = app.test_client()
+    for i in range(5):
+        assert client.post('/api/client/', json={"name": f"Client {i}", "email": f"c{i}@example.pt",
+                                                 "phone": "912000000", "address": "Porto"}).status_code == 201
+    response = client.get('/api/client/?stream=true')
+    assert response.status_code == 200
+    assert response.mimetype == NDJSON_MIMETYPE
+    assert [row['name'] for row in _lines(response)] == [f"Client {i}" for i in range(5)]
+
+
+def test_accept_header_selects_ndjson(client, garage):
+    response = client.get('/api/task/', headers={'Accept': NDJSON_MIMETYPE})
+    assert response.mimetype == NDJSON_MIMETYPE
+    assert [row['task_id'] for row in _lines(response)] == garage['task']
+
+
+def test_stream_ignores_pagination_but_keeps_filters(client, garage):
+    response = client.get('/api/task/?stream=1&limit=1&status=completed')
+    assert [row['status'] for row in _lines(response)] == ['completed'] * 3
+
+
+def test_stream_with_fields_and_include(client, garage):
+    rows = _lines(client.get('/api/invoice/?stream=1&fields=total&include=items'))
+    assert [set(row) for row in rows] == [{'total', 'items'}] * 2
+    assert [len(row['items']) for row in rows] == [2, 1]
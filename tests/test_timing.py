@@ -0,0 +1,59 @@
+# tests/test_timing.py
+import json
+import logging
+import re
+
+import pytest
+
+from utils.timing import server_timing
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(SERVER_TIMING_ENABLED=True)
+
+
+def _metrics(header):
+    # Server-Timing metrics by name: their duration, or the description of the counters
+    return {name: float(value) for name, value in re.findall(r'([\w-]+);(?:dur|desc)=([\d.]+)', header)}
+
+
+def test_server_timing_header():
+    assert server_timing({'db_ms': 1.5, 'db_count': 3, 'serialize_ms': 0.25, 'total_ms': 4.0}) == (
+        "db;dur=1.5, db-count;desc=3, serialize;dur=0.25, total;dur=4.0")
+
+
+def test_timing_is_off_by_default(make_app):
+    response = make_app().test_client().get('/api/client/')
+    assert 'Server-Timing' not in response.headers
+
+
+def test_request_is_timed(client, garage, statements):
+    statements.clear()
+    response = client.get('/api/task/?include=employee')
+    metrics = _metrics(response.headers['Server-Timing'])
+    assert metrics['db-count'] == len(statements)
+    assert 0 < metrics['db'] <= metrics['total']
+    assert 0 < metrics['serialize'] <= metrics['total']
+    assert response.headers['Timing-Allow-Origin'] == '*'
+
+
+def test_writes_and_errors_are_timed(client, garage):
+    response = client.post('/api/client/', json={"name": "Diana", "email": "diana@example.pt",
+                                                 "phone": "915000333", "address": "Rua D"})
+    assert _metrics(response.headers['Server-Timing'])['db-count'] >= 2
+    assert 'Server-Timing' in client.get('/api/task/?limit=0').headers
+
+
+def test_one_record_is_logged_per_request(client, garage, caplog):
+    with caplog.at_level(logging.INFO, logger='utils.timing'):
+        client.get('/api/work/?limit=1')
+    records = [json.loads(record.message) for record in caplog.records if record.name == 'utils.timing']
+    assert len(records) == 1
+    assert {key: records[0][key] for key in ('method', 'path', 'endpoint', 'status')} == {
+        'method': 'GET', 'path': '/api/work/', 'endpoint': 'api.work_work_list', 'status': 200}
+
+
+def test_sampling(make_app):
+    client = make_app(SERVER_TIMING_ENABLED=True, SERVER_TIMING_SAMPLE_RATE=0).test_client()
+    assert 'Server-Timing' not in client.get('/api/client/').headers
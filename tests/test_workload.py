@@ -0,0 +1,52 @@
+# tests/test_workload.py
+from datetime import date, timedelta
+
+
+def _employees(client, query='weeks=200'):
+    # 200 weeks reach back to the 2024 tasks of the garage fixture
+    return {row['name']: row for row in client.get(f'/api/report/workload?{query}').get_json()['employees']}
+
+
+def test_task_counters_and_duration(client, garage):
+    employees = _employees(client)
+    assert [employees['Rui Ferreira'][key] for key in ('open_tasks', 'completed_tasks', 'avg_duration_days')] == [2, 1, 1.0]
+    assert [employees['Sara Nunes'][key] for key in ('open_tasks', 'completed_tasks', 'avg_duration_days')] == [0, 2, 3.5]
+
+
+def test_weekly_throughput_and_rolling_average(client, garage):
+    weekly = _employees(client)['Sara Nunes']['weekly']
+    # Weeks start on Monday; the two weeks are more than four weeks apart
+    assert weekly == [
+        {"week": '2024-01-08', "completed": 1, "rolling_average": 0.25},
+        {"week": '2024-02-05', "completed": 1, "rolling_average": 0.25},
+    ]
+    assert _employees(client)['Rui Ferreira']['weekly'] == [
+        {"week": '2024-01-01', "completed": 1, "rolling_average": 0.25}]
+
+
+def test_weeks_and_employee_filters(client, garage):
+    response = client.get(f"/api/report/workload?employee_id={garage['employee'][1]}").get_json()
+    today = date.today()
+    assert response['since'] == (today - timedelta(days=today.weekday(), weeks=7)).isoformat()
+    assert [row['name'] for row in response['employees']] == ['Sara Nunes']
+    assert response['employees'][0]['weekly'] == []
+    assert client.get('/api/report/workload?weeks=0').status_code == 400
+
+
+def test_employee_without_tasks_is_listed(client, garage):
+    client.post('/api/employee/', json={"name": "Tiago", "email": "tiago@example.pt", "phone": "910000003",
+                                        "role": "mechanic", "hired_date": "2024-05-01"})
+    employees = _employees(client)
+    assert employees['Tiago']['open_tasks'] == 0
+    assert employees['Tiago']['avg_duration_days'] is None
+
+
+def test_report_is_cached_until_the_tasks_change(app, client, garage, statements):
+    app.config['REPORT_CACHE_TTL'] = 0
+    _employees(client)
+    statements.clear()
+    _employees(client)
+    assert not any('FROM task' in statement for statement in statements)
+
+    client.patch('/api/task/bulk', json={"ids": [garage['task'][2]], "values": {"status": "canceled"}})
+    assert _employees(client)['Rui Ferreira']['open_tasks'] == 1
@@ -0,0 +1,41 @@
+# tests/test_writes.py
+
+CLIENT = {"name": "Dora Reis", "email": "dora@example.pt", "phone": "915000333", "address": "Rua D, Faro"}
+
+
+def _writes(statements):
+    # The statements of the request but the transaction control and the change counters
+    return [statement for statement in statements
+            if not statement.startswith('BEGIN') and 'table_version' not in statement]
+
+
+def test_create_reads_the_generated_columns_back_with_returning(client, statements):
+    statements.clear()
+    response = client.post('/api/client/', json=CLIENT)
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['client_id'] and body['created_at']
+    writes = _writes(statements)
+    assert len(writes) == 1
+    assert writes[0].startswith('INSERT INTO client') and 'RETURNING' in writes[0]
+
+
+def test_update_is_a_single_update_returning(client, garage, statements):
+    statements.clear()
+    response = client.put(f"/api/client/{garage['client'][0]}", json=CLIENT)
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Dora Reis'
+    writes = _writes(statements)
+    assert len(writes) == 1
+    assert writes[0].startswith('UPDATE client') and 'RETURNING' in writes[0]
+    assert client.get(f"/api/client/{garage['client'][0]}").get_json()['name'] == 'Dora Reis'
+
+
+def test_update_of_a_missing_row(client, garage):
+    assert client.put('/api/client/999', json=CLIENT).status_code == 404
+
+
+def test_duplicate_is_a_conflict(client, garage):
+    response = client.post('/api/client/', json={**CLIENT, "name": "Ana Costa"})
+    assert response.status_code == 409
+    assert 'UNIQUE' in response.get_json()['message']
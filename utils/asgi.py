@@ -0,0 +1,317 @@
+# utils/asgi.py
+import asyncio
+import contextvars
+import io
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import g
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from utils.async_database import async_db
+from utils.serialization import json_response
+
+logger = logging.getLogger(__name__)
+
+# Seconds a thread producing a response waits for room in the queue before checking again whether the client left
+PUT_POLL_INTERVAL = 0.5
+
+
+class ClientDisconnected(Exception):
+    """
+    Raised in the thread producing a response body once the client has gone.
+    """
+
+
+class SyncFallback(Exception):
+    """
+    Raised by an async handler for a request it does not serve (a streamed export,
+    an X-Fields mask...): the request is then handled by the Flask application.
+    """
+
+
+class AsyncApi:
+    """
+    Registry of the async GET handlers of the ASGI serving mode. A handler takes
+    the AsyncSession of the request and the URL arguments, and runs inside a Flask
+    request context, so the request parsers, Swagger models and helpers of the
+    synchronous resources are shared with it.
+    """
+
+    def __init__(self, url_prefix=''):
+        self.url_prefix = url_prefix
+        self.url_map = Map()
+        self.handlers = {}
+
+    def route(self, rule, endpoint=None):
+        """
+        Register an async handler for the GET requests of a URL rule.
+
+        :param rule: Werkzeug URL rule relative to the prefix, e.g. '/vehicle/<int:vehicle_id>'.
+        :param endpoint: Name of the handler (optional, the name of the function by default).
+        :return: Decorator
+        """
+        def decorator(func):
+            endpoint_name = endpoint or f"{func.__module__}.{func.__name__}"
+            self.url_map.add(Rule(self.url_prefix + rule, endpoint=endpoint_name, methods=['GET']))
+            self.handlers[endpoint_name] = func
+            return func
+        return decorator
+
+    def match(self, method, path):
+        """
+        Find the handler of a request.
+
+        :return: tuple: The handler and its URL arguments, or None when the request has no async handler.
+        """
+        if method != 'GET':
+            return None
+        try:
+            endpoint, view_args = self.url_map.bind('localhost').match(path, method='GET')
+        except HTTPException:  # Not found, or redirected to the URL with a trailing slash
+            return None
+        return self.handlers[endpoint], view_args
+
+
+def _path(scope):
+    """
+    Path of an ASGI request below the root path the application is mounted at.
+    """
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    return path[len(root_path):] if root_path and path.startswith(root_path) else path
+
+
+def _environ(scope, body=b''):
+    """
+    Build the WSGI environment of an ASGI HTTP request.
+    """
+    root_path = scope.get('root_path', '')
+    path = _path(scope)
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf8').decode('latin1'),
+        'PATH_INFO': path.encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f"HTTP_{name}"
+        value = value.decode('latin1')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    if body and 'CONTENT_LENGTH' not in environ:  # Chunked request body
+        environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _next_chunk(chunks, disconnect):
+    """
+    Wait for the next chunk of a response body.
+
+    :return: The chunk, or None at the end of the body or once the client has gone.
+    """
+    get = asyncio.ensure_future(chunks.get())
+    await asyncio.wait((get, disconnect), return_when=asyncio.FIRST_COMPLETED)
+    if not get.done():
+        get.cancel()
+        return None
+    return get.result()
+
+
+async def _call_handler(handler, view_args):
+    # Read from the replica chosen by the before_request hook of utils.replicas, if any
+    replica = g.get('replica')
+    async with async_db.session(replica.name if replica is not None else None) as session:
+        return await handler(session, **view_args)
+
+
+async def _start_response(send, status, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+    })
+
+
+class AsgiApp:
+    """
+    ASGI application serving the API in the async mode: the GET requests with an
+    async handler (see AsyncApi) run on the event loop with async SQLAlchemy
+    sessions, every other request (writes, Swagger documentation, streamed
+    exports) is handed to the Flask application on a thread pool.
+    """
+
+    def __init__(self, flask_app, async_api):
+        self.flask_app = flask_app
+        self.async_api = async_api
+        self.executor = ThreadPoolExecutor(
+            max_workers=flask_app.config["ASGI_SYNC_THREADS"], thread_name_prefix='wsgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        match = self.async_api.match(scope['method'], _path(scope))
+        if match is not None:
+            resp = await self._run_async(scope, *match)
+            if resp is not None:
+                await _start_response(send, resp.status_code, resp.headers.items())
+                await send({'type': 'http.response.body', 'body': resp.get_data()})
+                return
+        await self._run_wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _run_async(self, scope, handler, view_args):
+        """
+        Run an async handler in a Flask request context, with the before and after
+        request hooks of the application (CORS headers...). The before_request hooks
+        may block (replica lag checks, database reads), so they run on the thread
+        pool; the request context and the context variables they set live in a
+        contextvars.Context of the request, shared by the thread and the handler.
+
+        :return: Flask Response, or None when the handler falls back to the Flask application.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        request_context = self.flask_app.request_context(_environ(scope))
+        context.run(request_context.push)
+        try:
+            try:
+                resp = await loop.run_in_executor(self.executor, context.run, self.flask_app.preprocess_request)
+                if resp is None:
+                    resp = await asyncio.create_task(_call_handler(handler, view_args), context=context)
+                resp = context.run(self.flask_app.make_response, resp)
+            except SyncFallback:
+                return None
+            except HTTPException as http_err:
+                resp = context.run(json_response, getattr(http_err, 'data', None) or {"message": http_err.description},
+                                   http_err.code)
+            except Exception as e:
+                logger.error(f"Error handling {scope['path']} asynchronously: {e}")
+                resp = context.run(json_response, {"message": "Internal Server Error"}, 500)
+            return context.run(self.flask_app.process_response, resp)
+        finally:
+            context.run(request_context.pop)
+
+    async def _run_wsgi(self, scope, receive, send):
+        """
+        Run the request through the Flask application on the thread pool. The body
+        is passed back chunk by chunk through a bounded queue, so streamed exports
+        stay streamed and a slow client holds back the thread producing them. Once
+        the client has gone, the thread stops and closes the WSGI iterable.
+        """
+        environ = _environ(scope, await _read_body(receive))
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(maxsize=8)
+        started = {}
+        disconnected = threading.Event()
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+
+        def put(chunk):
+            future = asyncio.run_coroutine_threadsafe(chunks.put(chunk), loop)
+            while True:
+                if disconnected.is_set():
+                    future.cancel()
+                    raise ClientDisconnected()
+                try:
+                    return future.result(timeout=PUT_POLL_INTERVAL)
+                except FutureTimeoutError:
+                    pass
+
+        def run():
+            try:
+                iterable = self.flask_app(environ, start_response)
+                try:
+                    for chunk in iterable:
+                        if chunk:
+                            put(chunk)
+                finally:
+                    if hasattr(iterable, 'close'):
+                        iterable.close()
+                put(None)
+            except ClientDisconnected:
+                pass
+            except BaseException:
+                if not disconnected.is_set():
+                    put(None)
+                raise
+
+        future = loop.run_in_executor(self.executor, run)
+        disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+        disconnect.add_done_callback(lambda _: disconnected.set())
+        try:
+            chunk = await _next_chunk(chunks, disconnect)
+            if disconnect.done():
+                return
+            if not started:
+                await future  # The application failed before starting the response
+            await _start_response(send, started['status'], started['headers'])
+            while chunk is not None:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await _next_chunk(chunks, disconnect)
+            if disconnect.done():
+                return
+            await send({'type': 'http.response.body', 'body': b''})
+            await future
+        finally:
+            disconnected.set()
+            disconnect.cancel()
+
+def create_asgi_app(flask_app, async_api):
+    """
+    Build the ASGI application of the async serving mode.
+
+    :param flask_app: Flask application created by app.create_app.
+    :param async_api: AsyncApi holding the async handlers.
+    :return: AsgiApp
+    """
+    async_db.init_app(flask_app)
+    return AsgiApp(flask_app, async_api)
@@ -0,0 +1,89 @@
+# utils/async_database.py
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from utils.database import configure_sqlite, db
+
+# Async drivers of the database backends, used by the ASGI serving mode (optional dependencies)
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite'}
+
+
+def async_database_url(url):
+    """
+    Convert the URL of the synchronous engine to the same database through its async driver.
+
+    :param url: sqlalchemy.engine.URL of the synchronous engine.
+    :return: sqlalchemy.engine.URL
+    :raises ValueError: When the backend has no async driver.
+    """
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"The ASGI serving mode does not support the {url.get_backend_name()} database.")
+    return url.set(drivername=driver)
+
+
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    # Same as utils.database.disable_pysqlite_transactions for the aiosqlite
+    # adapter: the BEGIN is emitted by the "begin" listener of every Engine
+    dbapi_connection.isolation_level = None
+
+
+class AsyncDatabase:
+    """
+    Async SQLAlchemy engines and session factories of the databases of a Flask
+    application (the primary and its read replicas), for the handlers of the ASGI
+    serving mode (see utils.asgi). The models and their metadata are the ones of
+    utils.database.db.
+    """
+
+    def __init__(self):
+        self.engine = None
+        # Engines and session factories by bind key: None for the primary, then the replicas
+        self.engines = {}
+        self._sessionmakers = {}
+
+    def init_app(self, app):
+        """
+        Create the async engines of the databases configured for the application.
+
+        :param app: Flask application, initialized with utils.database.init_database.
+        """
+        with app.app_context():
+            # Flask-SQLAlchemy has already resolved relative SQLite paths to the instance folder
+            urls = {key: async_database_url(engine.url) for key, engine in db.engines.items()}
+        options = dict(app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+        if 'pool_size' in options:
+            # Some aiosqlite dialect versions default to a NullPool, which takes no pool sizing
+            options.setdefault('poolclass', AsyncAdaptedQueuePool)
+        for key, url in urls.items():
+            engine = create_async_engine(url, **options)
+            event.listen(engine.sync_engine, "connect", _disable_driver_transactions)
+            configure_sqlite(engine.sync_engine, app.config)
+            self.engines[key] = engine
+            # Like db.session, instances are not expired on commit
+            self._sessionmakers[key] = async_sessionmaker(engine, expire_on_commit=False)
+        self.engine = self.engines[None]
+
+    def session(self, bind_key=None):
+        """
+        Open a new session, to be used as an async context manager.
+
+        :param bind_key: Bind key of the database to read from, e.g. the name of a
+            replica (see utils.replicas), None for the primary.
+        :return: sqlalchemy.ext.asyncio.AsyncSession
+        """
+        if not self._sessionmakers:
+            raise RuntimeError("The async database is not initialized, call async_db.init_app(app) first.")
+        return self._sessionmakers[bind_key]()
+
+    async def dispose(self):
+        """
+        Close the connections of the pools, when the server shuts down.
+        """
+        for engine in self.engines.values():
+            await engine.dispose()
+
+
+# Async counterpart of db, initialized by the ASGI entry point (asgi.py)
+async_db = AsyncDatabase()
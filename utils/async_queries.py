@@ -0,0 +1,65 @@
+# utils/async_queries.py
+import logging
+
+from sqlalchemy import inspect, select
+
+from utils.filters import apply_filters
+from utils.includes import load_includes
+from utils.pagination import paginate_async
+from utils.projection import load_fields, to_dict, to_dicts
+
+logger = logging.getLogger(__name__)
+
+
+async def get_page_async(session, model, fields=None, filters=None, limit=None, after=None, sort=None,
+                         with_total=False, include=None):
+    """
+    Read a page of rows of a model on an AsyncSession, for the ASGI serving mode
+    (the async counterpart of the get_all_* services).
+
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param model: SQLAlchemy model class
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param filters: Filters parsed by utils.filters.parse_filters (optional).
+    :param limit: Maximum number of rows to return (optional, all rows when omitted).
+    :param after: Decoded cursor of the previous page (optional).
+    :param sort: Sort key, prefixed with '-' for descending order (optional).
+    :param with_total: Whether to count all matching rows.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: The page of rows as dictionaries ('items'), the next cursor and the total.
+    """
+    try:
+        statement = apply_filters(load_fields(select(model), model, fields), model, filters)
+        statement = load_includes(statement, model, include)
+        page = await paginate_async(session, statement, model, limit=limit, after=after, sort=sort,
+                                    with_total=with_total)
+        page["items"] = to_dicts(page["items"], model, fields, include)
+        return page
+    except Exception as e:
+        logger.error(f"Error fetching {model.__tablename__} rows: {e}")
+        raise
+
+
+async def get_one_async(session, model, ident, fields=None, include=None):
+    """
+    Read one row of a model by primary key on an AsyncSession, for the ASGI
+    serving mode (the async counterpart of the get_* services).
+
+    :param session: The AsyncSession of the request (see utils.async_database).
+    :param model: SQLAlchemy model class
+    :param ident: The primary key of the row.
+    :param fields: Names of the columns to select (optional, all columns when omitted).
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict: The row as a dictionary, or None if not found.
+    """
+    try:
+        primary_key = inspect(model).primary_key[0]
+        statement = load_fields(select(model), model, fields).where(primary_key == ident)
+        statement = load_includes(statement, model, include)
+        instance = (await session.execute(statement)).unique().scalar_one_or_none()
+        if instance is None:
+            return None
+        return to_dict(instance, model, fields, include)
+    except Exception as e:
+        logger.error(f"Error fetching {model.__tablename__} {ident}: {e}")
+        raise
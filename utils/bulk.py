@@ -0,0 +1,325 @@
+# utils/bulk.py
+import logging
+
+from flask import current_app
+from flask_restx import fields, reqparse
+from sqlalchemy import exists, insert, inspect, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from werkzeug.exceptions import BadRequest, Conflict
+
+from utils.database import db, integrity_error
+from utils.filters import apply_filters, coerce_value
+from utils.nplusone import suspend_tracking
+from utils.pagination import ListParser
+
+logger = logging.getLogger(__name__)
+
+
+def _batch_size(value):
+    """
+    reqparse type for the bulk batch size.
+    """
+    size = int(value)
+    if size < 1:
+        raise ValueError("The batch size must be a positive number.")
+    return size
+
+
+# Query string parser shared by the bulk endpoints
+bulk_parser = reqparse.RequestParser()
+bulk_parser.add_argument('batch_size', type=_batch_size, location='args',
+                         help='Number of rows written per statement (defaults to BULK_BATCH_SIZE).')
+
+
+def build_bulk_filter_parser(model):
+    """
+    Build the query string parser of the bulk update and delete endpoints: every
+    argument is a filter expression on the model columns (see utils.filters).
+
+    :param model: SQLAlchemy model class
+    :return: ListParser returning the filters under the 'filters' key.
+    """
+    return ListParser(model=model)
+
+
+def bulk_result_model(ns, model):
+    """
+    Build the Swagger model of a bulk create response for a resource.
+
+    :param ns: Namespace the resource belongs to
+    :param model: Flask-RESTx model of the resource
+    :return: Flask-RESTx model with the created items and the per-item errors
+    """
+    error_model = ns.model(f"{model.name}BulkError", {
+        'index': fields.Integer(description='Position of the item in the request'),
+        'message': fields.String(description='Why the item was rejected'),
+    })
+    return ns.model(f"{model.name}BulkResult", {
+        'created': fields.List(fields.Nested(model)),
+        'errors': fields.List(fields.Nested(error_model)),
+    })
+
+
+def bulk_update_model(ns, model):
+    """
+    Build the Swagger model of a bulk update request for a resource.
+
+    :param ns: Namespace the resource belongs to
+    :param model: Flask-RESTx model of the resource
+    :return: Flask-RESTx model with the target ids and the values to set
+    """
+    return ns.model(f"{model.name}BulkUpdate", {
+        'ids': fields.List(fields.Integer, description='IDs of the rows to update (optional when filtering)'),
+        'values': fields.Nested(model, required=True, description='Fields to set on every matched row'),
+    })
+
+
+def bulk_delete_model(ns, model):
+    """
+    Build the Swagger model of a bulk delete request for a resource.
+
+    :param ns: Namespace the resource belongs to
+    :param model: Flask-RESTx model of the resource
+    :return: Flask-RESTx model with the target ids
+    """
+    return ns.model(f"{model.name}BulkDelete", {
+        'ids': fields.List(fields.Integer, description='IDs of the rows to delete (optional when filtering)'),
+    })
+
+
+def bulk_count_model(ns, model, key):
+    """
+    Build the Swagger model of a bulk update or delete response for a resource.
+
+    :param ns: Namespace the resource belongs to
+    :param model: Flask-RESTx model of the resource
+    :param key: Name of the count, 'updated' or 'deleted'
+    :return: Flask-RESTx model with the affected row count
+    """
+    return ns.model(f"{model.name}Bulk{key.capitalize()}", {
+        key: fields.Integer(description=f'Number of rows {key}'),
+    })
+
+
+def writable_columns(model):
+    """
+    List the columns a client may set: everything but the primary key and
+    columns filled in by the database.
+
+    :param model: SQLAlchemy model class
+    :return: list: SQLAlchemy columns
+    """
+    return [
+        column for column in model.__table__.columns
+        if not column.primary_key and column.server_default is None
+    ]
+
+
+def prepare_row(model, item):
+    """
+    Validate one item of a bulk payload and convert its values to the column types.
+
+    :param model: SQLAlchemy model class
+    :param item: The item sent by the client.
+    :return: dict: Column values ready to be inserted.
+    :raises ValueError: When the item is not an object, misses a mandatory field or has an invalid value.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Item must be an object.")
+    row = {}
+    for column in writable_columns(model):
+        value = item.get(column.name)
+        if value is None:
+            # Every row gets every column: executemany binds the keys of the first row only
+            if column.default is not None and column.default.is_scalar:
+                row[column.name] = column.default.arg
+            elif column.nullable:
+                row[column.name] = None
+            elif column.default is None:
+                raise ValueError(f"Missing mandatory field '{column.name}'.")
+            continue
+        try:
+            row[column.name] = coerce_value(column, value) if isinstance(value, str) else value
+        except ValueError:
+            raise ValueError(f"Invalid value for field '{column.name}'.")
+    return row
+
+
+def _insert(model, rows):
+    """
+    Insert rows with executemany-style INSERT ... RETURNING statements.
+
+    :return: list: The inserted rows as dictionaries, in the order of the input.
+    """
+    table = model.__table__
+    statement = insert(table).returning(*table.columns, sort_by_parameter_order=True)
+    return [dict(row._mapping) for row in db.session.execute(statement, rows)]
+
+
+def bulk_create(model, items, batch_size=None):
+    """
+    Create many rows of a model in a single transaction.
+
+    Items are validated first, then inserted in batches of batch_size rows, each
+    batch being one multi-row INSERT ... RETURNING inside a savepoint. When a batch
+    violates a constraint it is rolled back and retried row by row, so only the
+    offending items are rejected. Invalid items are reported with their position
+    in the payload and never abort the whole request.
+
+    :param model: SQLAlchemy model class
+    :param items: List of items sent by the client.
+    :param batch_size: Rows per statement (defaults to BULK_BATCH_SIZE).
+    :return: dict: The created rows ('created') and the per-item errors ('errors').
+    """
+    batch_size = batch_size or current_app.config.get('BULK_BATCH_SIZE', 500)
+    created, errors, pending = [], [], []
+
+    for index, item in enumerate(items):
+        try:
+            pending.append((index, prepare_row(model, item)))
+        except ValueError as e:
+            errors.append({"index": index, "message": str(e)})
+
+    try:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            try:
+                with db.session.begin_nested():
+                    created.extend(_insert(model, [row for _, row in batch]))
+            except SQLAlchemyError:
+                # Isolate the rows that break a constraint (the same INSERT repeated is not an N+1 query)
+                with suspend_tracking():
+                    for index, row in batch:
+                        try:
+                            with db.session.begin_nested():
+                                created.extend(_insert(model, [row]))
+                        except SQLAlchemyError as e:
+                            errors.append({"index": index, "message": str(getattr(e, 'orig', e))})
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Error bulk creating {model.__tablename__} rows: {e}")
+        db.session.rollback()
+        raise
+
+    errors.sort(key=lambda error: error["index"])
+    return {"created": created, "errors": errors}
+
+
+def target_query(model, ids=None, filters=None):
+    """
+    Build the query selecting the rows of a bulk update or delete.
+
+    :param model: SQLAlchemy model class
+    :param ids: Primary keys of the rows (optional).
+    :param filters: Filter tuples returned by parse_filters (optional).
+    :return: The filtered query.
+    :raises BadRequest: When neither ids nor filters are given, or the ids are not integers.
+    """
+    if not ids and not filters:
+        raise BadRequest("Pass a list of ids or at least one filter, bulk operations never target a whole table.")
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+        raise BadRequest("'ids' must be a list of integers.")
+    query = apply_filters(model.query, model, filters)
+    if ids:
+        query = query.filter(inspect(model).primary_key[0].in_(ids))
+    return query
+
+
+def prepare_values(model, values):
+    """
+    Validate the values of a bulk update and convert them to the column types.
+
+    :param model: SQLAlchemy model class
+    :param values: The fields to set, as sent by the client.
+    :return: dict: Column values ready for the UPDATE statement.
+    :raises BadRequest: For unknown or read-only fields and invalid values.
+    """
+    if not isinstance(values, dict) or not values:
+        raise BadRequest("'values' must be an object with at least one field.")
+    columns = {column.name: column for column in writable_columns(model)}
+    unknown = [name for name in values if name not in columns]
+    if unknown:
+        raise BadRequest(f"Fields cannot be updated: {', '.join(unknown)}. Available fields: {', '.join(columns)}.")
+    row = {}
+    for name, value in values.items():
+        column = columns[name]
+        if value is None and not column.nullable:
+            raise BadRequest(f"Field '{name}' cannot be null.")
+        try:
+            row[name] = coerce_value(column, value) if isinstance(value, str) else value
+        except ValueError:
+            raise BadRequest(f"Invalid value for field '{name}'.")
+    return row
+
+
+def bulk_update(model, values, ids=None, filters=None):
+    """
+    Update many rows of a model with a single UPDATE ... WHERE statement.
+
+    The session is not synchronized with the statement: nothing is loaded before
+    or after, which is what makes the update set-based.
+
+    :param model: SQLAlchemy model class
+    :param values: The fields to set on every matched row.
+    :param ids: Primary keys of the rows to update (optional).
+    :param filters: Filter tuples returned by parse_filters (optional).
+    :return: dict: The number of updated rows ('updated').
+    """
+    query = target_query(model, ids, filters)
+    values = prepare_values(model, values)
+    try:
+        updated = query.update(values, synchronize_session=False)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        raise integrity_error(e)
+    except Exception as e:
+        logger.error(f"Error bulk updating {model.__tablename__} rows: {e}")
+        db.session.rollback()
+        raise
+    return {"updated": updated}
+
+
+def bulk_delete(model, ids=None, filters=None):
+    """
+    Delete many rows of a model with a single DELETE ... WHERE statement.
+
+    Children of relationships that cascade deletes (e.g. the items of an invoice)
+    are deleted first with one statement each. Rows still referenced by other
+    tables are never deleted: they are checked first, so the client gets a Conflict
+    naming the referencing table rather than a foreign key error.
+
+    :param model: SQLAlchemy model class
+    :param ids: Primary keys of the rows to delete (optional).
+    :param filters: Filter tuples returned by parse_filters (optional).
+    :return: dict: The number of deleted rows ('deleted').
+    :raises Conflict: When a matched row is referenced by a row of another table.
+    """
+    query = target_query(model, ids, filters)
+    primary_key = inspect(model).primary_key[0]
+    targets = query.with_entities(primary_key).scalar_subquery()
+    cascaded = {
+        relationship.mapper.local_table: relationship
+        for relationship in inspect(model).relationships
+        if relationship.cascade.delete and relationship.direction.name == 'ONETOMANY'
+    }
+    try:
+        for table in db.metadata.sorted_tables:
+            for foreign_key in table.foreign_keys:
+                if foreign_key.column.table is not model.__table__:
+                    continue
+                referencing = foreign_key.parent.in_(targets)
+                if table in cascaded:
+                    db.session.execute(table.delete().where(referencing))
+                elif db.session.scalar(select(exists().where(referencing))):
+                    raise Conflict(f"Some {model.__tablename__} rows are still referenced by {table.name}.")
+        deleted = query.delete(synchronize_session=False)
+        db.session.commit()
+    except Conflict:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk deleting {model.__tablename__} rows: {e}")
+        db.session.rollback()
+        raise
+    return {"deleted": deleted}
@@ -0,0 +1,81 @@
+# utils/cache.py
+import logging
+import threading
+import time
+
+from flask import current_app
+
+from utils.metrics import metrics
+from utils.versioning import get_versions
+
+logger = logging.getLogger(__name__)
+
+
+class VersionedCache:
+    """
+    In-process cache of data derived from one or a few tables.
+
+    The value is served from memory until its TTL expires. The table change
+    counters (see utils.versioning) are then polled with a single primary key
+    lookup: the value is only reloaded when another request or worker changed
+    one of the tables in the meantime, otherwise it is kept for another TTL.
+    """
+
+    def __init__(self, table_name, loader, ttl_setting, default_ttl=5.0):
+        """
+        :param table_name: Name of the table the value is derived from, or a tuple of names.
+        :param loader: Callable building the value from the database.
+        :param ttl_setting: Config key holding the TTL in seconds.
+        :param default_ttl: TTL used when the config key is not set.
+        """
+        self.table_names = (table_name,) if isinstance(table_name, str) else tuple(table_name)
+        self.loader = loader
+        # Name of the cache in the metrics, e.g. 'summary' for _load_summary
+        self.name = loader.__name__.lstrip('_').removeprefix('load_')
+        self.ttl_setting = ttl_setting
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._expires_at = 0.0
+
+    def _ttl(self):
+        return current_app.config.get(self.ttl_setting, self.default_ttl)
+
+    def get(self):
+        """
+        Return the cached value, refreshing it when the TTL expired and the table changed.
+
+        :return: The value built by the loader.
+        """
+        if time.monotonic() < self._expires_at:
+            metrics.inc('cache_requests_total', (self.name, 'hit'))
+            return self._value
+        with self._lock:
+            # Another thread may have refreshed the value while this one was waiting
+            if time.monotonic() < self._expires_at:
+                metrics.inc('cache_requests_total', (self.name, 'hit'))
+                return self._value
+            try:
+                version = get_versions(self.table_names)
+                if version != self._version:
+                    metrics.inc('cache_requests_total', (self.name, 'miss'))
+                    self._value = self.loader()
+                    self._version = version
+                else:
+                    metrics.inc('cache_requests_total', (self.name, 'hit'))
+            except Exception as e:
+                if self._version is None:
+                    raise
+                logger.error(f"Error refreshing the {', '.join(self.table_names)} cache, serving the cached value: {e}")
+            self._expires_at = time.monotonic() + self._ttl()
+            return self._value
+
+    def invalidate(self):
+        """
+        Drop the cached value; the next read reloads it from the database.
+        """
+        with self._lock:
+            self._value = None
+            self._version = None
+            self._expires_at = 0.0
@@ -0,0 +1,171 @@
+# utils/conditional.py
+import hashlib
+import logging
+from functools import wraps
+
+from flask import Response, current_app, request
+from flask_restx.representations import output_json
+from flask_restx.utils import merge, unpack
+
+from utils.includes import included_tables, parse_includes
+from utils.response_cache import response_cache
+from utils.versioning import get_versions, get_versions_async
+
+logger = logging.getLogger(__name__)
+
+
+def compute_etag(tables, versions=None):
+    """
+    Derive a strong ETag for the current request from the change counters of the
+    tables the response is built from. The request path, query string and the
+    headers that select the representation are part of the tag, so every URL
+    gets its own validator while no row needs to be read or serialized.
+
+    :param tables: Names of the tables the response depends on.
+    :param versions: Versions of the tables when already read (optional, read with get_versions otherwise).
+    :return: str: The unquoted entity tag.
+    """
+    if versions is None:
+        versions = get_versions(tables)
+    parts = [
+        request.path,
+        request.query_string.decode(),
+        request.headers.get(current_app.config["RESTX_MASK_HEADER"], ''),
+        request.headers.get('Accept', ''),
+        ','.join(f"{name}:{versions[name]}" for name in sorted(versions)),
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def request_tables(tables, model=None):
+    """
+    Add the tables of the related resources embedded with ?include= to the
+    tables a response depends on.
+
+    :param tables: Names of the tables the response depends on.
+    :param model: SQLAlchemy model the ?include= paths start from (optional).
+    :return: tuple: Table names.
+    """
+    value = request.args.get('include')
+    if model is None or not value:
+        return tables
+    try:
+        return tables + tuple(included_tables(model, parse_includes(model, value)))
+    except ValueError:
+        # Invalid paths are rejected by the request parser of the handler
+        return tables
+
+
+def _cached_response(etag):
+    """
+    Answer a conditional request without running the handler: 304 when the client
+    holds the current version, the cached body when another client fetched it.
+
+    :return: The Response, or None when the handler must run.
+    """
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    cached = response_cache.get(etag) if response_cache.max_bytes else None
+    if cached:
+        resp = Response(cached.body, cached.status, cached.headers)
+        resp.headers["X-Cache"] = "HIT"
+        return resp
+    return None
+
+
+def _tagged_response(resp, etag, depends_on):
+    """
+    Add the validator to a successful handler response and keep it in the response cache.
+    """
+    if not isinstance(resp, Response):
+        data, status, resp_headers = unpack(resp)
+        if status != 200:
+            return data, status, resp_headers
+        resp = output_json(data, status, resp_headers)
+        resp.mimetype = 'application/json'  # As set by Api.make_response
+    if resp.status_code != 200:
+        return resp
+
+    resp.headers.extend({"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+    # Streamed exports are not cached
+    if response_cache.max_bytes and not resp.is_streamed:
+        response_cache.set(etag, depends_on, resp.get_data(), resp.status_code, list(resp.headers))
+        resp.headers["X-Cache"] = "MISS"
+    return resp
+
+
+def _document_304(wrapper, func):
+    """
+    Document the 304 response of a conditional handler in Swagger.
+    """
+    wrapper.__apidoc__ = merge(getattr(func, "__apidoc__", {}), {
+        "responses": {"304": ("Not Modified: the version in If-None-Match is current", None, {})},
+    })
+    return wrapper
+
+
+def conditional_get(*tables, model=None):
+    """
+    Add ETag and If-None-Match support to a GET handler, and serve repeated
+    requests from the response cache.
+
+    The tag is computed before the handler runs, so a client holding the current
+    version gets a 304 Not Modified after a single version lookup, without
+    querying or marshalling the rows. The tag also keys the response cache (see
+    utils.response_cache): other clients get the cached body without running the
+    handler. Responses are marked 'no-cache' so browsers revalidate them instead
+    of serving a stale copy.
+
+    :param tables: Names of the tables the response depends on.
+    :param model: SQLAlchemy model whose ?include= relationships also feed the response (optional).
+    :return: Decorator
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                depends_on = request_tables(tables, model)
+                etag = compute_etag(depends_on)
+            except Exception as e:
+                logger.error(f"Error computing the ETag of {request.path}: {e}")
+                return func(*args, **kwargs)
+
+            cached = _cached_response(etag)
+            if cached is not None:
+                return cached
+            return _tagged_response(func(*args, **kwargs), etag, depends_on)
+
+        return _document_304(wrapper, func)
+    return decorator
+
+
+def async_conditional_get(*tables, model=None):
+    """
+    Async variant of conditional_get for the handlers of the ASGI serving mode
+    (see utils.asgi), which take the AsyncSession as first argument. The table
+    versions are read on that session; the response cache is shared with the
+    synchronous handlers of the same worker.
+
+    :param tables: Names of the tables the response depends on.
+    :param model: SQLAlchemy model whose ?include= relationships also feed the response (optional).
+    :return: Decorator
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(session, *args, **kwargs):
+            try:
+                depends_on = request_tables(tables, model)
+                etag = compute_etag(depends_on, await get_versions_async(session, depends_on))
+            except Exception as e:
+                logger.error(f"Error computing the ETag of {request.path}: {e}")
+                return await func(session, *args, **kwargs)
+
+            cached = _cached_response(etag)
+            if cached is not None:
+                return cached
+            return _tagged_response(await func(session, *args, **kwargs), etag, depends_on)
+
+        return wrapper
+    return decorator
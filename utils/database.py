@@ -1,7 +1,14 @@
 # Import the necessary modules from Flask and SQLAlchemy
-from flask import Flask
+import sqlite3
+from contextvars import ContextVar
+
+from flask import Flask, g, request
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect, update
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from werkzeug.exceptions import BadRequest, Conflict
 
 # Base class for SQLAlchemy models. All model classes will inherit from this class.
 # This allows SQLAlchemy to recognize them as models and interact with the database.
@@ -10,5 +17,178 @@ class Base(DeclarativeBase):
 
 # Create an instance of SQLAlchemy to manage database interactions
 # The 'model_class=Base' argument tells SQLAlchemy that all models will inherit from the Base class
-db = SQLAlchemy(model_class=Base)
+# Instances are not expired on commit: the services read them right after committing, and
+# expiring would reload every row with a second SELECT. Server defaults (created_at) are
+# already fetched by the INSERT itself through RETURNING.
+db = SQLAlchemy(model_class=Base, session_options={"expire_on_commit": False})
+
+# Whether the transactions of the current request only read (see use_read_only_session)
+_read_only = ContextVar('read_only', default=False)
+
+# Configuration keys of the PRAGMAs run on every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'SQLITE_JOURNAL_MODE',
+    'synchronous': 'SQLITE_SYNCHRONOUS',
+    'mmap_size': 'SQLITE_MMAP_SIZE',
+    'cache_size': 'SQLITE_CACHE_SIZE',
+    'busy_timeout': 'SQLITE_BUSY_TIMEOUT',
+    'foreign_keys': 'SQLITE_FOREIGN_KEYS',
+}
+
+
+
+# pysqlite does not emit BEGIN itself before a SAVEPOINT, so releasing the first
+# savepoint would commit the whole transaction. Take over transaction control so
+# nested transactions (used by the bulk endpoints) stay inside one transaction.
+@event.listens_for(Engine, "connect")
+def disable_pysqlite_transactions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.isolation_level = None
+
+
+@event.listens_for(Engine, "begin")
+def begin_sqlite_transaction(connection):
+    if connection.dialect.name == "sqlite":
+        # Transactions that may write take the write lock up front: a busy database
+        # then makes them wait for busy_timeout, whereas a read transaction upgraded
+        # to a write fails at once with "database is locked"
+        connection.exec_driver_sql("BEGIN" if _read_only.get() else "BEGIN IMMEDIATE")
+
+
+def engine_options(config):
+    """
+    Build the engine options of the configuration: a connection pool sized for
+    the request threads of a worker. A SQLite database in memory keeps the single
+    connection Flask-SQLAlchemy gives it.
+
+    :param config: Flask configuration.
+    :return: dict: Options for SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+    }
+
+
+def configure_sqlite(engine, config):
+    """
+    Run the PRAGMAs of the configuration (WAL journal, synchronous, mmap and cache
+    sizes, busy timeout, foreign keys) on every new connection of an engine.
+    PRAGMAs configured with an empty value keep the SQLite default.
+
+    :param engine: sqlalchemy.engine.Engine (the sync_engine of an async engine).
+    :param config: Flask configuration.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    statements = [
+        f"PRAGMA {pragma} = {config[key]}" for pragma, key in SQLITE_PRAGMAS.items() if str(config[key]).strip()
+    ]
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+class ReadOnlySession(Session):
+    """
+    Session of the GET requests (see use_read_only_session). Queries do not flush
+    first, and the read transaction is simply rolled back when the request ends.
+    The queries go to the replica chosen for the request, if any (see utils.replicas).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None and bind is None:
+            return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        raise RuntimeError("GET requests use a read-only session, nothing can be committed.")
+
+
+def init_database(app):
+    """
+    Initialize db for an application with the engine profile of its configuration,
+    and serve its GET requests with read-only sessions when READ_ONLY_GET_SESSIONS is set.
+
+    :param app: Flask application.
+    """
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(app.config), **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    }
+    # Read replicas are extra engines of db, with the same profile (see utils.replicas)
+    binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+    for i, uri in enumerate(app.config["DATABASE_REPLICA_URIS"]):
+        binds.setdefault(f"replica{i}", uri)
+    db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_sqlite(engine, app.config)
+    if not app.config["READ_ONLY_GET_SESSIONS"]:
+        return
+    read_only_sessions = sessionmaker(
+        class_=ReadOnlySession, db=db, autoflush=False, expire_on_commit=False
+    )
+
+    @app.before_request
+    def use_read_only_session():
+        if request.method in ("GET", "HEAD"):
+            g.read_only_token = _read_only.set(True)
+            db.session.remove()  # Close the session already opened by the request, if any
+            db.session.registry.set(read_only_sessions())
+
+    @app.teardown_request
+    def end_read_only_session(exc=None):
+        token = g.pop("read_only_token", None)
+        if token is not None:
+            _read_only.reset(token)
+
+
+def update_returning(model, ident, values):
+    """
+    Update one row with a single UPDATE ... RETURNING statement instead of loading
+    it first (SELECT) and flushing the changes (UPDATE).
+
+    :param model: SQLAlchemy model class
+    :param ident: Primary key of the row.
+    :param values: Column values to set.
+    :return: The updated instance, or None if no row has this primary key.
+    """
+    if not values:
+        return db.session.get(model, ident)
+    primary_key = inspect(model).primary_key[0]
+    statement = update(model).where(primary_key == ident).values(values).returning(model)
+    return db.session.execute(statement, execution_options={"populate_existing": True}).scalar_one_or_none()
+
+
+def integrity_error(error, deleting=False):
+    """
+    Translate an IntegrityError raised by a write into the HTTP error the client
+    gets: a duplicate of a unique column is a conflict, any other violated
+    constraint (a foreign key to a missing row, a missing mandatory column) is a
+    bad request. A delete fails only on the rows still referencing the deleted
+    one (the session nulls their foreign key first), which is a conflict too.
 
+    :param error: sqlalchemy.exc.IntegrityError
+    :param deleting: Whether the error was raised by a delete.
+    :return: werkzeug.exceptions.HTTPException to raise.
+    """
+    message = str(error.orig)
+    if deleting:
+        referencing = message.rpartition(': ')[2].partition('.')[0]
+        if message.startswith('NOT NULL constraint failed') and referencing:
+            return Conflict(f"The row is still referenced by {referencing}.")
+        return Conflict(f"The row is still referenced by other rows ({message}).")
+    if message.startswith('UNIQUE constraint failed'):
+        return Conflict(message)
+    if message.startswith('FOREIGN KEY constraint failed'):
+        return BadRequest("A referenced row does not exist (FOREIGN KEY constraint failed).")
+    return BadRequest(message)
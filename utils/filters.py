@@ -0,0 +1,205 @@
+# utils/filters.py
+import logging
+import re
+from collections import namedtuple
+from datetime import date, datetime
+
+from flask import current_app
+from flask_restx import inputs
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Integer, Numeric, UniqueConstraint, inspect
+
+logger = logging.getLogger(__name__)
+
+# A single compiled condition: column name, operator and coerced value
+Filter = namedtuple('Filter', ['field', 'operator', 'value'])
+
+# Supported operators and the SQLAlchemy expression each one compiles to
+OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'in': lambda column, value: column.in_(value),
+    'null': lambda column, value: column.is_(None) if value else column.isnot(None),
+}
+
+# Query string keys look like "status" or "start_date[gte]"
+FILTER_KEY = re.compile(r'^(?P<field>\w+)(?:\[(?P<operator>\w+)\])?$')
+
+
+def coerce_value(column, value):
+    """
+    Convert a query string value to the Python type of a column, using the same
+    type mapping generate_swagger_model applies to the Swagger fields.
+
+    :param column: SQLAlchemy column
+    :param value: The raw string value.
+    :return: The converted value.
+    """
+    column_type = type(column.type)
+    if column_type == Integer:
+        return int(value)
+    if column_type == Date:
+        return date.fromisoformat(value)
+    if column_type == DateTime:
+        return datetime.fromisoformat(value)
+    if column_type == Boolean:
+        return inputs.boolean(value)
+    if column_type in [Float, Numeric]:
+        return float(value)
+    return value
+
+
+def indexed_columns(model):
+    """
+    List the columns of a model that lead an index, a unique constraint or the
+    primary key, i.e. the columns a WHERE or ORDER BY can be served from.
+
+    :param model: SQLAlchemy model class
+    :return: set: Column names.
+    """
+    table = model.__table__
+    names = {column.name for column in inspect(model).primary_key}
+    names.update(list(index.columns)[0].name for index in table.indexes)
+    names.update(
+        list(constraint.columns)[0].name
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.columns
+    )
+    return names
+
+
+def index_orders(model):
+    """
+    List the column orders the indexes of a model return their rows in: the leading
+    plain columns of every index and unique constraint, followed by the primary key
+    SQLite ends every index of a rowid table with, and the primary key itself.
+
+    :param model: SQLAlchemy model class
+    :return: list: Lists of column names.
+    """
+    table = model.__table__
+    primary_key = [column.name for column in inspect(model).primary_key]
+    orders = [primary_key]
+    for index in table.indexes:
+        names = []
+        for expression in index.expressions:
+            if not isinstance(expression, Column):
+                break
+            names.append(expression.name)
+        orders.append(names)
+    orders.extend(
+        [column.name for column in constraint.columns]
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.columns
+    )
+    return [order + [name for name in primary_key if name not in order] for order in orders]
+
+
+def serves_order(model, filters, key):
+    """
+    Tell whether an index returns the rows matching the equality filters in the
+    order of the sort key, so a page stops reading after its last row instead of
+    sorting every matching row.
+
+    :param model: SQLAlchemy model class
+    :param filters: Filter tuples returned by parse_filters.
+    :param key: Name of the sort column.
+    :return: bool
+    """
+    equal = {f.field for f in filters if f.operator == 'eq'}
+    if key in equal:  # A single value of the sort key: the rows follow the primary key
+        equal.discard(key)
+        key = inspect(model).primary_key[0].name
+    return any(
+        set(order[:len(equal)]) == equal and len(order) > len(equal) and order[len(equal)] == key
+        for order in index_orders(model)
+    )
+
+
+def _unsupported(message):
+    # Apply the FILTER_UNINDEXED policy to a query no index supports
+    if current_app.config.get('FILTER_UNINDEXED', 'warn') == 'reject':
+        raise ValueError(message)
+    logger.warning(message)
+
+
+def check_indexed(model, names, usage, filters=None):
+    """
+    Apply the FILTER_UNINDEXED policy ('warn' or 'reject') to columns that are
+    used for filtering or sorting without a supporting index, and to a sort no
+    index can serve together with the equality filters of the request.
+
+    :param model: SQLAlchemy model class
+    :param names: Column names used by the request.
+    :param usage: What the columns are used for, for the message ('filtering' or 'sorting').
+    :param filters: With usage 'sorting', the filters of the request (optional).
+    :raises ValueError: When the policy is 'reject' and a column is not indexed.
+    """
+    unindexed = sorted(set(names) - indexed_columns(model))
+    if unindexed:
+        _unsupported(f"No index supports {usage} {model.__tablename__} by {', '.join(unindexed)}.")
+    elif filters and usage == 'sorting' and not serves_order(model, filters, names[0]):
+        fields = ', '.join(sorted({f.field for f in filters if f.operator == 'eq'}))
+        _unsupported(f"No index returns the {model.__tablename__} rows filtered by {fields} "
+                     f"in {names[0]} order: every matching row is sorted.")
+
+
+def parse_filters(model, args, reserved=()):
+    """
+    Parse the filter expressions of a query string.
+
+    Every argument that is not reserved must be a column of the model, optionally
+    followed by an operator in brackets (eq, ne, gt, gte, lt, lte, in, null).
+    Repeating an equality filter matches any of the given values.
+
+    :param model: SQLAlchemy model class
+    :param args: The request arguments (MultiDict).
+    :param reserved: Argument names handled by the request parser itself.
+    :return: list: Filter tuples with values converted to the column types.
+    :raises ValueError: For unknown columns or operators and invalid values.
+    """
+    columns = model.__table__.columns
+    filters = []
+    for key in args:
+        if key in reserved:
+            continue
+        match = FILTER_KEY.match(key)
+        if not match or match.group('field') not in columns:
+            raise ValueError(f"Unknown filter '{key}'. Available fields: {', '.join(columns.keys())}.")
+        field, operator = match.group('field'), match.group('operator') or 'eq'
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown operator '{operator}'. Available operators: {', '.join(OPERATORS)}.")
+
+        column = columns[field]
+        values = args.getlist(key)
+        try:
+            if operator == 'null':
+                value = inputs.boolean(values[-1])
+            elif operator == 'in' or (operator == 'eq' and len(values) > 1):
+                operator = 'in'
+                value = [coerce_value(column, item) for raw in values for item in raw.split(',')]
+            else:
+                value = coerce_value(column, values[-1])
+        except ValueError:
+            raise ValueError(f"Invalid value for filter '{key}'.")
+        filters.append(Filter(field, operator, value))
+
+    check_indexed(model, [f.field for f in filters], 'filtering')
+    return filters
+
+
+def apply_filters(query, model, filters=None):
+    """
+    Compile filters to parameterized WHERE clauses.
+
+    :param query: The query selecting the model.
+    :param model: SQLAlchemy model class
+    :param filters: Filter tuples returned by parse_filters.
+    :return: The filtered query.
+    """
+    for field, operator, value in filters or []:
+        query = query.filter(OPERATORS[operator](model.__table__.columns[field], value))
+    return query
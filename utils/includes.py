@@ -0,0 +1,151 @@
+# utils/includes.py
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+from utils.serialization import row_serializer
+
+# Longest relationship path accepted by ?include=, e.g. "tasks.employee.tasks"
+MAX_INCLUDE_DEPTH = 3
+
+
+def parse_includes(model, value):
+    """
+    Parse a comma-separated list of relationship paths into a tree.
+
+    "vehicle.client,tasks.employee" gives {'vehicle': {'client': {}}, 'tasks': {'employee': {}}}.
+
+    :param model: SQLAlchemy model class the paths start from.
+    :param value: The raw ?include= value.
+    :return: dict: Relationship names mapped to the tree of their own includes.
+    :raises ValueError: For unknown relationships and paths longer than MAX_INCLUDE_DEPTH.
+    """
+    tree = {}
+    for path in value.split(','):
+        names = [name.strip() for name in path.split('.') if name.strip()]
+        if not names:
+            continue
+        if len(names) > MAX_INCLUDE_DEPTH:
+            raise ValueError(f"Include '{path.strip()}' is nested deeper than {MAX_INCLUDE_DEPTH} levels.")
+        node, current = tree, model
+        for name in names:
+            relationships = inspect(current).relationships
+            if name not in relationships:
+                raise ValueError(
+                    f"Unknown include '{name}' on {current.__tablename__}. "
+                    f"Available includes: {', '.join(sorted(relationships.keys()))}."
+                )
+            node = node.setdefault(name, {})
+            current = relationships[name].mapper.class_
+    return tree
+
+
+def include_type(model):
+    """
+    Build a reqparse type that parses ?include= for a model (see parse_includes).
+
+    :param model: SQLAlchemy model class
+    :return: Callable raising ValueError for invalid paths.
+    """
+    def parse(value):
+        return parse_includes(model, value)
+
+    return parse
+
+
+def add_include_argument(parser, model):
+    """
+    Add the ?include= argument of a model to a request parser.
+
+    :param parser: flask_restx RequestParser
+    :param model: SQLAlchemy model class
+    :return: The same parser.
+    """
+    parser.add_argument('include', type=include_type(model), location='args',
+                        help='Comma-separated list of related resources to embed, '
+                             'nested with dots, e.g. "vehicle.client,tasks.employee".')
+    return parser
+
+
+def included_tables(model, tree):
+    """
+    List the tables an include tree reads from.
+
+    :param model: SQLAlchemy model class the tree starts from.
+    :param tree: Tree returned by parse_includes.
+    :return: list: Table names.
+    """
+    tables = []
+    for name, children in (tree or {}).items():
+        related = inspect(model).relationships[name].mapper.class_
+        tables.append(related.__tablename__)
+        tables.extend(included_tables(related, children))
+    return tables
+
+
+def _loader_options(model, tree, parent=None):
+    """
+    Yield one eager loading option per leaf of an include tree.
+    """
+    for name, children in tree.items():
+        relationship = inspect(model).relationships[name]
+        attribute = getattr(model, name)
+        if relationship.uselist:
+            # One extra SELECT ... WHERE fk IN (...) per level, whatever the number of rows
+            option = parent.selectinload(attribute) if parent else selectinload(attribute)
+        else:
+            # Many-to-one: joined in the same SELECT without multiplying the rows
+            option = parent.joinedload(attribute) if parent else joinedload(attribute)
+        if children:
+            yield from _loader_options(relationship.mapper.class_, children, option)
+        else:
+            yield option
+
+
+def load_includes(query, model, tree=None):
+    """
+    Eagerly load the related rows of an include tree: many-to-one relationships
+    are joined into the main SELECT and collections are loaded with one
+    SELECT ... IN per level, so the number of queries depends on the includes
+    only, never on the number of rows.
+
+    :param query: The query selecting the model.
+    :param model: SQLAlchemy model class
+    :param tree: Tree returned by parse_includes, or None.
+    :return: The query with the loader options.
+    """
+    if not tree:
+        return query
+    return query.options(*_loader_options(model, tree))
+
+
+def include_serializer(model, fields=None, tree=None):
+    """
+    Build a serializer that adds the related rows of an include tree to the
+    compiled serializer of a model (see utils.serialization). Related rows are
+    embedded under the relationship name, as an object or a list, with all
+    their columns.
+
+    :param model: SQLAlchemy model class
+    :param fields: Requested field names, or None for every column.
+    :param tree: Tree returned by parse_includes, or None.
+    :return: Callable converting an instance to a dictionary.
+    """
+    serialize = row_serializer(model, fields)
+    if not tree:
+        return serialize
+    nested = []
+    for name, children in tree.items():
+        relationship = inspect(model).relationships[name]
+        nested.append((name, relationship.uselist, include_serializer(relationship.mapper.class_, None, children)))
+
+    def serialize_with_includes(instance):
+        data = serialize(instance)
+        for name, uselist, serialize_related in nested:
+            related = getattr(instance, name)
+            if uselist:
+                data[name] = [serialize_related(row) for row in related]
+            else:
+                data[name] = serialize_related(related) if related is not None else None
+        return data
+
+    return serialize_with_includes
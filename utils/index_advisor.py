@@ -0,0 +1,157 @@
+# utils/index_advisor.py
+from urllib.parse import quote, urlencode
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import Engine
+
+from utils.filters import indexed_columns
+from utils.pagination import sort_keys
+
+# Read-only routes the advisor requests besides the collections and their details
+REPORT_PATHS = ['/api/dashboard/summary', '/api/report/revenue', '/api/report/workload']
+
+
+def _sample_row(connection, model):
+    # Values of an existing row, to build filters and lookups that match something
+    row = connection.execute(select(model.__table__).limit(1)).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def request_paths(app, connection, models):
+    """
+    Build the GET requests the advisor sends: for every collection of the given
+    models served by the API, the first page, the next page (keyset predicate), a page sorted by
+    every sort key and a page filtered on every indexed column; a detail; the
+    dashboard and reports; and searches and lookups with values of existing rows.
+
+    :param app: Flask application.
+    :param connection: SQLAlchemy connection
+    :param models: SQLAlchemy model classes
+    :return: list: Paths with their query string.
+    """
+    rules = {rule.rule for rule in app.url_map.iter_rules()}
+    paths = list(REPORT_PATHS)
+    samples = {}
+    for model in models:
+        table = model.__table__.name
+        base = f"/api/{table}/"
+        if base not in rules:
+            continue
+        sample = samples[table] = _sample_row(connection, model)
+        primary_key = inspect(model).primary_key[0].name
+        paths.append(f"{base}?limit=50")
+        paths.extend(f"{base}?{urlencode({'limit': 50, 'sort': f'-{key}'})}" for key in sort_keys(model))
+        if sample is None:
+            continue
+        paths.append(f"{base}{sample[primary_key]}")
+        for name in sorted(indexed_columns(model) - {primary_key}):
+            if sample.get(name) is not None:
+                paths.append(f"{base}?{urlencode({'limit': 50, name: sample[name]})}")
+
+    client, vehicle = samples.get('client'), samples.get('vehicle')
+    if client:
+        paths.append(f"/api/search/?q={quote(client['name'].split()[-1])}")
+        paths.append(f"/api/search/?q={quote(client['name'][:3])}&resource=client")
+        paths.append(f"/api/lookup/?{urlencode({'phone': client['phone']})}")
+        paths.append(f"/api/lookup/?{urlencode({'email': client['email']})}")
+    if vehicle:
+        paths.append(f"/api/lookup/?{urlencode({'plate': vehicle['license_plate']})}")
+        paths.append(f"/api/lookup/?{urlencode({'plate': vehicle['license_plate'][:4], 'prefix': 'true'})}")
+    return paths
+
+
+def capture_statements(app, paths):
+    """
+    Send GET requests through the application and capture the SELECT statements
+    they run, with the parameters of their first execution. The response cache is
+    bypassed because every path is requested once; the next page of every
+    collection is requested too, following the cursor of its X-Next-Cursor header.
+
+    :param app: Flask application.
+    :param paths: Paths with their query string.
+    :return: dict: The parameters of every distinct statement, by statement, and
+        the path that ran it first.
+    """
+    statements = {}
+    current = [None]
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+            statements.setdefault(statement, (parameters, current[0]))
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    try:
+        client = app.test_client()
+        for path in paths:
+            current[0] = path
+            cursor = client.get(path).headers.get('X-Next-Cursor')
+            if cursor:
+                current[0] = f"{path} (next page)"
+                separator = '&' if '?' in path else '?'
+                client.get(f"{path}{separator}{urlencode({'after': cursor})}")
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+    return statements
+
+
+def explain(connection, statement, parameters=()):
+    """
+    Run EXPLAIN QUERY PLAN for a statement.
+
+    :param connection: SQLAlchemy connection
+    :param statement: SQL statement, as sent to the driver.
+    :param parameters: Its bound parameters.
+    :return: list: The 'detail' column of every plan step.
+    """
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def is_full_scan(detail, tables):
+    """
+    Tell whether a plan step reads a whole table or sorts without an index.
+
+    :param detail: A plan step, e.g. 'SCAN task' or 'SEARCH task USING INDEX ...'.
+    :param tables: Names of the tables of the database (scans of subqueries, CTEs and
+        full-text indexes are not reported).
+    :return: bool
+    """
+    if 'TEMP B-TREE' in detail:
+        return True
+    words = detail.split()
+    return (len(words) > 1 and words[0] == 'SCAN' and words[1] in tables
+            and 'USING' not in detail and 'VIRTUAL TABLE' not in detail)
+
+
+def is_bounded_scan(statement, plan):
+    """
+    Tell whether a plan is a single table scan in primary key order stopped by the
+    LIMIT, like the first page of an unfiltered collection: it reads one page only.
+
+    :param statement: SQL statement, as sent to the driver.
+    :param plan: Its plan steps.
+    :return: bool
+    """
+    return len(plan) == 1 and plan[0].startswith('SCAN') and ' LIMIT ' in statement and ' WHERE ' not in statement
+
+
+def advise(app, connection, models, paths=()):
+    """
+    Explain the statements the application runs to answer its read requests (see
+    request_paths, plus the given paths) and collect the ones that need a full
+    table scan or a temporary sort.
+
+    :param app: Flask application.
+    :param connection: SQLAlchemy connection
+    :param models: SQLAlchemy model classes
+    :param paths: Additional paths to request.
+    :return: list: (path, statement, plan) tuples for the problematic statements.
+    """
+    tables = set(inspect(connection).get_table_names())
+    statements = capture_statements(app, request_paths(app, connection, models) + list(paths))
+    findings = []
+    for statement, (parameters, path) in statements.items():
+        plan = explain(connection, statement, parameters)
+        if any(is_full_scan(detail, tables) for detail in plan) and not is_bounded_scan(statement, plan):
+            findings.append((path, ' '.join(statement.split()), plan))
+    return findings
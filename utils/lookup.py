@@ -0,0 +1,97 @@
+# utils/lookup.py
+from sqlalchemy import func, literal
+
+# Characters ignored when comparing license plates ("AA-12-BB", "aa12bb", "AA 12 BB")
+PLATE_SEPARATORS = ('-', ' ', '.')
+
+# Characters ignored when comparing phone numbers ("912 345 678", "(+351) 912-345-678")
+PHONE_SEPARATORS = (' ', '-', '.', '(', ')', '+')
+
+
+def _strip(value, separators):
+    for separator in separators:
+        value = value.replace(separator, '')
+    return value
+
+
+def _strip_expression(column, separators):
+    # Literals rendered inline: SQLite only uses an expression index for the very
+    # same SQL text, which a bound parameter is not
+    expression = column
+    for separator in separators:
+        expression = func.replace(expression, literal(separator, literal_execute=True), literal('', literal_execute=True))
+    return expression
+
+
+def normalize_plate(value):
+    """
+    Normalize a license plate the way plate_key does in SQL.
+
+    :param value: The plate as typed or read by a camera.
+    :return: str: The plate in upper case without separators, e.g. 'AA12BB'.
+    """
+    return _strip(value, PLATE_SEPARATORS).upper()
+
+
+def plate_key(column):
+    """
+    SQL expression normalizing a license plate column (see normalize_plate).
+    Queries must use this exact expression for SQLite to use the expression index.
+
+    :param column: The license plate column.
+    :return: SQL expression
+    """
+    return func.upper(_strip_expression(column, PLATE_SEPARATORS))
+
+
+def normalize_phone(value):
+    """
+    Normalize a phone number the way phone_key does in SQL.
+
+    :param value: The phone number as typed.
+    :return: str: The phone number without separators, e.g. '912345678'.
+    """
+    return _strip(value, PHONE_SEPARATORS)
+
+
+def phone_key(column):
+    """
+    SQL expression normalizing a phone number column (see normalize_phone).
+
+    :param column: The phone number column.
+    :return: SQL expression
+    """
+    return _strip_expression(column, PHONE_SEPARATORS)
+
+
+def normalize_email(value):
+    """
+    Normalize an email address the way email_key does in SQL.
+
+    :param value: The email address as typed.
+    :return: str: The address in lower case without surrounding spaces.
+    """
+    return value.strip().lower()
+
+
+def email_key(column):
+    """
+    SQL expression normalizing an email address column (see normalize_email).
+
+    :param column: The email address column.
+    :return: SQL expression
+    """
+    return func.lower(func.trim(column))
+
+
+def prefix_range(expression, prefix):
+    """
+    Compare a normalized expression with a prefix as a half-open range, which
+    SQLite serves from the expression index (a LIKE would scan it).
+
+    :param expression: The indexed SQL expression.
+    :param prefix: The normalized, non-empty prefix.
+    :return: SQL condition
+    """
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (expression >= prefix) & (expression < upper_bound)
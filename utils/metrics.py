@@ -0,0 +1,296 @@
+# utils/metrics.py
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+from sqlalchemy import event
+
+from utils.response_cache import response_cache
+from utils.timing import on_statement_timed
+
+# Buckets (upper bounds in seconds) of the request and SQL statement latency histograms
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shard:
+    """
+    Counters and histograms updated by a single thread.
+    """
+
+    __slots__ = ('thread', 'values', 'histograms')
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.values = {}  # (name, label values): float
+        self.histograms = {}  # (name, label values): [count of every bucket and +Inf..., sum]
+
+    def merge(self, other):
+        for key, value in other.values.copy().items():
+            self.values[key] = self.values.get(key, 0) + value
+        for key, observed in other.histograms.copy().items():
+            merged = self.histograms.get(key)
+            if merged is None:
+                self.histograms[key] = list(observed)
+            else:
+                for i, value in enumerate(list(observed)):
+                    merged[i] += value
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms of the process, exposed in the Prometheus text
+    format. Every thread updates its own shard of the values, so recording takes
+    no lock; the shards are only summed when the metrics are scraped. The shards
+    of finished threads are folded into a single one whenever a new thread starts
+    recording (and at scrape time), so a server running a thread per request keeps
+    one shard per live thread.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()
+        self._families = {}  # name: (type, help, label names, buckets)
+        self._collectors = []
+
+    def counter(self, name, description, labels=()):
+        self._families[name] = ('counter', description, tuple(labels), None)
+
+    def gauge(self, name, description, labels=()):
+        self._families[name] = ('gauge', description, tuple(labels), None)
+
+    def histogram(self, name, description, labels=(), buckets=HTTP_BUCKETS):
+        self._families[name] = ('histogram', description, tuple(labels), tuple(buckets))
+
+    def collector(self, func):
+        """
+        Register a callable run at scrape time, returning (name, label values, value)
+        samples of counters and gauges read from elsewhere (pool, caches...).
+
+        :return: The callable, so the method can be used as a decorator.
+        """
+        self._collectors.append(func)
+        return func
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._retire_finished()
+                self._shards.append(shard)
+        return shard
+
+    def _retire_finished(self):
+        # Fold the shards of finished threads into the retired shard (the lock must be held)
+        finished = [shard for shard in self._shards if not shard.thread.is_alive()]
+        for shard in finished:
+            self._retired.merge(shard)
+            self._shards.remove(shard)
+
+    def inc(self, name, labels=(), value=1):
+        """
+        Add to a counter, or to a gauge (a negative value decrements it).
+
+        :param name: Name of the metric.
+        :param labels: Tuple of label values, in the order of the label names.
+        :param value: Amount to add.
+        """
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """
+        Record a value in a histogram.
+
+        :param name: Name of the histogram.
+        :param labels: Tuple of label values, in the order of the label names.
+        :param value: The observed value (seconds for the latency histograms).
+        """
+        histograms = self._shard().histograms
+        key = (name, labels)
+        observed = histograms.get(key)
+        if observed is None:
+            buckets = self._families[name][3]
+            observed = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        observed[bisect_left(self._families[name][3], value)] += 1
+        observed[-1] += value
+
+    def _collect(self):
+        # Sum the shards, folding the ones of finished threads into the retired shard
+        with self._lock:
+            self._retire_finished()
+            total = _Shard(None)
+            total.merge(self._retired)
+            for shard in list(self._shards):
+                total.merge(shard)
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                total.values[(name, labels)] = total.values.get((name, labels), 0) + value
+        return total
+
+    def render(self):
+        """
+        :return: str: Every metric in the Prometheus text exposition format.
+        """
+        total = self._collect()
+        samples = {}
+        for (name, labels), value in total.values.items():
+            samples.setdefault(name, []).append((labels, value))
+        for (name, labels), value in total.histograms.items():
+            samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, description, label_names, buckets) in self._families.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples.get(name, []), key=lambda sample: sample[0]):
+                if kind != 'histogram':
+                    lines.append(f"{name}{_labels(label_names, labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(label_names, labels, [('le', _number(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(label_names, labels)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(label_names, labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+# Metrics of the process, exposed by /metrics
+metrics = MetricsRegistry()
+metrics.histogram('http_request_duration_seconds', 'Latency of the HTTP requests.',
+                  labels=('namespace', 'method', 'route'))
+metrics.counter('http_requests_total', 'HTTP requests answered.', labels=('namespace', 'method', 'route', 'status'))
+metrics.gauge('http_requests_in_flight', 'HTTP requests being handled.', labels=('method',))
+metrics.histogram('db_statement_duration_seconds', 'Execution time of the SQL statements.',
+                  labels=('operation',), buckets=SQL_BUCKETS)
+metrics.counter('db_pool_checkouts_total', 'Connections checked out of the pool.', labels=('engine',))
+metrics.counter('db_pool_connections_total', 'Connections opened by the pool, overflow included.',
+                labels=('engine',))
+metrics.gauge('db_pool_size', 'Connections kept open by the pool.', labels=('engine',))
+metrics.gauge('db_pool_checked_out', 'Connections currently checked out of the pool.', labels=('engine',))
+metrics.gauge('db_pool_overflow', 'Connections opened above the pool size.', labels=('engine',))
+metrics.counter('cache_requests_total', 'Lookups of the in-process caches.', labels=('cache', 'result'))
+metrics.gauge('response_cache_bytes', 'Size of the cached responses.')
+metrics.gauge('response_cache_entries', 'Number of cached responses.')
+metrics.counter('response_cache_evictions_total', 'Responses dropped to stay within the size limit.')
+metrics.counter('response_cache_invalidations_total', 'Responses dropped because their tables changed.')
+
+
+def _observe_statement(statement, duration):
+    # Timed by the SQL hook of utils.timing, shared with the Server-Timing records
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    metrics.observe('db_statement_duration_seconds', (operation,), duration)
+
+
+def _watch_pool(name, engine):
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.inc('db_pool_checkouts_total', (name,))
+
+    def count_connection(dbapi_connection, connection_record):
+        metrics.inc('db_pool_connections_total', (name,))
+
+    event.listen(engine, "checkout", count_checkout)
+    event.listen(engine, "connect", count_connection)
+
+
+def init_metrics(app, api, engines):
+    """
+    Record the latency of every request, the SQL statements and the connection
+    pools, and serve them at /metrics in the Prometheus text format, when
+    METRICS_ENABLED is set.
+
+    :param app: Flask application.
+    :param api: flask_restx Api whose namespaces label the requests.
+    :param engines: Engines of the application by bind key (db.engines).
+    """
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    prefix = api.blueprint.url_prefix or ''
+    namespace_paths = sorted(
+        ((prefix + api.ns_paths.get(ns, f"/{ns.name}"), ns.name) for ns in api.namespaces),
+        key=lambda item: len(item[0]), reverse=True
+    )
+    namespaces = {}  # URL rule: namespace
+
+    def namespace_of(rule):
+        namespace = namespaces.get(rule)
+        if namespace is None:
+            namespace = next(
+                (name for path, name in namespace_paths if rule == path or rule.startswith(path.rstrip('/') + '/')), ''
+            )
+            namespaces[rule] = namespace
+        return namespace
+
+    on_statement_timed(_observe_statement)
+    pools = {}
+    for key, engine in engines.items():
+        name = key or 'default'
+        pools[name] = engine.pool
+        _watch_pool(name, engine)
+
+    @metrics.collector
+    def collect_pools():
+        for name, pool in pools.items():
+            if hasattr(pool, 'checkedout'):  # QueuePool (the in-memory SQLite pools have no size)
+                yield 'db_pool_size', (name,), pool.size()
+                yield 'db_pool_checked_out', (name,), pool.checkedout()
+                yield 'db_pool_overflow', (name,), max(0, pool.overflow())
+
+    @metrics.collector
+    def collect_response_cache():
+        stats = response_cache.stats()
+        yield 'cache_requests_total', ('response', 'hit'), stats['hits']
+        yield 'cache_requests_total', ('response', 'miss'), stats['misses']
+        yield 'response_cache_bytes', (), stats['bytes']
+        yield 'response_cache_entries', (), stats['entries']
+        yield 'response_cache_evictions_total', (), stats['evictions']
+        yield 'response_cache_invalidations_total', (), stats['invalidations']
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        metrics.inc('http_requests_in_flight', (request.method,))
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            labels = (namespace_of(rule) if request.url_rule is not None else '', request.method, rule)
+            metrics.observe('http_request_duration_seconds', labels, time.perf_counter() - start)
+            metrics.inc('http_requests_total', labels + (str(response.status_code),))
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(exc=None):
+        if g.pop('metrics_start', None) is not None:
+            metrics.inc('http_requests_in_flight', (request.method,), -1)
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
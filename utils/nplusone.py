@@ -0,0 +1,160 @@
+# utils/nplusone.py
+import logging
+import re
+import sysconfig
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, raiseload
+
+logger = logging.getLogger(__name__)
+
+# Statements counted by the detector: transaction control and PRAGMAs are not
+_IGNORED = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+
+# Lists of bound parameters, collapsed so IN (?, ?) and IN (?, ?, ?) are the same statement
+_PARAMETER_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+
+# Directories of the standard library and installed packages, whose frames are left out of the stack traces
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()[name] for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+
+# Statement counts of the current request, None when it is not tracked
+_tracker = ContextVar('nplusone_tracker', default=None)
+
+
+class NPlusOneError(Exception):
+    """
+    Raised in 'raise' mode when a request runs the same statement more times than
+    the threshold: a relationship is most likely loaded lazily in a loop.
+    """
+
+
+class _Tracker:
+    __slots__ = ('mode', 'threshold', 'counts', 'reported', 'context')
+
+    def __init__(self, mode, threshold):
+        self.mode = mode
+        self.threshold = threshold
+        self.counts = {}
+        self.reported = set()
+        self.context = None  # Execution context of the last statement counted
+
+
+def normalize_statement(statement):
+    """
+    Reduce a SQL statement to its structure: the values are already bound
+    parameters, only lists of parameters of varying length remain to collapse.
+
+    :param statement: SQL statement as sent to the driver.
+    :return: str
+    """
+    return _PARAMETER_LIST.sub('?', ' '.join(statement.split()))
+
+
+def _application_stack():
+    # Frames of the application code that led to the statement, outermost first
+    frames = [
+        frame for frame in traceback.extract_stack()[:-3]
+        if frame.filename != __file__ and not frame.filename.startswith(_LIBRARY_PATHS)
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    tracker = _tracker.get()
+    if tracker is None or statement.lstrip()[:9].upper().startswith(_IGNORED):
+        return
+    # An executemany sent in several batches (insertmanyvalues) is a single execution
+    if context is tracker.context:
+        return
+    tracker.context = context
+    key = normalize_statement(statement)
+    count = tracker.counts[key] = tracker.counts.get(key, 0) + 1
+    if count <= tracker.threshold or key in tracker.reported:
+        return
+    tracker.reported.add(key)
+    message = (
+        f"Possible N+1 query: the same statement ran {count} times in one request "
+        f"(threshold {tracker.threshold}):\n    {key}\nat:\n{_application_stack()}"
+    )
+    if tracker.mode == 'raise':
+        logger.error(message)
+        raise NPlusOneError(message)
+    logger.warning(message)
+
+
+@contextmanager
+def track_queries(mode='log', threshold=10):
+    """
+    Count the structurally identical statements run inside the block, and log
+    ('log') or raise NPlusOneError ('raise') with a stack trace the first time
+    one of them runs more than threshold times. Usable outside requests, e.g.
+    around a service call in a script.
+
+    :param mode: 'log' or 'raise'.
+    :param threshold: Runs of the same statement allowed.
+    :return: dict: The count of every statement, updated while the block runs.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+    tracker = _Tracker(mode, threshold)
+    token = _tracker.set(tracker)
+    try:
+        yield tracker.counts
+    finally:
+        _tracker.reset(token)
+
+
+@contextmanager
+def suspend_tracking():
+    """
+    Leave the statements run inside the block out of the counts of the current
+    request, for code repeating a statement on purpose (e.g. retrying the rows of
+    a failed batch one by one).
+    """
+    token = _tracker.set(None)
+    try:
+        yield
+    finally:
+        _tracker.reset(token)
+
+
+def _raise_on_lazy_load(orm_execute_state):
+    # Relationships not eagerly loaded by the query raise instead of emitting a SELECT
+    # when accessed; those already in the identity map are still returned
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload('*', sql_only=True))
+
+
+def init_nplusone(app):
+    """
+    Enable the N+1 query checks of the configuration, for development and test runs:
+    NPLUSONE_MODE ('log' or 'raise') tracks the statements of every request against
+    NPLUSONE_THRESHOLD, and STRICT_RELATIONSHIPS makes every lazy load of a
+    relationship defined in models/ raise, so it must be loaded with the query.
+
+    :param app: Flask application.
+    """
+    mode = app.config["NPLUSONE_MODE"]
+    if mode not in ('off', 'log', 'raise'):
+        raise ValueError(f"Unknown NPLUSONE_MODE {mode!r}, expected 'off', 'log' or 'raise'.")
+    if app.config["STRICT_RELATIONSHIPS"] and not event.contains(Session, "do_orm_execute", _raise_on_lazy_load):
+        event.listen(Session, "do_orm_execute", _raise_on_lazy_load)
+    if mode == 'off':
+        return
+    threshold = app.config["NPLUSONE_THRESHOLD"]
+
+    @app.before_request
+    def start_tracking_queries():
+        g.nplusone = track_queries(mode, threshold)
+        g.nplusone.__enter__()
+
+    @app.teardown_request
+    def stop_tracking_queries(exc=None):
+        tracking = g.pop('nplusone', None)
+        if tracking is not None:
+            tracking.__exit__(None, None, None)
@@ -0,0 +1,234 @@
+# utils/pagination.py
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
+
+from flask import current_app, request
+from flask_restx import abort, inputs, reqparse
+from sqlalchemy import func, inspect, literal, select, tuple_, type_coerce
+from sqlalchemy.types import NullType
+from werkzeug.exceptions import BadRequest
+
+from utils.filters import check_indexed, parse_filters
+from utils.projection import add_fields_argument
+
+# Timestamp columns listed first among the keyset sort keys when they are mandatory
+TIMESTAMP_SORT_KEYS = ('created_at', 'issued_at')
+
+
+def encode_cursor(sort, values):
+    """
+    Encode the keyset position of the last row of a page as an opaque token.
+
+    :param sort: The sort expression the page was generated with (e.g. '-issued_at').
+    :param values: The raw database values of the sort key and the primary key.
+    :return: A URL-safe cursor string.
+    """
+    payload = json.dumps({"s": sort, "v": list(values)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor produced by encode_cursor. Used as a reqparse type, so a
+    ValueError is reported to the client as a 400 error.
+
+    :param token: The opaque cursor string.
+    :return: dict: The sort expression ('sort') and the keyset values ('values').
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {"sort": payload["s"], "values": payload["v"]}
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("The cursor is not valid.")
+
+
+def sort_keys(model):
+    """
+    List the column names a collection of the given model can be sorted by.
+    Nullable columns are left out because NULLs cannot be compared in a keyset.
+
+    :param model: SQLAlchemy model class
+    :return: list: The primary key, the mandatory timestamp columns and the other mandatory columns.
+    """
+    columns = model.__table__.columns
+    keys = [column.name for column in columns if column.primary_key]
+    keys += [name for name in TIMESTAMP_SORT_KEYS if name in columns and not columns[name].nullable]
+    keys += [column.name for column in columns if not column.nullable and column.name not in keys]
+    return keys
+
+
+def page_limit(value):
+    """
+    reqparse type for the page size, bounded by PAGINATION_MAX_LIMIT.
+    """
+    limit = int(value)
+    max_limit = current_app.config.get('PAGINATION_MAX_LIMIT', 1000)
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f"The limit must be between 1 and {max_limit}.")
+    return limit
+
+
+class ListParser(reqparse.RequestParser):
+    """
+    Request parser for collection endpoints. On top of the declared arguments it
+    parses every other query string argument as a filter on the model columns
+    (see utils.filters) and returns them under the 'filters' key.
+    """
+
+    def __init__(self, *args, model=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.model = model
+
+    def copy(self):
+        parser = super().copy()
+        parser.model = self.model
+        return parser
+
+    def parse_args(self, req=None, strict=False):
+        args = super().parse_args(req, strict)
+        req = req or request
+        try:
+            args['filters'] = parse_filters(self.model, req.args, reserved=[arg.name for arg in self.args])
+            sort = args.get('sort') or (args['after']['sort'] if args.get('after') else None) or sort_keys(self.model)[0]
+            check_indexed(self.model, [sort.lstrip('-')], 'sorting', args['filters'])
+        except ValueError as e:
+            abort(400, 'Input payload validation failed', errors={'filters': str(e)})
+        return args
+
+
+def build_list_parser(model):
+    """
+    Build the query string parser shared by the collection endpoints of a model.
+
+    :param model: SQLAlchemy model class
+    :return: ListParser
+    """
+    keys = sort_keys(model)
+    parser = add_fields_argument(ListParser(model=model), model)
+    parser.add_argument('limit', type=page_limit, location='args',
+                        help='Maximum number of items per page.')
+    parser.add_argument('after', type=decode_cursor, location='args',
+                        help='Cursor returned in the X-Next-Cursor header of the previous page.')
+    parser.add_argument('sort', type=str, location='args',
+                        choices=keys + [f"-{key}" for key in keys],
+                        help='Sort key, prefix with "-" for descending order.')
+    parser.add_argument('count', type=inputs.boolean, location='args', default=False,
+                        dest='with_total', help='Include the total number of items in X-Total-Count.')
+    parser.add_argument('stream', type=inputs.boolean, location='args', default=False,
+                        help='Stream every item as newline-delimited JSON, ignoring pagination.')
+    return parser
+
+
+def _page(query, model, limit=None, after=None, sort=None):
+    """
+    Apply the keyset ordering, the cursor bound and the limit of a page to a
+    query, either a legacy Query or a select() statement (see paginate).
+
+    :return: tuple: The query, the sort key and the limit (None for the whole collection).
+    """
+    sort = sort or (after["sort"] if after else None) or sort_keys(model)[0]
+    if after and after["sort"] != sort:
+        raise BadRequest("The pagination cursor does not match the requested sort.")
+
+    descending = sort.startswith('-')
+    key_name = sort.lstrip('-')
+    mapper = inspect(model)
+    primary_key = mapper.primary_key[0]
+    key = model.__table__.columns[key_name]
+    keyset = [key] if key is primary_key else [key, primary_key]
+
+    if after:
+        if len(after["values"]) != len(keyset):
+            raise BadRequest("Invalid pagination cursor.")
+        # Compare against the raw stored values so mixed timestamp formats stay consistent
+        bounds = [literal(value) for value in after["values"]]
+        if len(keyset) == 1:
+            condition = keyset[0] < bounds[0] if descending else keyset[0] > bounds[0]
+        else:
+            condition = tuple_(*keyset) < tuple_(*bounds) if descending else tuple_(*keyset) > tuple_(*bounds)
+        query = query.filter(condition)
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in keyset])
+
+    limit = limit or current_app.config.get('PAGINATION_DEFAULT_LIMIT')
+    if not limit:
+        return query, sort, None
+
+    # Select the raw keyset values alongside the entities and fetch one extra row
+    # to find out whether another page exists
+    raw_keys = [type_coerce(column, NullType()).label(f"_cursor_{i}") for i, column in enumerate(keyset)]
+    return query.add_columns(*raw_keys).limit(limit + 1), sort, limit
+
+
+def _page_result(rows, sort, limit, total):
+    """
+    Build the page of the rows fetched for a limited page (see _page).
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, rows[-1][1:])
+    return {"items": [row[0] for row in rows], "next_cursor": next_cursor, "total": total}
+
+
+def paginate(query, model, limit=None, after=None, sort=None, with_total=False):
+    """
+    Apply keyset pagination to a query.
+
+    Rows are ordered by the sort key with the primary key as a tie-breaker and
+    the next page starts strictly after the (sort key, primary key) pair stored
+    in the cursor, so every page is an index range scan regardless of its depth.
+    When neither a limit nor a cursor is given (and PAGINATION_DEFAULT_LIMIT is
+    not set) the whole collection is returned.
+
+    :param query: The query selecting the model.
+    :param model: SQLAlchemy model class
+    :param limit: Maximum number of rows in the page.
+    :param after: Decoded cursor of the previous page.
+    :param sort: Sort expression, a column name optionally prefixed with '-'.
+    :param with_total: Whether to count all rows matching the query.
+    :return: dict: The page rows ('items'), the next cursor ('next_cursor') and the total ('total').
+    """
+    total = query.order_by(None).count() if with_total else None
+    query, sort, limit = _page(query, model, limit=limit, after=after, sort=sort)
+    if not limit:
+        return {"items": query.all(), "next_cursor": None, "total": total}
+    return _page_result(query.all(), sort, limit, total)
+
+
+async def paginate_async(session, statement, model, limit=None, after=None, sort=None, with_total=False):
+    """
+    Async variant of paginate for a select() statement run on an AsyncSession.
+
+    :param session: sqlalchemy.ext.asyncio.AsyncSession
+    :param statement: The select() statement of the model.
+    :return: dict: The page rows ('items'), the next cursor ('next_cursor') and the total ('total').
+    """
+    total = None
+    if with_total:
+        total = await session.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+    statement, sort, limit = _page(statement, model, limit=limit, after=after, sort=sort)
+    if not limit:
+        return {"items": (await session.scalars(statement)).unique().all(), "next_cursor": None, "total": total}
+    return _page_result((await session.execute(statement)).unique().all(), sort, limit, total)
+
+
+def pagination_headers(page):
+    """
+    Build the response headers describing a page.
+
+    :param page: The dictionary returned by paginate.
+    :return: dict: X-Next-Cursor, Link and X-Total-Count headers when applicable.
+    """
+    headers = {}
+    if page.get("next_cursor"):
+        args = request.args.to_dict()
+        args["after"] = page["next_cursor"]
+        headers["X-Next-Cursor"] = page["next_cursor"]
+        headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    if page.get("total") is not None:
+        headers["X-Total-Count"] = str(page["total"])
+    return headers
@@ -0,0 +1,110 @@
+# utils/projection.py
+from flask_restx import reqparse
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+from utils.includes import include_serializer
+from utils.timing import timed_serialization
+
+
+def column_names(model, fields=None):
+    """
+    Resolve the column names to load for a model.
+
+    :param model: SQLAlchemy model class
+    :param fields: Requested field names, or None for every column.
+    :return: list: Column names in table order, always including the primary key.
+    """
+    names = [column.name for column in model.__table__.columns]
+    if not fields:
+        return names
+    primary_keys = {column.name for column in inspect(model).primary_key}
+    return [name for name in names if name in fields or name in primary_keys]
+
+
+def fields_type(model):
+    """
+    Build a reqparse type that parses a comma-separated list of fields of a model.
+
+    :param model: SQLAlchemy model class
+    :return: Callable raising ValueError for unknown fields.
+    """
+    available = [column.name for column in model.__table__.columns]
+
+    def parse(value):
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in available]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(available)}.")
+        return fields
+
+    return parse
+
+
+def add_fields_argument(parser, model):
+    """
+    Add the ?fields= argument of a model to a request parser.
+
+    :param parser: flask_restx RequestParser
+    :param model: SQLAlchemy model class
+    :return: The same parser.
+    """
+    parser.add_argument('fields', type=fields_type(model), location='args',
+                        help='Comma-separated list of fields to return, e.g. "name,email".')
+    return parser
+
+
+def build_fields_parser(model):
+    """
+    Build a query string parser accepting ?fields= for a model.
+
+    :param model: SQLAlchemy model class
+    :return: flask_restx RequestParser
+    """
+    return add_fields_argument(reqparse.RequestParser(), model)
+
+
+def load_fields(query, model, fields=None):
+    """
+    Restrict the columns selected by a query to the requested fields, so the
+    projection happens in the SQL SELECT instead of at marshalling time.
+
+    :param query: The query selecting the model.
+    :param model: SQLAlchemy model class
+    :param fields: Requested field names, or None to load every column.
+    :return: The query with a load_only option when fields are given.
+    """
+    if not fields:
+        return query
+    return query.options(load_only(*[getattr(model, name) for name in column_names(model, fields)]))
+
+
+def to_dict(instance, model, fields=None, include=None):
+    """
+    Convert a model instance to a dictionary of its (requested) columns with the
+    compiled serializer of the model (see utils.serialization).
+    Only loaded columns are read, so no lazy load is triggered.
+
+    :param instance: Model instance
+    :param model: SQLAlchemy model class
+    :param fields: Requested field names, or None for every column.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: dict
+    """
+    with timed_serialization():
+        return include_serializer(model, fields, include)(instance)
+
+
+def to_dicts(instances, model, fields=None, include=None):
+    """
+    Convert model instances to dictionaries, looking the compiled serializer up once.
+
+    :param instances: Model instances
+    :param model: SQLAlchemy model class
+    :param fields: Requested field names, or None for every column.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: list: dicts
+    """
+    serialize = include_serializer(model, fields, include)
+    with timed_serialization():
+        return [serialize(instance) for instance in instances]
@@ -0,0 +1,329 @@
+# utils/replicas.py
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models.table_version import TableVersion
+from utils.database import _read_only, db
+from utils.versioning import get_versions
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the SQLALCHEMY_BINDS keys of the replica engines (see utils.database.init_database)
+REPLICA_BIND_PREFIX = 'replica'
+
+# Header and cookie carrying the table versions written by a client, so its next
+# reads only go to replicas that already have them (read-after-write consistency)
+CONSISTENCY_HEADER = 'X-Consistency-Token'
+CONSISTENCY_COOKIE = 'consistency_token'
+
+
+def parse_token(token):
+    """
+    Parse a consistency token: comma separated table:version pairs.
+    Malformed pairs are ignored.
+
+    :param token: The token sent by the client, or None.
+    :return: dict: The minimum version of every table.
+    """
+    versions = {}
+    for pair in (token or '').split(','):
+        table_name, _, version = pair.strip().partition(':')
+        if table_name and version.isdigit():
+            versions[table_name] = max(versions.get(table_name, 0), int(version))
+    return versions
+
+
+def format_token(versions):
+    """
+    Build the consistency token of table versions (see parse_token).
+    """
+    return ','.join(f"{table_name}:{version}" for table_name, version in sorted(versions.items()))
+
+
+def _covers(versions, required):
+    # Whether a database at these table versions has every change of the required ones
+    return all(versions.get(table_name, 0) >= version for table_name, version in required.items())
+
+
+def _read_versions(engine):
+    # Read all the table change counters of an engine in a read (deferred) transaction
+    token = _read_only.set(True)
+    try:
+        with engine.connect() as connection:
+            statement = select(TableVersion.table_name, TableVersion.version)
+            return dict(connection.execute(statement).all())
+    finally:
+        _read_only.reset(token)
+
+
+class Replica:
+    """
+    A read replica engine, with the replication state observed by the last check.
+    """
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.available = False
+        # Table versions of the replica, and the last time the primary was at versions it has
+        self.versions = {}
+        self.synced_at = None
+
+    @property
+    def lag(self):
+        """
+        Seconds since the primary was last known to be at a state the replica has
+        caught up with: an upper bound of the replication lag (inf before the first check).
+        """
+        if not self.available or self.synced_at is None:
+            return float('inf')
+        return time.monotonic() - self.synced_at
+
+
+class RoundRobinSelector:
+    """
+    Spread the reads evenly over the eligible replicas.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def __call__(self, replicas):
+        return replicas[next(self._counter) % len(replicas)]
+
+
+class LeastLagSelector:
+    """
+    Send the reads to the eligible replica with the lowest replication lag.
+    """
+
+    def __call__(self, replicas):
+        return min(replicas, key=lambda replica: replica.lag)
+
+
+# Replica selection policies, by name of the REPLICA_SELECTOR setting. A selector
+# is a callable choosing one of a non-empty list of eligible replicas.
+REPLICA_SELECTORS = {
+    'round_robin': RoundRobinSelector,
+    'least_lag': LeastLagSelector,
+}
+
+
+class ReplicaSet:
+    """
+    Read replicas of the primary database. The replication lag of every replica
+    is tracked by comparing its table change counters (see utils.versioning) with
+    a short history of the counters of the primary, checked at most once per
+    interval by whichever request comes first.
+    """
+
+    def __init__(self, primary, replicas, selector, max_lag=5.0, check_interval=1.0):
+        """
+        :param primary: Engine of the primary database.
+        :param replicas: List of Replica.
+        :param selector: Callable choosing one of the eligible replicas (see REPLICA_SELECTORS).
+        :param max_lag: Seconds of lag above which a replica is not read from.
+        :param check_interval: Seconds between two checks of the replication lag.
+        """
+        self.primary = primary
+        self.replicas = replicas
+        self.selector = selector
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = None
+        # (time, table versions) of the primary, oldest first
+        self._history = deque(maxlen=int(max_lag / check_interval) + 2 if check_interval > 0 else 2)
+
+    def refresh(self, force=False):
+        """
+        Check the replication lag of the replicas when the interval has elapsed.
+        Only one thread checks at a time, the others keep the last observed state.
+
+        :param force: Check even if the interval has not elapsed.
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._checked_at = now
+            try:
+                # The primary is read first: a replica having these versions has every
+                # change committed before this point in time
+                self._history.append((now, _read_versions(self.primary)))
+            except Exception as e:
+                logger.error(f"Error reading the table versions of the primary database: {e}")
+                return
+            for replica in self.replicas:
+                self._check(replica)
+        finally:
+            self._lock.release()
+
+    def _check(self, replica):
+        try:
+            replica.versions = _read_versions(replica.engine)
+        except Exception as e:
+            if replica.available:
+                logger.warning(f"Replica {replica.name} is unavailable: {e}")
+            replica.available = False
+            return
+        replica.available = True
+        for checked_at, versions in reversed(self._history):
+            if _covers(replica.versions, versions):
+                replica.synced_at = max(replica.synced_at or checked_at, checked_at)
+                break
+
+    def select(self, required=None):
+        """
+        Choose the replica to read from.
+
+        :param required: Table versions the reads must see (parsed consistency token).
+        :return: Replica, or None to read from the primary.
+        """
+        self.refresh()
+        eligible = [
+            replica for replica in self.replicas
+            if replica.lag <= self.max_lag and _covers(replica.versions, required or {})
+        ]
+        return self.selector(eligible) if eligible else None
+
+    def stats(self):
+        """
+        :return: dict: The availability, lag and table versions of every replica.
+        """
+        return {
+            replica.name: {'available': replica.available, 'lag': replica.lag, 'versions': replica.versions}
+            for replica in self.replicas
+        }
+
+
+def sync_replicas():
+    """
+    Copy the primary database into every replica with the SQLite online backup
+    API, for replicas kept as local SQLite files (development, tests). Readers of
+    the replicas keep running during the copy.
+
+    :return: list: The names of the replicas copied.
+    """
+    replicas = get_replica_set()
+    if replicas is None:
+        return []
+    if replicas.primary.dialect.name != "sqlite":
+        raise ValueError("flask sync-replicas only copies SQLite databases, replicate the others with the database tools.")
+    source = replicas.primary.raw_connection()
+    try:
+        for replica in replicas.replicas:
+            target = replica.engine.raw_connection()
+            try:
+                source.driver_connection.backup(target.driver_connection)
+            finally:
+                target.close()
+    finally:
+        source.close()
+    replicas.refresh(force=True)
+    return [replica.name for replica in replicas.replicas]
+
+
+def _selector(config):
+    selector = config["REPLICA_SELECTOR"]
+    if callable(selector):
+        return selector
+    if selector not in REPLICA_SELECTORS:
+        raise ValueError(f"Unknown REPLICA_SELECTOR {selector!r}, expected one of {', '.join(REPLICA_SELECTORS)}.")
+    return REPLICA_SELECTORS[selector]()
+
+
+def replica_keys(config):
+    """
+    :return: list: The SQLALCHEMY_BINDS keys of the replicas configured in DATABASE_REPLICA_URIS.
+    """
+    return [f"{REPLICA_BIND_PREFIX}{i}" for i in range(len(config["DATABASE_REPLICA_URIS"]))]
+
+
+def get_replica_set():
+    """
+    :return: ReplicaSet of the current application, or None without replicas.
+    """
+    return current_app.extensions.get('replicas')
+
+
+def init_replicas(app):
+    """
+    Route the reads of the GET requests to the replicas configured in
+    DATABASE_REPLICA_URIS. Writes and every other request use the primary, and a
+    client that just wrote reads from the primary until a replica has its changes.
+    Needs the read-only GET sessions (READ_ONLY_GET_SESSIONS).
+
+    :param app: Flask application initialized with utils.database.init_database.
+    """
+    keys = replica_keys(app.config)
+    if not keys:
+        return
+    if not app.config["READ_ONLY_GET_SESSIONS"]:
+        logger.warning("DATABASE_REPLICA_URIS is ignored: the replicas need READ_ONLY_GET_SESSIONS.")
+        return
+    with app.app_context():
+        replicas = ReplicaSet(
+            primary=db.engines[None],
+            replicas=[Replica(key, db.engines[key]) for key in keys],
+            selector=_selector(app.config),
+            max_lag=app.config["REPLICA_MAX_LAG"],
+            check_interval=app.config["REPLICA_LAG_CHECK_INTERVAL"],
+        )
+    app.extensions['replicas'] = replicas
+
+    # Registered after the hook of init_database opening the read-only session
+    @app.before_request
+    def route_to_replica():
+        if not _read_only.get():
+            return
+        required = parse_token(request.headers.get(CONSISTENCY_HEADER) or request.cookies.get(CONSISTENCY_COOKIE))
+        replica = replicas.select(required)
+        if replica is not None:
+            db.session().info['replica'] = replica
+            g.replica = replica  # For the async handlers, which open their own sessions (see utils.asgi)
+
+    @app.after_request
+    def send_consistency_token(response):
+        written = g.pop('written_versions', None)
+        if written:
+            versions = parse_token(request.headers.get(CONSISTENCY_HEADER) or request.cookies.get(CONSISTENCY_COOKIE))
+            for table_name, version in written.items():
+                versions[table_name] = max(versions.get(table_name, 0), version)
+            token = format_token(versions)
+            response.headers[CONSISTENCY_HEADER] = token
+            # Once a replica is read from, it is at most max_lag seconds behind: a write
+            # older than that is on every eligible replica and needs no token anymore
+            response.set_cookie(CONSISTENCY_COOKIE, token, max_age=max(1, int(replicas.max_lag + 1)),
+                                httponly=True, samesite='Lax')
+        return response
+
+
+@event.listens_for(Session, "before_commit")
+def read_written_versions(session):
+    # Table versions written by the request, sent back as its consistency token. They
+    # were just bumped by utils.versioning (imported, so listening, first): read them back
+    # only when there are replicas
+    if not has_request_context() or get_replica_set() is None:
+        return
+    changed = session.info.get('changed_tables')
+    if changed:
+        session.info['committed_versions'] = get_versions(sorted(changed), session)
+
+
+@event.listens_for(Session, "after_commit")
+def remember_written_versions(session):
+    versions = session.info.pop('committed_versions', None)
+    if versions and has_request_context():
+        written = g.setdefault('written_versions', {})
+        for table_name, version in versions.items():
+            written[table_name] = max(written.get(table_name, 0), version)
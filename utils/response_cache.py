@@ -0,0 +1,126 @@
+# utils/response_cache.py
+import threading
+from collections import OrderedDict, namedtuple
+
+from utils.versioning import on_tables_committed
+
+# A cached response: what it was built from and what to send back
+CachedResponse = namedtuple('CachedResponse', ['tables', 'body', 'status', 'headers', 'size'])
+
+
+class ResponseCache:
+    """
+    Least recently used cache of serialized GET responses, bounded by the total
+    size of the cached bodies.
+
+    Entries are keyed by the request ETag (see utils.conditional), which already
+    includes the route, the query arguments and the version of every table the
+    response is built from, so a response can never outlive a change made by any
+    worker. Entries of the tables changed by a local commit are also dropped right
+    away to give their memory back.
+    """
+
+    def __init__(self, max_bytes=0):
+        """
+        :param max_bytes: Total size of the cached bodies; 0 disables the cache.
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_table = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        Look up a response and mark it as recently used.
+
+        :param key: The cache key.
+        :return: CachedResponse or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, tables, body, status, headers):
+        """
+        Store a response, evicting the least recently used ones to stay within max_bytes.
+
+        :param key: The cache key.
+        :param tables: Names of the tables the response is built from.
+        :param body: The serialized body (bytes).
+        :param status: The HTTP status code.
+        :param headers: The response headers, as a list of (name, value) tuples.
+        """
+        size = len(body) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            while self._entries and self._size + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = CachedResponse(tuple(tables), body, status, headers, size)
+            self._size += size
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+
+    def invalidate(self, tables):
+        """
+        Drop every response built from one of the given tables.
+
+        :param tables: Names of the changed tables.
+        """
+        with self._lock:
+            for table in tables:
+                for key in self._keys_by_table.pop(table, set()):
+                    if self._remove(key):
+                        self.invalidations += 1
+
+    def clear(self):
+        """
+        Drop every cached response.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self._size = 0
+
+    def stats(self):
+        """
+        :return: dict: Usage counters and current size of the cache.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._size -= entry.size
+        for table in entry.tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+        return True
+
+
+# Process-wide cache shared by the GET handlers, sized from RESPONSE_CACHE_MAX_BYTES
+response_cache = ResponseCache()
+on_tables_committed(response_cache.invalidate)
@@ -0,0 +1,129 @@
+# utils/rollups.py
+import logging
+
+from sqlalchemy import inspect, text
+
+from models.revenue import RevenueClient, RevenueDaily, RevenueMonthly
+from utils.database import db
+from utils.versioning import bump_version, track_derived_tables
+
+logger = logging.getLogger(__name__)
+
+# Key columns of every revenue rollup, as SQL expressions over an invoice row
+# ({row} is NEW or OLD in the triggers, invoice when rebuilding)
+ROLLUP_KEYS = {
+    RevenueDaily: {'day': "date({row}.issued_at)"},
+    RevenueMonthly: {'month': "strftime('%Y-%m', {row}.issued_at)"},
+    RevenueClient: {'client_id': "{row}.client_id", 'month': "strftime('%Y-%m', {row}.issued_at)"},
+}
+
+
+def _add(model, row):
+    """
+    SQL adding one invoice to the rollup row of its period, creating it on first use.
+    """
+    keys = ROLLUP_KEYS[model]
+    return (
+        f"INSERT INTO {model.__tablename__} ({', '.join(keys)}, invoice_count, total, total_with_iva) "
+        f"VALUES ({', '.join(keys.values())}, 1, {{row}}.total, {{row}}.total_with_iva) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET invoice_count = invoice_count + 1, "
+        f"total = total + excluded.total, total_with_iva = total_with_iva + excluded.total_with_iva;"
+    ).format(row=row)
+
+
+def _subtract(model, row):
+    """
+    SQL removing one invoice from the rollup row of its period, dropping the row once empty.
+    """
+    keys = ROLLUP_KEYS[model]
+    where = ' AND '.join(f"{name} = {expression}" for name, expression in keys.items())
+    return (
+        f"UPDATE {model.__tablename__} SET invoice_count = invoice_count - 1, "
+        f"total = total - {{row}}.total, total_with_iva = total_with_iva - {{row}}.total_with_iva "
+        f"WHERE {where}; "
+        f"DELETE FROM {model.__tablename__} WHERE {where} AND invoice_count <= 0;"
+    ).format(row=row)
+
+
+# Triggers keeping the rollups in step with the invoice table, in the transaction
+# of the write, whichever code path (service, bulk endpoint, SQL) changes it
+TRIGGERS = {
+    'invoice_revenue_insert': (
+        "AFTER INSERT ON invoice",
+        [_add(model, 'NEW') for model in ROLLUP_KEYS],
+    ),
+    'invoice_revenue_update': (
+        "AFTER UPDATE OF client_id, issued_at, total, total_with_iva ON invoice",
+        [_subtract(model, 'OLD') for model in ROLLUP_KEYS] + [_add(model, 'NEW') for model in ROLLUP_KEYS],
+    ),
+    'invoice_revenue_delete': (
+        "AFTER DELETE ON invoice",
+        [_subtract(model, 'OLD') for model in ROLLUP_KEYS],
+    ),
+}
+
+# Commits changing invoices change the rollups through the triggers too
+track_derived_tables('invoice', [model.__tablename__ for model in ROLLUP_KEYS])
+
+
+def trigger_statements():
+    """
+    Build the CREATE TRIGGER statements of the revenue rollups.
+
+    :return: list: SQL statements.
+    """
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {name} {event} FOR EACH ROW BEGIN {' '.join(body)} END"
+        for name, (event, body) in TRIGGERS.items()
+    ]
+
+
+def rebuild_rollups():
+    """
+    Recreate the invoice triggers and recompute every rollup from the invoice
+    table in a single transaction. Needed once for a database that had invoices
+    before the rollups existed, or to discard the rounding drift of the floats.
+
+    :return: dict: The number of rows of every rollup table.
+    """
+    try:
+        for name in TRIGGERS:
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in trigger_statements():
+            db.session.execute(text(statement))
+
+        counts = {}
+        for model, keys in ROLLUP_KEYS.items():
+            table = model.__tablename__
+            expressions = [expression.format(row='invoice') for expression in keys.values()]
+            db.session.execute(text(f"DELETE FROM {table}"))
+            db.session.execute(text(
+                f"INSERT INTO {table} ({', '.join(keys)}, invoice_count, total, total_with_iva) "
+                f"SELECT {', '.join(expressions)}, count(*), sum(invoice.total), sum(invoice.total_with_iva) "
+                f"FROM invoice GROUP BY {', '.join(expressions)}"
+            ))
+            counts[table] = db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            bump_version(table)
+        db.session.commit()
+        return counts
+    except Exception as e:
+        logger.error(f"Error rebuilding the revenue rollups: {e}")
+        db.session.rollback()
+        raise
+
+
+def create_rollups():
+    """
+    Create the rollup tables and the invoice triggers when they are missing, so
+    a database created before the rollups existed is filled once and then kept
+    up to date. Nothing happens when the invoice table itself does not exist yet.
+    """
+    if not inspect(db.engine).has_table('invoice'):
+        return
+    for model in ROLLUP_KEYS:
+        model.__table__.create(bind=db.engine, checkfirst=True)
+    existing = set(db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+    db.session.commit()
+    if not set(TRIGGERS) <= existing:
+        logger.info("Building the revenue rollups from the invoice table.")
+        rebuild_rollups()
@@ -0,0 +1,191 @@
+# utils/search.py
+import logging
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+
+from models.client import Client
+from models.task import Task
+from models.vehicle import Vehicle
+from models.work import Work
+from utils.database import db
+from utils.versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+# FTS5 table holding one document per searchable row
+SEARCH_TABLE = 'search_index'
+
+# Number of resources sharing the index: the rowid of a document is
+# <primary key> * RESOURCE_COUNT + <code of the resource>, so a document is found
+# by rowid when its row changes
+RESOURCE_COUNT = 4
+
+# Vehicle columns added to the documents of the works, so "Corolla pastilhas"
+# finds the brake pad works done on a Corolla
+_WORK_VEHICLE = (
+    "(SELECT vehicle.brand || ' ' || vehicle.model || ' ' || vehicle.license_plate "
+    "FROM vehicle WHERE vehicle.vehicle_id = {row}.vehicle_id)"
+)
+
+# Searchable resources: code, indexed columns and the SQL expression of the
+# document text over a row ({row} is NEW or OLD in the triggers, the table when rebuilding)
+SEARCH_SOURCES = {
+    Client: {'code': 0, 'columns': ['name', 'email', 'address']},
+    Vehicle: {'code': 1, 'columns': ['brand', 'model', 'license_plate']},
+    Work: {'code': 2, 'columns': ['description', 'vehicle_id'], 'extra': _WORK_VEHICLE},
+    Task: {'code': 3, 'columns': ['description']},
+}
+
+
+def _content(model, row):
+    """
+    SQL expression of the document text of a row.
+    """
+    source = SEARCH_SOURCES[model]
+    parts = [f"coalesce({row}.{name}, '')" for name in source['columns'] if name != 'vehicle_id']
+    if source.get('extra'):
+        parts.append(f"coalesce({source['extra'].format(row=row)}, '')")
+    return " || ' ' || ".join(parts)
+
+
+def _rowid(model, row):
+    """
+    SQL expression of the document rowid of a row.
+    """
+    primary_key = inspect(model).primary_key[0].name
+    return f"{row}.{primary_key} * {RESOURCE_COUNT} + {SEARCH_SOURCES[model]['code']}"
+
+
+def _index(model, row, where=None):
+    """
+    SQL (re)indexing the rows of a model: the row of a trigger, or every row
+    matching a condition when selecting from the table itself.
+    """
+    primary_key = inspect(model).primary_key[0].name
+    values = f"{_rowid(model, row)}, '{model.__tablename__}', {row}.{primary_key}, {_content(model, row)}"
+    insert = f"INSERT INTO {SEARCH_TABLE} (rowid, resource, resource_id, content)"
+    if row in ('NEW', 'OLD'):
+        return f"{insert} VALUES ({values});"
+    return f"{insert} SELECT {values} FROM {row}" + (f" WHERE {where};" if where else ";")
+
+
+def _unindex(model, row):
+    """
+    SQL removing the document of a trigger row.
+    """
+    return f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {_rowid(model, row)};"
+
+
+def _triggers():
+    """
+    Build the triggers keeping the search index in step with the indexed tables,
+    in the transaction of the write, whichever code path changes them.
+
+    :return: dict: The event and the statements of every trigger by name.
+    """
+    triggers = {}
+    for model, source in SEARCH_SOURCES.items():
+        table = model.__tablename__
+        columns = ', '.join(source['columns'])
+        triggers[f"{table}_search_insert"] = (f"AFTER INSERT ON {table}", [_index(model, 'NEW')])
+        triggers[f"{table}_search_update"] = (
+            f"AFTER UPDATE OF {columns} ON {table}",
+            [_unindex(model, 'OLD'), _index(model, 'NEW')],
+        )
+        triggers[f"{table}_search_delete"] = (f"AFTER DELETE ON {table}", [_unindex(model, 'OLD')])
+    # The documents of the works embed the vehicle columns
+    triggers['vehicle_search_update'][1].extend([
+        f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+        f"(SELECT {_rowid(Work, 'work')} FROM work WHERE work.vehicle_id = NEW.vehicle_id);",
+        _index(Work, 'work', where='work.vehicle_id = NEW.vehicle_id'),
+    ])
+    return triggers
+
+
+TRIGGERS = _triggers()
+
+
+def trigger_statements():
+    """
+    Build the CREATE TRIGGER statements of the search index.
+
+    :return: list: SQL statements.
+    """
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {name} {event} FOR EACH ROW BEGIN {' '.join(body)} END"
+        for name, (event, body) in TRIGGERS.items()
+    ]
+
+
+def rebuild_search_index():
+    """
+    Recreate the search triggers and reindex every searchable row in a single transaction.
+
+    :return: dict: The number of documents of every resource.
+    """
+    try:
+        for name in TRIGGERS:
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in trigger_statements():
+            db.session.execute(text(statement))
+
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        counts = {}
+        for model in SEARCH_SOURCES:
+            table = model.__tablename__
+            db.session.execute(text(_index(model, table)))
+            counts[table] = db.session.execute(
+                text(f"SELECT count(*) FROM {SEARCH_TABLE} WHERE resource = :resource"), {"resource": table}
+            ).scalar()
+        # Merge the index b-trees written by the bulk insert
+        db.session.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"))
+        bump_version(SEARCH_TABLE)
+        db.session.commit()
+        return counts
+    except Exception as e:
+        logger.error(f"Error rebuilding the search index: {e}")
+        db.session.rollback()
+        raise
+
+
+def create_search_index():
+    """
+    Create the FTS5 search table and its triggers when they are missing, so a
+    database created before the search existed is indexed once and then kept up
+    to date. Nothing happens when the indexed tables do not exist yet; when SQLite
+    is built without FTS5 the search is disabled with a warning.
+    """
+    if not all(inspect(db.engine).has_table(model.__tablename__) for model in SEARCH_SOURCES):
+        return
+    try:
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"resource UNINDEXED, resource_id UNINDEXED, content, "
+            f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+        existing = set(db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+        db.session.commit()
+    except OperationalError as e:
+        db.session.rollback()
+        logger.warning(f"Full-text search is disabled, the search index cannot be created: {e}")
+        return
+    if not set(TRIGGERS) <= existing:
+        logger.info("Building the search index.")
+        rebuild_search_index()
+
+
+def match_expression(query):
+    """
+    Convert the text typed by a user to an FTS5 query: every word must appear in
+    the document, as a word or the prefix of a word. Operators and quotes of the
+    FTS5 syntax are dropped, so any input is a valid query.
+
+    :param query: The search text, e.g. "Corolla pastilhas".
+    :return: str: The MATCH expression, e.g. '"Corolla"* "pastilhas"*', or None without words.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
@@ -0,0 +1,110 @@
+# utils/serialization.py
+import json
+from datetime import date, datetime
+
+from flask import Response
+from sqlalchemy import Float, Numeric, inspect
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, the stdlib encoder is used without it
+    orjson = None
+
+from utils.timing import timed_serialization
+
+# Serializers compiled so far, by (model, requested fields)
+_serializers = {}
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _expression(column_type, value):
+    """
+    Python expression converting a column value the way the matching flask-restx
+    field of generate_swagger_model would (Float fields always render floats).
+    Dates and datetimes are left to the encoder.
+    """
+    if column_type in [Float, Numeric]:
+        return f"_float({value})"
+    return value
+
+
+def compile_serializer(model, fields=None):
+    """
+    Generate the source of a function converting a model instance to a dictionary
+    of its (requested) columns and compile it.
+
+    The function reads the loaded values straight from the instance __dict__ and
+    only goes through the ORM attributes when a value is not loaded, so no
+    per-field dispatch happens at serialization time.
+
+    :param model: SQLAlchemy model class
+    :param fields: Requested field names, or None for every column.
+    :return: Callable taking an instance and returning a dict.
+    """
+    mapper = inspect(model)
+    columns = [column for column in model.__table__.columns if not fields or column.name in fields]
+    keys = [(column.name, mapper.get_property_by_column(column).key, type(column.type)) for column in columns]
+    fast = ", ".join(f"{name!r}: {_expression(column_type, f'values[{key!r}]')}" for name, key, column_type in keys)
+    slow = ", ".join(f"{name!r}: {_expression(column_type, f'row.{key}')}" for name, key, column_type in keys)
+    source = (
+        "def serialize(row):\n"
+        "    values = row.__dict__\n"
+        "    try:\n"
+        f"        return {{{fast}}}\n"
+        "    except KeyError:\n"
+        f"        return {{{slow}}}\n"
+    )
+    namespace = {"_float": _float}
+    exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+def row_serializer(model, fields=None):
+    """
+    Return the compiled serializer of a model for a set of fields, compiling it on first use.
+
+    :param model: SQLAlchemy model class
+    :param fields: Requested field names, or None for every column.
+    :return: Callable taking an instance and returning a dict.
+    """
+    key = (model, tuple(fields) if fields else None)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        serializer = _serializers[key] = compile_serializer(model, fields)
+    return serializer
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    """
+    Encode data to JSON, natively handling dates and datetimes (ISO 8601, like
+    the flask-restx Date and DateTime fields). Uses orjson when it is installed.
+
+    :param data: The data to encode.
+    :return: bytes: The UTF-8 encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=_default).encode()
+
+
+def json_response(data, status=200, headers=None):
+    """
+    Build a JSON response with the fast encoder.
+
+    :param data: The data to encode.
+    :param status: The HTTP status code.
+    :param headers: Additional response headers.
+    :return: Flask Response
+    """
+    with timed_serialization():
+        body = dumps(data) + b"\n"
+    return Response(body, status, headers, mimetype='application/json')
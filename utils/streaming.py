@@ -0,0 +1,82 @@
+# utils/streaming.py
+from flask import Response, current_app, request, stream_with_context
+from sqlalchemy import inspect
+
+from utils.marshalling import mask_fields
+from utils.includes import include_serializer
+from utils.serialization import dumps
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson(stream=False):
+    """
+    Check whether the client asked for a streamed NDJSON response, either with
+    ?stream=1 or with an Accept header preferring application/x-ndjson.
+
+    :param stream: Value of the parsed 'stream' query argument.
+    :return: bool
+    """
+    if stream:
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def _rows(query, batch_size, include=None):
+    """
+    Iterate the rows of an export with a server-side cursor (yield_per).
+
+    Collections embedded with ?include= are loaded with selectinload, which cannot
+    be combined with yield_per, so in that case the rows are read in keyset pages
+    of batch_size rows instead, each page costing one query per include level.
+
+    :param query: Query ordered by primary key.
+    :param batch_size: Rows fetched at a time.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: Iterator over the model instances.
+    """
+    if not include:
+        yield from query.yield_per(batch_size)
+        return
+    primary_key = inspect(query.column_descriptions[0]['entity']).primary_key[0]
+    page = query.limit(batch_size).all()
+    while page:
+        yield from page
+        if len(page) < batch_size:
+            return
+        last = inspect(page[-1]).identity[0]
+        page = query.filter(primary_key > last).limit(batch_size).all()
+
+
+def ndjson_response(query, model, include=None):
+    """
+    Stream the rows of a query as newline-delimited JSON.
+
+    Rows are fetched from the database cursor in batches of STREAM_BATCH_SIZE
+    (see _rows) and each batch is serialized with the compiled serializer of the
+    queried model and written to the chunked response as soon as it arrives, so
+    memory usage does not grow with the table size.
+
+    :param query: Ordered query selecting the rows to export.
+    :param model: Flask-RESTx model of the rows; its fields bound the requested mask.
+    :param include: Related resources to embed, as parsed by utils.includes (optional).
+    :return: A streamed Flask Response.
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 1000)
+    fields = mask_fields()
+    if fields:
+        fields = [field for field in fields if field in model]
+    serialize = include_serializer(query.column_descriptions[0]['entity'], fields, include)
+
+    def generate():
+        lines = []
+        for row in _rows(query, batch_size, include):
+            lines.append(dumps(serialize(row)))
+            if len(lines) >= batch_size:
+                yield b'\n'.join(lines) + b'\n'
+                lines = []
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
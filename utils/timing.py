@@ -0,0 +1,166 @@
+# utils/timing.py
+import json
+import logging
+import random
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Timing of the current request, None when the request is not sampled (or timing is disabled)
+_timing = ContextVar('request_timing', default=None)
+
+# Returned by timed() outside a timed request: entering it costs next to nothing
+_untimed = nullcontext()
+
+
+class RequestTiming:
+    """
+    Time spent by one request: in total, running SQL statements, and serializing
+    (converting rows to dicts, marshalling and encoding JSON).
+    """
+
+    __slots__ = ('start', 'db', 'db_count', 'serialize')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db = 0.0
+        self.db_count = 0
+        self.serialize = 0.0
+
+    def record(self, response):
+        """
+        :return: dict: The structured record of the request, durations in milliseconds.
+        """
+        return {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 3),
+            'db_ms': round(self.db * 1000, 3),
+            'db_count': self.db_count,
+            'serialize_ms': round(self.serialize * 1000, 3),
+        }
+
+
+class _Serializing:
+    __slots__ = ('timing', 'start')
+
+    def __init__(self, timing):
+        self.timing = timing
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timing.serialize += time.perf_counter() - self.start
+
+
+def timed_serialization():
+    """
+    Context manager adding the time of the block to the serialize duration of the
+    current request. Does nothing when the request is not timed.
+    """
+    timing = _timing.get()
+    return _untimed if timing is None else _Serializing(timing)
+
+
+# Callables notified with the text and the duration (seconds) of every SQL statement
+# run, e.g. the Prometheus histograms of utils.metrics
+statement_listeners = []
+
+
+def on_statement_timed(listener):
+    """
+    Register a callable receiving the text and the duration in seconds of every
+    SQL statement run by the process, timed by the hook of this module.
+
+    :param listener: Callable taking the statement and its duration.
+    :return: The listener, so the function can be used as a decorator.
+    """
+    if listener not in statement_listeners:
+        statement_listeners.append(listener)
+    watch_statements()
+    return listener
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, so a failing statement leaves nothing behind
+    if statement_listeners or _timing.get() is not None:
+        context._timing_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_timing_start', None)
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    timing = _timing.get()
+    if timing is not None:
+        timing.db += duration
+        timing.db_count += 1
+    for listener in statement_listeners:
+        listener(statement, duration)
+
+
+def watch_statements():
+    """
+    Time the SQL statements of every engine, for the timed requests and the
+    statement listeners. The hook is installed once per process.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def server_timing(record):
+    """
+    Build the Server-Timing header value of a request record.
+    """
+    return (
+        f"db;dur={record['db_ms']}, db-count;desc={record['db_count']}, "
+        f"serialize;dur={record['serialize_ms']}, total;dur={record['total_ms']}"
+    )
+
+
+def init_timing(app):
+    """
+    Time a sample of the requests (SERVER_TIMING_SAMPLE_RATE) when SERVER_TIMING_ENABLED
+    is set: the durations are sent in a Server-Timing header and logged as one JSON
+    record per request. Nothing is hooked when timing is disabled.
+    Must be called before the other before_request hooks are registered, so they are timed too.
+
+    :param app: Flask application.
+    """
+    if not app.config["SERVER_TIMING_ENABLED"]:
+        return
+    sample_rate = app.config["SERVER_TIMING_SAMPLE_RATE"]
+    watch_statements()
+
+    @app.before_request
+    def start_timing():
+        if sample_rate >= 1 or random.random() < sample_rate:
+            g.timing_token = _timing.set(RequestTiming())
+
+    # Registered first, so it runs after every other after_request hook
+    @app.after_request
+    def send_server_timing(response):
+        timing = _timing.get()
+        if timing is not None:
+            record = timing.record(response)
+            response.headers['Server-Timing'] = server_timing(record)
+            response.headers['Timing-Allow-Origin'] = '*'
+            logger.info(json.dumps(record))
+        return response
+
+    @app.teardown_request
+    def stop_timing(exc=None):
+        token = g.pop('timing_token', None)
+        if token is not None:
+            _timing.reset(token)
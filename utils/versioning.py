@@ -0,0 +1,169 @@
+# utils/versioning.py
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from models.table_version import TableVersion
+from utils.database import db
+
+# SQL incrementing the change counter of a table, creating it on first use
+_BUMP = (
+    f"INSERT INTO {TableVersion.__tablename__} (table_name, version) VALUES ({{name}}, 1) "
+    f"ON CONFLICT (table_name) DO UPDATE SET version = version + 1;"
+)
+
+
+# Triggers of earlier versions, bumping the counters once per written row
+_TRIGGER_ACTIONS = ('insert', 'update', 'delete')
+
+# Tables written by triggers of a table (e.g. the revenue rollups of invoice), whose
+# counters are bumped together with it
+derived_tables = {}
+
+
+def track_derived_tables(table_name, names):
+    """
+    Declare tables that triggers of a table write to, so a commit changing the
+    table bumps their counters too.
+
+    :param table_name: Name of the table with the triggers.
+    :param names: Names of the tables the triggers write to.
+    """
+    derived_tables.setdefault(table_name, set()).update(names)
+
+
+def drop_version_triggers():
+    """
+    Drop the row triggers that bumped the change counters in earlier versions:
+    the counters are now bumped once per commit (see bump_changed_tables).
+    """
+    existing = set(db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+    for table in db.metadata.sorted_tables:
+        for action in _TRIGGER_ACTIONS:
+            name = f"{table.name}_version_{action}"
+            if name in existing:
+                db.session.execute(text(f"DROP TRIGGER {name}"))
+    db.session.commit()
+
+
+def create_version_table():
+    """
+    Create the table_version table when it is missing, and drop the row triggers
+    of earlier versions.
+    """
+    TableVersion.__table__.create(bind=db.engine, checkfirst=True)
+    drop_version_triggers()
+
+
+def bump_version(table_name):
+    """
+    Note a table changed by writes the sessions do not see (raw SQL, the full-text
+    search index), so the current transaction bumps its change counter when it
+    commits. The new version becomes visible to other workers on commit.
+
+    :param table_name: Name of the table that was changed.
+    """
+    _changed_tables(db.session()).add(table_name)
+
+
+def get_version(table_name):
+    """
+    Read the change counter of a table.
+
+    :param table_name: Name of the table.
+    :return: int: The current version, 0 when the table was never changed.
+    """
+    statement = select(TableVersion.version).where(TableVersion.table_name == table_name)
+    return db.session.execute(statement).scalar() or 0
+
+
+def get_versions(table_names, session=None):
+    """
+    Read the change counters of several tables with a single query.
+
+    :param table_names: Names of the tables.
+    :param session: Session to read with (optional, db.session by default).
+    :return: dict: The version of every table, 0 when the table was never changed.
+    """
+    statement = select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(table_names))
+    versions = dict((session or db.session).execute(statement).all())
+    return {name: versions.get(name, 0) for name in table_names}
+
+
+async def get_versions_async(session, table_names):
+    """
+    Async variant of get_versions, run on an AsyncSession (see utils.async_database).
+
+    :param session: sqlalchemy.ext.asyncio.AsyncSession
+    :param table_names: Names of the tables.
+    :return: dict: The version of every table, 0 when the table was never changed.
+    """
+    statement = select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(table_names))
+    versions = dict((await session.execute(statement)).all())
+    return {name: versions.get(name, 0) for name in table_names}
+
+
+# Callables notified with the names of the tables changed by every commit
+commit_listeners = []
+
+
+def on_tables_committed(listener):
+    """
+    Register a callable receiving the set of table names changed by each commit
+    of this process (e.g. to drop cached responses built from those tables).
+
+    :param listener: Callable taking a set of table names.
+    :return: The listener, so the function can be used as a decorator.
+    """
+    commit_listeners.append(listener)
+    return listener
+
+
+def _changed_tables(session):
+    return session.info.setdefault('changed_tables', set())
+
+
+# The sessions note which tables their writes touched, then bump each counter once
+# when they commit and tell the in-process caches.
+@event.listens_for(Session, "after_flush")
+def collect_flushed_tables(session, flush_context):
+    changed = _changed_tables(session)
+    for instance in list(session.new) + list(session.deleted):
+        changed.add(inspect(instance).mapper.local_table.name)
+    for instance in session.dirty:
+        if session.is_modified(instance, include_collections=False):
+            changed.add(inspect(instance).mapper.local_table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def collect_statement_tables(orm_execute_state):
+    # INSERT / UPDATE / DELETE statements (bulk endpoints, update_returning)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table
+        if table.name != TableVersion.__tablename__:
+            _changed_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, "before_commit")
+def bump_changed_tables(session):
+    # Once per table and commit, however many rows and statements changed it, in the
+    # transaction of the write (utils.replicas reads the new versions back afterwards)
+    session.flush()  # Changes still pending are flushed by commit only after this event
+    changed = _changed_tables(session)
+    for table_name in list(changed):
+        changed.update(derived_tables.get(table_name, ()))
+    if changed:
+        session.execute(text(_BUMP.format(name=':name')), [{"name": name} for name in sorted(changed)])
+
+
+@event.listens_for(Session, "after_commit")
+def notify_committed_tables(session):
+    changed = session.info.pop('changed_tables', set())
+    if changed:
+        for listener in commit_listeners:
+            listener(changed)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def forget_changed_tables(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('changed_tables', None)